@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from typing import AsyncIterator
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseProvider:
+    """AI provayder interfeysi: xabarlar ro'yxatini olib, tayyor javob matnini qaytaradi."""
+
+    async def complete(self, messages: list[dict], *, max_tokens: int, temperature: float, timeout: float) -> str | None:
+        raise NotImplementedError
+
+    async def stream(self, messages: list[dict], *, max_tokens: int, temperature: float,
+                     timeout: float) -> AsyncIterator[str]:
+        """Javobni bo'laklab (token/delta) beradi; oqimni qo'llamaydigan provayderda — bitta bo'lak"""
+        answer = await self.complete(messages, max_tokens=max_tokens, temperature=temperature, timeout=timeout)
+        if answer:
+            yield answer
+
+    async def close(self):
+        pass
+
+
+class OpenAIProvider(BaseProvider):
+    """
+    Bitta umumiy AsyncOpenAI klienti.
+    Ichidagi httpx connection pool barcha so'rovlar uchun qayta ishlatiladi.
+    """
+
+    def __init__(self, api_key: str, model: str, max_connections: int):
+        import httpx
+        import openai
+
+        self.model = model
+        self.client = openai.AsyncOpenAI(
+            api_key=api_key,
+            max_retries=settings.AI_MAX_RETRIES,
+            http_client=openai.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections,
+                ),
+            ),
+        )
+
+    async def complete(self, messages, *, max_tokens, temperature, timeout):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+        )
+        return response.choices[0].message.content
+
+    async def stream(self, messages, *, max_tokens, temperature, timeout):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            timeout=timeout,
+            stream=True,
+        )
+        async for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self):
+        await self.client.close()
+
+
+class FakeProvider(BaseProvider):
+    """
+    Tarmoqsiz lokal provayder — yuklama testlari uchun.
+    Har bir so'rovga `latency` soniya kutib (birinchi token), savolni qaytaradi;
+    token_delay > 0 bo'lsa har bir so'z generatsiyasi shuncha soniya davom etadi.
+    """
+
+    def __init__(self, latency: float = 0.5, token_delay: float = 0.0):
+        self.latency = latency
+        self.token_delay = token_delay
+
+    def _answer(self, messages) -> str:
+        question = messages[-1]['content']
+        return f"[fake] {question}\n\nAgar xohlasangiz, yana savol berishingiz mumkin"
+
+    async def complete(self, messages, *, max_tokens, temperature, timeout):
+        answer = self._answer(messages)
+        delay = self.latency + self.token_delay * len(answer.split(' '))
+        await asyncio.wait_for(asyncio.sleep(delay), timeout=timeout)
+        return answer
+
+    async def stream(self, messages, *, max_tokens, temperature, timeout):
+        await asyncio.wait_for(asyncio.sleep(self.latency), timeout=timeout)
+        for i, word in enumerate(self._answer(messages).split(' ')):
+            if self.token_delay:
+                await asyncio.sleep(self.token_delay)
+            yield word if i == 0 else ' ' + word
+
+
+PROVIDERS = {
+    'openai': 'bot.ai_providers.OpenAIProvider',
+    'fake': 'bot.ai_providers.FakeProvider',
+}
+
+
+def build_provider() -> BaseProvider | None:
+    """settings.AI_PROVIDER bo'yicha provayder yaratadi (qisqa nom yoki to'liq import yo'li)."""
+    name = settings.AI_PROVIDER
+    provider_class = import_string(PROVIDERS.get(name, name))
+
+    if provider_class is FakeProvider:
+        return FakeProvider(latency=settings.AI_FAKE_LATENCY, token_delay=settings.AI_FAKE_TOKEN_DELAY)
+
+    if provider_class is OpenAIProvider:
+        if not settings.AI_API_KEY:
+            return None
+        return OpenAIProvider(
+            api_key=settings.AI_API_KEY,
+            model=settings.AI_MODEL,
+            max_connections=settings.AI_MAX_CONCURRENCY,
+        )
+
+    return provider_class()
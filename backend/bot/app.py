@@ -0,0 +1,91 @@
+"""
+Dispatcher yig'ish: runbot (polling va webhook) va benchmarklar bir xil sozlamadan foydalanadi.
+"""
+import asyncio
+import logging
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from bot.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ALLOWED_UPDATES = ['message', 'callback_query', 'chat_member']
+
+
+def create_bot(token: str, api_base: str | None = None, limit_sends: bool = True,
+               global_rate: float | None = None) -> Bot:
+    """
+    HTML parse_mode va chiquvchi xabarlar limiti (SendLimiter) bilan Bot.
+    global_rate — shu jarayonning ulushi (masalan, N ta worker bo'lsa SEND_GLOBAL_RATE / N).
+    """
+    from bot.ratelimit import SendLimiter
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_base)) if api_base else AiohttpSession()
+    if limit_sends:
+        session.middleware(SendLimiter(global_rate=global_rate))
+    return Bot(token=token, session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+
+def create_dispatcher() -> Dispatcher:
+    from bot.handlers import start, topics, freetext, membership
+    from bot.message_log import message_log
+    from bot.middlewares import SubscriptionMiddleware
+    from bot.ratelimit import ThrottlingMiddleware
+    from bot.scheduler import LaneMiddleware, UserSerialMiddleware
+    from bot.users import user_directory
+    from bot.utils import ai_service, answer_cache_maintenance
+
+    dp = Dispatcher()
+
+    # Register middlewares: flood control, per-user ordering, lane limits after the subscription check
+    dp.update.outer_middleware(ThrottlingMiddleware())
+    dp.update.outer_middleware(UserSerialMiddleware())
+    dp.message.middleware(SubscriptionMiddleware())
+    dp.message.middleware(LaneMiddleware())
+
+    # Shared AI client is closed together with the dispatcher
+    dp.shutdown.register(ai_service.close)
+
+    # Buffered message log: started with the dispatcher, flushed on shutdown
+    dp.startup.register(message_log.start)
+    dp.shutdown.register(message_log.stop)
+
+    # User identity cache: profile/last_active changes are flushed in batches and on shutdown
+    dp.startup.register(user_directory.start)
+    dp.shutdown.register(user_directory.stop)
+
+    # AI answer cache: hit/miss stats and eviction are written in the background
+    dp.startup.register(answer_cache_maintenance.start)
+    dp.shutdown.register(answer_cache_maintenance.stop)
+
+    # Register routers
+    dp.include_router(start.router)
+    dp.include_router(topics.router)
+    dp.include_router(freetext.router)
+    dp.include_router(membership.router)
+    return dp
+
+
+async def watch_knowledge():
+    """Bilim bazasi versiyasini kuzatadi; o'zgarsa snapshot almashtiriladi"""
+    from bot.knowledge_cache import knowledge_cache
+    while True:
+        await asyncio.sleep(settings.KNOWLEDGE_POLL_INTERVAL)
+        try:
+            if await sync_to_async(knowledge_cache.refresh)():
+                metrics.inc('knowledge.reloads')
+        except Exception as e:
+            logger.error(f"Knowledge refresh error: {e}")
+
+
+async def report_metrics():
+    while True:
+        await asyncio.sleep(settings.METRICS_LOG_INTERVAL)
+        metrics.log()
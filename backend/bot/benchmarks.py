@@ -0,0 +1,217 @@
+"""
+Benchmarklar uchun lokal soxta Telegram Bot API serveri va yuklama generatori.
+Server getUpdates navbatini beradi, sendMessage kabi chaqiruvlarni qabul qilib,
+har bir chat uchun javob kelgan vaqtni qayd etadi.
+
+Benchmarklar bench_database() ichida — vaqtinchalik test bazasida ishlaydi: jonli bazadagi
+foydalanuvchilar, xabarlar va hisoblagichlarga tegilmaydi.
+"""
+import asyncio
+import itertools
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable
+from urllib.parse import urlsplit, urlunsplit
+
+from aiogram import Bot
+from aiohttp import web
+from django.db import DEFAULT_DB_ALIAS, connections
+
+BENCH_TOKEN = '123456:BENCH-fake-token'
+BENCH_USER_BASE = 1_000_000  # only ever created in the throwaway benchmark database
+
+
+def _database_url(url: str | None, vendor: str, name: str) -> str:
+    if vendor == 'sqlite':
+        return f'sqlite:///{name}'
+    scheme, netloc, _, query, fragment = urlsplit(url)
+    return urlunsplit((scheme, netloc, f'/{name}', query, fragment))
+
+
+@contextmanager
+def bench_database(users: int = 0):
+    """
+    Vaqtinchalik test bazasi (create_test_db): jonli bazadagi mavzu va FAQlar nusxalanadi,
+    users ta soxta foydalanuvchi yaratiladi, oxirida baza butunlay o'chiriladi.
+    Spawn qilingan workerlar ham shu bazani ochishi uchun DATABASE_URL almashtiriladi.
+    """
+    from conversations.models import TelegramUser
+    from knowledge.models import FAQ, Topic
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite' and not os.environ.get('DATABASE_URL'):
+        raise RuntimeError("bench_database: DATABASE_URL kerak (workerlar test bazasini shu orqali topadi)")
+    topics, faqs = list(Topic.objects.all()), list(FAQ.objects.all())
+    old_name, old_url = connection.settings_dict['NAME'], os.environ.get('DATABASE_URL')
+    old_test_name = connection.settings_dict['TEST'].get('NAME')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if connection.vendor == 'sqlite':
+            # A file rather than the default in-memory database, so worker processes can open it too
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmp, 'bench.sqlite3')
+        test_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        os.environ['DATABASE_URL'] = _database_url(old_url, connection.vendor, test_name)
+        try:
+            Topic.objects.bulk_create(topics)
+            FAQ.objects.bulk_create(faqs)
+            TelegramUser.objects.bulk_create(
+                [TelegramUser(telegram_id=BENCH_USER_BASE + i, full_name=f"Bench {i}", is_subscribed=True)
+                 for i in range(users)]
+            )
+            yield
+        finally:
+            if old_url is None:
+                os.environ.pop('DATABASE_URL', None)
+            else:
+                os.environ['DATABASE_URL'] = old_url
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            connection.settings_dict['TEST']['NAME'] = old_test_name
+
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    user = {'id': user_id, 'is_bot': False, 'first_name': 'Bench', 'username': f'bench{user_id}'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private'},
+            'from': user,
+            'text': text,
+        },
+    }
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+class FakeTelegram:
+    """Bot API'ning benchmark uchun yetarli qismi"""
+
+    def __init__(self):
+        self.updates: list[dict] = []
+        self.calls = 0
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_updates = asyncio.Event()
+        self._waiters: dict[int, asyncio.Future] = {}
+        self._watchers: dict[int, Callable[[str, str], None]] = {}
+        self._runner = None
+        self.url = None
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0):
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f'http://{host}:{port}'
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    def bot(self) -> Bot:
+        # No send limiter: the benchmarks measure processing capacity, not Telegram's quotas
+        from bot.app import create_bot
+        return create_bot(BENCH_TOKEN, api_base=self.url, limit_sends=False)
+
+    def next_update(self, user_id: int, text: str) -> dict:
+        return make_update(next(self._update_ids), user_id, text)
+
+    def push(self, update: dict):
+        """Polling uchun: update getUpdates navbatiga qo'shiladi"""
+        self.updates.append(update)
+        self._new_updates.set()
+
+    def expect_reply(self, chat_id: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._waiters[chat_id] = future
+        return future
+
+    def cancel_reply(self, chat_id: int):
+        future = self._waiters.pop(chat_id, None)
+        if future and not future.done():
+            future.cancel()
+
+    def watch(self, chat_id: int, callback: Callable[[str, str], None] | None):
+        """callback(method, text) — chatga yuborilgan yoki tahrirlangan har bir matn uchun"""
+        if callback is None:
+            self._watchers.pop(chat_id, None)
+        else:
+            self._watchers[chat_id] = callback
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        method = request.match_info['method'].lower()
+        if request.content_type == 'application/json':
+            params = await request.json()
+        else:
+            params = dict(await request.post())
+        handler = getattr(self, f'_api_{method}', None)
+        result = await handler(params) if handler else True
+        return web.json_response({'ok': True, 'result': result})
+
+    async def _api_getme(self, params):
+        return {'id': 123456, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+
+    async def _api_getupdates(self, params):
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or 100)
+        timeout = float(params.get('timeout') or 0)
+        self.updates = [u for u in self.updates if u['update_id'] >= offset]
+        if not self.updates and timeout:
+            self._new_updates.clear()
+            try:
+                await asyncio.wait_for(self._new_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:limit]
+
+    async def _api_getchatmember(self, params):
+        user_id = int(params['user_id'])
+        return {'status': 'member', 'user': {'id': user_id, 'is_bot': False, 'first_name': 'Bench'}}
+
+    async def _api_sendmessage(self, params):
+        chat_id = int(params['chat_id'])
+        future = self._waiters.pop(chat_id, None)
+        if future and not future.done():
+            future.set_result(time.perf_counter())
+        return self._message(chat_id, params.get('text', ''), 'sendMessage')
+
+    async def _api_editmessagetext(self, params):
+        return self._message(int(params['chat_id']), params.get('text', ''), 'editMessageText')
+
+    def _message(self, chat_id: int, text: str, method: str) -> dict:
+        watcher = self._watchers.get(chat_id)
+        if watcher:
+            watcher(method, text)
+        return {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text,
+        }
+
+
+async def drive(send, users: int, total: int) -> tuple[float, list[float]]:
+    """
+    users ta foydalanuvchi navbat bilan (har biri oldingi javobni kutib) jami total ta update yuboradi.
+    send(user_id) bitta update uchun kechikishni (soniya) qaytaradi.
+    """
+    remaining = itertools.count()
+    latencies = []
+
+    async def user_loop(user_id: int):
+        while next(remaining) < total:
+            latencies.append(await send(user_id))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user_loop(BENCH_USER_BASE + i) for i in range(users)))
+    return time.perf_counter() - started, latencies
@@ -0,0 +1,229 @@
+"""
+E'lonlarni barcha foydalanuvchilarga yuborish (conversations.Broadcast).
+
+Qabul qiluvchilar id bo'yicha bo'laklab (keyset) o'qiladi — xotirada faqat bitta bo'lak turadi.
+Har bir bo'lak uchun yetkazish qatorlari (pending) va cursor bitta tranzaksiyada yoziladi,
+shundan keyingina xabarlar yuboriladi. Jarayon yiqilsa, qayta ishga tushganda cursor'dan davom
+etiladi: yozilgan (lekin natijasi noma'lum) qatorlar qayta yuborilmaydi — takroriy xabar bo'lmaydi.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from bot.metrics import metrics
+from bot.ratelimit import TokenBucket
+from conversations.models import Broadcast, BroadcastDelivery, TelegramUser
+
+logger = logging.getLogger(__name__)
+
+INTERRUPTED = "Yuborish jarayoni uzilib qolgan"
+
+
+class BroadcastLost(Exception):
+    """Vazifani boshqa jarayon egallab oldi (bu jarayon heartbeat'ni kechiktirgan)"""
+
+
+def recipients():
+    return TelegramUser.objects.filter(is_blocked=False)
+
+
+def claim_broadcast(broadcast_id: int | None = None) -> Broadcast | None:
+    """
+    Navbatdagi (yoki heartbeat'i eskirgan) vazifani atomik tarzda egallaydi.
+    Bir nechta jarayon ishlayotgan bo'lsa ham vazifani faqat bittasi oladi.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.BROADCAST_STALE_AFTER)
+    claimable = Q(status=Broadcast.PENDING) | Q(status=Broadcast.RUNNING, heartbeat_at__lt=stale)
+    candidates = Broadcast.objects.filter(claimable).order_by('created_at')
+    if broadcast_id is not None:
+        candidates = candidates.filter(pk=broadcast_id)
+
+    for pk in candidates.values_list('pk', flat=True)[:5]:
+        taken = Broadcast.objects.filter(claimable, pk=pk).update(
+            status=Broadcast.RUNNING, heartbeat_at=now, started_at=Coalesce(F('started_at'), now),
+        )
+        if not taken:
+            continue  # another process was faster
+        broadcast = Broadcast.objects.get(pk=pk)
+        if broadcast.last_user_id is None:
+            # Recipients are fixed at the first claim: users who join later are not included
+            snapshot = recipients().aggregate(total=Count('id'), last=Max('id'))
+            broadcast.total = snapshot['total']
+            broadcast.last_user_id = snapshot['last'] or 0
+            broadcast.save(update_fields=['total', 'last_user_id'])
+        return broadcast
+    return None
+
+
+def reserve_chunk(broadcast: Broadcast, size: int) -> list[tuple[int, int]]:
+    """Keyingi bo'lak: (TelegramUser.id, telegram_id) ro'yxati; yetkazish qatorlari va cursor yoziladi"""
+    rows = list(
+        recipients()
+        .filter(id__gt=broadcast.cursor, id__lte=broadcast.last_user_id)
+        .order_by('id')
+        .values_list('id', 'telegram_id')[:size]
+    )
+    if not rows:
+        return rows
+    with transaction.atomic():
+        # Compare-and-set on the cursor: if another process resumed the job, this one must stop
+        owned = Broadcast.objects.filter(pk=broadcast.pk, cursor=broadcast.cursor).update(
+            cursor=rows[-1][0], heartbeat_at=timezone.now(),
+        )
+        if not owned:
+            raise BroadcastLost(broadcast.pk)
+        BroadcastDelivery.objects.bulk_create(
+            [BroadcastDelivery(broadcast=broadcast, user_id=user_id) for user_id, _ in rows],
+            ignore_conflicts=True,
+        )
+    broadcast.cursor = rows[-1][0]
+    return rows
+
+
+def record_chunk(broadcast: Broadcast, results: list[tuple[int, str, str]]) -> str:
+    """Bo'lak natijalarini yozadi va vazifaning joriy holatini qaytaradi (bekor qilinganini bilish uchun)"""
+    groups = defaultdict(list)
+    for user_id, status, error in results:
+        groups[status, error].append(user_id)
+    counts = defaultdict(int)
+    with transaction.atomic():
+        for (status, error), user_ids in groups.items():
+            BroadcastDelivery.objects.filter(broadcast=broadcast, user_id__in=user_ids).update(
+                status=status, error=error,
+            )
+            counts[status] += len(user_ids)
+            if status == BroadcastDelivery.BLOCKED:
+                TelegramUser.objects.filter(id__in=user_ids).update(is_blocked=True)
+        Broadcast.objects.filter(pk=broadcast.pk).update(
+            sent=F('sent') + counts[BroadcastDelivery.SENT],
+            failed=F('failed') + counts[BroadcastDelivery.FAILED],
+            blocked=F('blocked') + counts[BroadcastDelivery.BLOCKED],
+            heartbeat_at=timezone.now(),
+        )
+    for status, count in counts.items():
+        metrics.inc(f'broadcast.{status}', count)
+    return Broadcast.objects.values_list('status', flat=True).get(pk=broadcast.pk)
+
+
+def touch_heartbeat(broadcast: Broadcast):
+    """
+    Bo'lak yuborilayotganda vazifa hali egallanganini bildiradi. Boshqa jarayon davom ettirgan
+    bo'lsa (cursor o'zgargan) hech narsa yozilmaydi; buni keyingi reserve_chunk aniqlaydi.
+    """
+    Broadcast.objects.filter(pk=broadcast.pk, cursor=broadcast.cursor, status=Broadcast.RUNNING).update(
+        heartbeat_at=timezone.now(),
+    )
+
+
+def finish_broadcast(broadcast: Broadcast, status: str, error: str = ''):
+    with transaction.atomic():
+        # Rows reserved by a crashed run: their outcome is unknown, so they are not retried
+        interrupted = BroadcastDelivery.objects.filter(
+            broadcast=broadcast, status=BroadcastDelivery.PENDING,
+        ).update(status=BroadcastDelivery.FAILED, error=INTERRUPTED)
+        Broadcast.objects.filter(pk=broadcast.pk).update(failed=F('failed') + interrupted, finished_at=timezone.now())
+        # A cancel stored meanwhile wins
+        Broadcast.objects.filter(pk=broadcast.pk, status=Broadcast.RUNNING).update(status=status, error=error)
+
+
+class BroadcastRunner:
+    """
+    Bitta vazifani oxirigacha yuboradi. Tezlik BROADCAST_RATE bilan cheklanadi, bir vaqtda
+    BROADCAST_CONCURRENCY tagacha so'rov; 429 va chat limitlari bot sessiyasidagi SendLimiter'da.
+    """
+
+    def __init__(self, bot: Bot, rate: float | None = None, chunk_size: int | None = None,
+                 concurrency: int | None = None, on_progress: Callable[[Broadcast], None] | None = None):
+        rate = rate or settings.BROADCAST_RATE
+        self.bot = bot
+        self.bucket = TokenBucket(rate, rate)
+        self.chunk_size = chunk_size or settings.BROADCAST_CHUNK_SIZE
+        self.semaphore = asyncio.Semaphore(concurrency or settings.BROADCAST_CONCURRENCY)
+        self.on_progress = on_progress
+
+    async def run(self, broadcast: Broadcast) -> Broadcast:
+        logger.info(f"Broadcast #{broadcast.pk}: {broadcast.total} ta qabul qiluvchi, cursor={broadcast.cursor}")
+        try:
+            status = Broadcast.RUNNING
+            while status == Broadcast.RUNNING:
+                rows = await sync_to_async(reserve_chunk)(broadcast, self.chunk_size)
+                if not rows:
+                    status = Broadcast.DONE
+                    break
+                results = await self._send_chunk(broadcast, rows)
+                status = await sync_to_async(record_chunk)(broadcast, results)
+                if self.on_progress:
+                    await sync_to_async(broadcast.refresh_from_db)()
+                    self.on_progress(broadcast)
+            await sync_to_async(finish_broadcast)(broadcast, status)
+        except BroadcastLost:
+            logger.warning(f"Broadcast #{broadcast.pk} boshqa jarayon tomonidan davom ettirilmoqda, to'xtatildi")
+        except Exception as e:
+            logger.exception(f"Broadcast #{broadcast.pk} xatolik: {e}")
+            await sync_to_async(finish_broadcast)(broadcast, Broadcast.FAILED, str(e))
+        await sync_to_async(broadcast.refresh_from_db)()
+        logger.info(f"Broadcast #{broadcast.pk} {broadcast.status}: sent={broadcast.sent} "
+                    f"failed={broadcast.failed} blocked={broadcast.blocked}")
+        return broadcast
+
+    async def _send_chunk(self, broadcast: Broadcast, rows: list[tuple[int, int]]) -> list[tuple[int, str, str]]:
+        # At a low rate one chunk can take longer than BROADCAST_STALE_AFTER, so the heartbeat
+        # is kept fresh while it is in flight; otherwise another process would reclaim the job
+        heartbeat = asyncio.create_task(self._heartbeat(broadcast))
+        try:
+            return await asyncio.gather(*(self._deliver(user_id, chat_id, broadcast.text) for user_id, chat_id in rows))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, broadcast: Broadcast):
+        while True:
+            await asyncio.sleep(settings.BROADCAST_STALE_AFTER / 4)
+            try:
+                await sync_to_async(touch_heartbeat)(broadcast)
+            except Exception as e:
+                logger.warning(f"Broadcast #{broadcast.pk} heartbeat error: {e}")
+
+    async def _deliver(self, user_id: int, chat_id: int, text: str) -> tuple[int, str, str]:
+        async with self.semaphore:
+            await self.bucket.take()
+            try:
+                await self.bot.send_message(chat_id, text)
+                return user_id, BroadcastDelivery.SENT, ''
+            except TelegramForbiddenError as e:  # bot blocked or account deleted
+                return user_id, BroadcastDelivery.BLOCKED, e.message[:300]
+            except Exception as e:
+                return user_id, BroadcastDelivery.FAILED, str(e)[:300]
+
+
+async def watch_broadcasts(bot: Bot, on_running: Callable[[bool], None] | None = None):
+    """
+    runbot fon vazifasi: navbatdagi yoki uzilib qolgan e'lonlarni topib yuboradi.
+    on_running(True/False) — yuborish boshlanishi va tugashi haqida (front: workerlar ulushini kamaytirish uchun).
+    """
+    while True:
+        try:
+            broadcast = await sync_to_async(claim_broadcast)()
+            if broadcast is not None:
+                if on_running:
+                    on_running(True)
+                try:
+                    await BroadcastRunner(bot).run(broadcast)
+                finally:
+                    if on_running:
+                        on_running(False)
+                continue
+        except Exception as e:
+            logger.error(f"Broadcast watcher error: {e}")
+        await asyncio.sleep(settings.BROADCAST_POLL_INTERVAL)
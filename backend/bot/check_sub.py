@@ -1,23 +1,127 @@
 from aiogram import Bot
+from aiogram.types import Chat
 from django.conf import settings
+from django.utils import timezone
 from aiogram.enums import ChatMemberStatus
+from collections import OrderedDict
 import logging
+import time
+
+from bot.metrics import metrics
+from conversations.models import TelegramUser
 
 logger = logging.getLogger(__name__)
 
-async def is_user_subscribed(bot: Bot, user_id: int) -> bool:
-    """Kanalga obunani tekshirish"""
+
+class SubscriptionCache:
+    """
+    Obuna natijalari uchun jarayon ichidagi TTL + LRU kesh.
+    Obuna bo'lganlar va bo'lmaganlar uchun alohida TTL ishlatiladi.
+    """
+
+    def __init__(self, positive_ttl: float, negative_ttl: float, max_size: int):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._data: OrderedDict[int, tuple[bool, float]] = OrderedDict()
+
+    def get(self, user_id: int) -> bool | None:
+        entry = self._data.get(user_id)
+        if entry is None:
+            metrics.inc('sub_cache.miss')
+            return None
+        subscribed, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[user_id]
+            metrics.inc('sub_cache.miss')
+            return None
+        self._data.move_to_end(user_id)
+        metrics.inc('sub_cache.hit')
+        return subscribed
+
+    def set(self, user_id: int, subscribed: bool):
+        ttl = self.positive_ttl if subscribed else self.negative_ttl
+        self._data[user_id] = (subscribed, time.monotonic() + ttl)
+        self._data.move_to_end(user_id)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+        metrics.set('sub_cache.size', len(self._data))
+
+    def invalidate(self, user_id: int):
+        self._data.pop(user_id, None)
+
+
+subscription_cache = SubscriptionCache(
+    positive_ttl=settings.SUB_CACHE_POSITIVE_TTL,
+    negative_ttl=settings.SUB_CACHE_NEGATIVE_TTL,
+    max_size=settings.SUB_CACHE_MAX_SIZE,
+)
+
+
+SUBSCRIBED_STATUSES = {
+    ChatMemberStatus.MEMBER,
+    ChatMemberStatus.ADMINISTRATOR,
+    ChatMemberStatus.CREATOR,
+}
+
+
+def is_channel_chat(chat: Chat) -> bool:
+    """settings.CHANNEL_ID (@username yoki raqamli ID) shu chatga tegishlimi"""
+    channel = str(settings.CHANNEL_ID)
+    if channel.startswith('@'):
+        return (chat.username or '').lower() == channel[1:].lower()
+    return str(chat.id) == channel
+
+
+async def save_subscription_state(user_id: int, subscribed: bool):
+    """Obuna holatini kesh va bazaga yozadi"""
+    subscription_cache.set(user_id, subscribed)
+    await TelegramUser.objects.filter(telegram_id=user_id).aupdate(
+        is_subscribed=subscribed,
+        subscription_updated_at=timezone.now(),
+    )
+
+
+async def fetch_subscription(bot: Bot, user_id: int) -> bool | None:
+    """Telegram API orqali tekshirish. Xatolikda None qaytaradi."""
     try:
         logger.info(f"Checking subscription for user {user_id} in channel {settings.CHANNEL_ID}")
+        metrics.inc('sub_check.api_calls')
         member = await bot.get_chat_member(chat_id=settings.CHANNEL_ID, user_id=user_id)
         logger.info(f"User {user_id} status: {member.status}")
-        return member.status in [
-            ChatMemberStatus.MEMBER,
-            ChatMemberStatus.ADMINISTRATOR,
-            ChatMemberStatus.CREATOR
-        ]
+        return member.status in SUBSCRIBED_STATUSES
     except Exception as e:
         logger.error(f"Subscription check error for user {user_id}: {e}")
-        # In case of error (e.g. user not found, bot not admin), we return False to be safe
-        # but let's log it clearly.
+        return None
+
+
+async def is_user_subscribed(bot: Bot, user_id: int, use_cache: bool = True) -> bool:
+    """
+    Kanalga obunani tekshirish.
+    Avval kesh, keyin bazadagi holat (chat_member yangilanishlaridan) ishlatiladi;
+    API faqat holati noma'lum foydalanuvchilar uchun chaqiriladi.
+    use_cache=False bo'lsa to'g'ridan-to'g'ri API so'raladi.
+    """
+    if use_cache:
+        cached = subscription_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        stored = await (
+            TelegramUser.objects.filter(telegram_id=user_id)
+            .values_list('is_subscribed', flat=True)
+            .afirst()
+        )
+        if stored is not None:
+            metrics.inc('sub_check.local_state')
+            subscription_cache.set(user_id, stored)
+            return stored
+
+    subscribed = await fetch_subscription(bot, user_id)
+    if subscribed is None:
+        # In case of error (e.g. user not found, bot not admin), we return False to be safe.
+        # Errors are not cached so the next message retries.
         return False
+
+    await save_subscription_state(user_id, subscribed)
+    return subscribed
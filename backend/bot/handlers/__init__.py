@@ -1 +1 @@
-from . import start, topics, freetext
+from . import start, topics, freetext, membership
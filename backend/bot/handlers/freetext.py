@@ -1,18 +1,34 @@
+import html
 import os
 import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
 from aiogram import Router, F
+from django.conf import settings
 from aiogram.types import Message, ReplyKeyboardRemove
-from conversations.models import TelegramUser, Message as ChatMessage
-from bot.keyboards import TOPICS, main_menu_keyboard
-from bot.utils import ai_service
+from conversations.models import TelegramUser
+from bot.keyboards import ASK_BUTTON, HOME_BUTTON, main_menu_keyboard
+from bot.knowledge_cache import knowledge_cache
+from bot.utils import AIStreamError, ai_service
+from bot.message_log import message_log
+from bot.users import user_directory
+from bot.history import conversation_history
+from bot.metrics import metrics
+from bot.streaming import MAX_TEXT_LENGTH, StreamingReply
+from knowledge.retrieval import faq_index
 
 router = Router()
 
-TOPIC_LABELS = {label for label, _ in TOPICS}
-RESERVED = TOPIC_LABELS | {"🏠 Asosiy menyu", "✍️ Savol berish", "/start"}
+RESERVED = {HOME_BUTTON, ASK_BUTTON, "/start"}
+
+
+def is_free_text(text: str | None) -> bool:
+    if not text:  # photos, stickers, voice, contacts
+        return False
+    # Topic buttons come from the current knowledge snapshot, not a hardcoded list
+    snapshot = knowledge_cache.snapshot
+    return text not in RESERVED and snapshot.topic_for_button(text) is None and not snapshot.is_retired_button(text)
 
 FALLBACK_TEXT = (
     "Savolingiz uchun rahmat! 🙏\n\n"
@@ -26,35 +42,77 @@ FALLBACK_TEXT = (
 )
 
 
-@router.message(F.text == "✍️ Savol berish")
+STREAM_INTERRUPTED_TEXT = "\n\n⚠️ Javob uzilib qoldi. Iltimos, savolingizni qayta yuboring."
+
+
+def format_faq_answer(doc) -> str:
+    # The answer is stored as Telegram HTML; the question is plain text
+    return (
+        f"{doc.topic_emoji} <b>{html.escape(doc.question)}</b>\n\n"
+        f"{doc.answer}\n\n"
+        f"✅ Agar xohlasangiz, yana savol berishingiz mumkin"
+    )
+
+
+async def stream_ai_answer(message: Message, user: TelegramUser, history: list[dict]):
+    """
+    Placeholder darhol yuboriladi, so'ng tokenlar kelishi bilan tahrirlanadi; bazaga faqat yakuniy matn yoziladi.
+    Oqim uzilsa, qisman javobga ogohlantirish qo'shiladi va u javob sifatida saqlanmaydi.
+    """
+    reply = StreamingReply(message)
+    await reply.start(reply_markup=main_menu_keyboard())
+    try:
+        async for delta in ai_service.stream_response(message.text, history=history):
+            reply.feed(delta)
+    except AIStreamError:
+        if reply.text:
+            # Shown as cut off and not logged, so it never becomes the answer in history
+            await reply.finish(reply.text[:MAX_TEXT_LENGTH - len(STREAM_INTERRUPTED_TEXT)] + STREAM_INTERRUPTED_TEXT)
+            return
+    response_text = reply.text or FALLBACK_TEXT
+    await reply.finish(response_text)
+    message_log.log(user, 'bot', response_text)
+
+
+@router.message(F.text == ASK_BUTTON)
 async def ask_free_question(message: Message):
-    await message.answer(
+    return message.answer(
         "✍️ Savolingizni yozing, men javob beraman!\n"
         "(Masalan: \"Bolalar nafaqasi uchun qanday hujjat kerak?\")",
         reply_markup=ReplyKeyboardRemove()
     )
 
 
-@router.message(F.text & ~F.text.in_(RESERVED))
+@router.message(F.text & F.text.func(is_free_text), flags={'lane': 'ai'})
 async def handle_free_text(message: Message):
-    try:
-        user = await TelegramUser.objects.aget(telegram_id=message.from_user.id)
-    except TelegramUser.DoesNotExist:
-        from bot.handlers.start import get_or_create_user
-        user = await get_or_create_user(message.from_user)
+    user = await user_directory.get(message.from_user)
 
-    # Save user message
-    await ChatMessage.objects.acreate(user=user, role='user', text=message.text)
+    # Earlier turns for the AI, read before this question is recorded
+    history = await conversation_history.context(user.id)
 
-    # Try AI
-    ai_response = ai_service.get_response(message.text)
+    # Save user message
+    message_log.log(user, 'user', message.text)
 
-    if ai_response:
-        response_text = ai_response
+    # Local FAQ first: a confident match skips the AI call entirely
+    match = faq_index.match(message.text)
+    if match:
+        metrics.inc('faq.hit')
+        response_text = format_faq_answer(match.document)
+        topic_id = match.document.topic_id
     else:
-        response_text = FALLBACK_TEXT
+        metrics.inc('faq.miss')
+        topic_id = None
+        if settings.AI_STREAMING and ai_service.provider is not None:
+            return await stream_ai_answer(message, user, history)
+        # Try AI
+        ai_response = await ai_service.get_response(message.text, history=history)
+
+        if ai_response:
+            response_text = ai_response
+        else:
+            response_text = FALLBACK_TEXT
 
     # Save bot response
-    await ChatMessage.objects.acreate(user=user, role='bot', text=response_text)
+    message_log.log(user, 'bot', response_text, topic_id=topic_id)
 
-    await message.answer(response_text, reply_markup=main_menu_keyboard(), parse_mode='HTML')
+    return message.answer(response_text, reply_markup=main_menu_keyboard(), parse_mode='HTML')
@@ -0,0 +1,20 @@
+import os
+import django
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+django.setup()
+
+from aiogram import Router
+from aiogram.types import ChatMemberUpdated
+from bot.check_sub import SUBSCRIBED_STATUSES, is_channel_chat, save_subscription_state
+
+router = Router()
+
+
+@router.chat_member()
+async def channel_member_updated(event: ChatMemberUpdated):
+    """Kanalga qo'shilish/chiqishni bazadagi obuna holatiga yozadi (bot kanal admini bo'lishi kerak)"""
+    if not is_channel_chat(event.chat):
+        return
+
+    member = event.new_chat_member
+    await save_subscription_state(member.user.id, member.status in SUBSCRIBED_STATUSES)
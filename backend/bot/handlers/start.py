@@ -5,48 +5,38 @@ django.setup()
 
 from aiogram import Router, F
 from aiogram.filters import CommandStart
-from conversations.models import TelegramUser, Message as ChatMessage
+from conversations.models import TelegramUser
 from bot.keyboards import main_menu_keyboard, subscription_keyboard
 from bot.check_sub import is_user_subscribed
+from bot.message_log import message_log
+from bot.users import user_directory
 from aiogram.types import Message, CallbackQuery
 
 router = Router()
 
 
 async def get_or_create_user(tg_user) -> TelegramUser:
-    user, _ = await TelegramUser.objects.aget_or_create(
-        telegram_id=tg_user.id,
-        defaults={
-            'username': tg_user.username or '',
-            'full_name': tg_user.full_name or '',
-            'language_code': tg_user.language_code or 'uz',
-        }
-    )
-    # Update name if changed
-    if user.full_name != (tg_user.full_name or ''):
-        user.full_name = tg_user.full_name or ''
-        await user.asave(update_fields=['full_name', 'last_active'])
-    return user
+    # Cached per process; name changes and last_active are written in batches by bot.users
+    return await user_directory.get(tg_user)
 
 
-@router.message(CommandStart())
+@router.message(CommandStart(), flags={'lane': 'db'})
 async def cmd_start(message: Message):
     user = await get_or_create_user(message.from_user)
     bot = message.bot
 
-    await ChatMessage.objects.acreate(user=user, role='user', text='/start')
+    message_log.log(user, 'user', '/start')
 
     # Obunani tekshirish
     subscribed = await is_user_subscribed(bot, user.telegram_id)
     
     if not subscribed:
-        await message.answer(
+        return message.answer(
             f"Assalomu alaykum, {user.full_name or 'do\'st'}! 👋\n\n"
             "Botdan foydalanish uchun kanalimizga obuna bo'lishingiz kerak:",
             reply_markup=subscription_keyboard(),
             parse_mode='HTML'
         )
-        return
 
     welcome_text = (
         f"Assalomu alaykum, {user.full_name or 'do\'st'}! 👋\n\n"
@@ -56,7 +46,7 @@ async def cmd_start(message: Message):
         "👇 <b>Quyidagi tugmalardan birini tanlang yoki savolingizni yozing:</b>"
     )
 
-    await message.answer(
+    return message.answer(
         welcome_text,
         reply_markup=main_menu_keyboard(),
         parse_mode='HTML'
@@ -68,7 +58,8 @@ async def process_check_sub(callback: CallbackQuery):
     user_id = callback.from_user.id
     bot = callback.bot
     
-    subscribed = await is_user_subscribed(bot, user_id)
+    # Foydalanuvchi hozirgina obuna bo'lgan bo'lishi mumkin — keshni chetlab o'tamiz
+    subscribed = await is_user_subscribed(bot, user_id, use_cache=False)
     
     if subscribed:
         # Show a short notification popup
@@ -4,69 +4,55 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
 from aiogram import Router, F
+from aiogram.filters import BaseFilter
 from aiogram.types import Message
-from conversations.models import TelegramUser, Message as ChatMessage
-from knowledge.models import Topic, FAQ
-from bot.keyboards import TOPICS, main_menu_keyboard, back_keyboard
+from bot.keyboards import HOME_BUTTON, main_menu_keyboard, back_keyboard
+from bot.knowledge_cache import TopicEntry, knowledge_cache
+from bot.message_log import message_log
+from bot.users import user_directory
 
 router = Router()
 
-# Map button text → topic slug
-BUTTON_TO_SLUG = {label: slug for label, slug in TOPICS}
-
-
-@router.message(F.text.in_({label for label, _ in TOPICS}))
-async def handle_topic(message: Message):
-    slug = BUTTON_TO_SLUG.get(message.text)
-    if not slug:
-        return
-
-    try:
-        user = await TelegramUser.objects.aget(telegram_id=message.from_user.id)
-    except TelegramUser.DoesNotExist:
-        from bot.handlers.start import get_or_create_user
-        user = await get_or_create_user(message.from_user)
-
-    try:
-        topic = await Topic.objects.aget(slug=slug, is_active=True)
-    except Topic.DoesNotExist:
-        await message.answer("Bu mavzu hozircha mavjud emas. ⏳", reply_markup=main_menu_keyboard())
-        return
-
-    # Log user message
-    await ChatMessage.objects.acreate(user=user, role='user', text=message.text, topic=topic)
-
-    # Get FAQ for this topic
-    faqs = [faq async for faq in FAQ.objects.filter(topic=topic, is_active=True)]
-
-    if faqs:
-        faq = faqs[0]
-        response_text = (
-            f"{topic.emoji} <b>{topic.title}</b>\n\n"
-            f"{faq.answer}\n\n"
-            f"─────────────────────\n"
-            f"✅ Agar xohlasangiz, yana savol berishingiz mumkin\n"
-            f"✍️ Erkin savol uchun \"Savol berish\" tugmasini bosing"
-        )
-    else:
-        response_text = (
-            f"{topic.emoji} <b>{topic.title}</b>\n\n"
-            f"Bu mavzu bo'yicha ma'lumot yaqinda qo'shiladi.\n"
-            f"Hozircha tegishli idoraga murojaat qiling.\n\n"
-            f"🏢 <b>Do'stlik tumani Davlat xizmatlari markazi:</b>\n"
-            f"Do'stlik tumani, markaziy ko'cha\n\n"
-            f"✅ Agar xohlasangiz, yana savol berishingiz mumkin"
-        )
-
-    # Log bot response
-    await ChatMessage.objects.acreate(user=user, role='bot', text=response_text, topic=topic)
-
-    await message.answer(response_text, reply_markup=back_keyboard(), parse_mode='HTML')
-
-
-@router.message(F.text == "🏠 Asosiy menyu")
+RETIRED_TOPIC_TEXT = "Bu mavzu hozircha mavjud emas. ⏳"
+
+
+class TopicButton(BaseFilter):
+    """Tugma matni joriy snapshotdagi mavzuga mos kelsa, handlerga `topic` uzatiladi"""
+
+    async def __call__(self, message: Message) -> bool | dict:
+        topic = knowledge_cache.snapshot.topic_for_button(message.text)
+        return {'topic': topic} if topic else False
+
+
+class RetiredTopicButton(BaseFilter):
+    """Eski klaviaturada qolgan nofaol yoki o'chirilgan mavzu tugmasi (AI'ga savol sifatida ketmasligi uchun)"""
+
+    async def __call__(self, message: Message) -> bool:
+        return knowledge_cache.snapshot.is_retired_button(message.text)
+
+
+@router.message(TopicButton(), flags={'lane': 'db'})
+async def handle_topic(message: Message, topic: TopicEntry):
+    user = await user_directory.get(message.from_user)
+
+    # In-memory snapshot: no knowledge queries per tap
+    response_text = topic.response_html
+    message_log.log(user, 'user', message.text, topic_id=topic.id)
+    message_log.log(user, 'bot', response_text, topic_id=topic.id)
+
+    # Returned, not awaited: webhook mode sends it inside the HTTP response, polling calls it itself
+    return message.answer(response_text, reply_markup=back_keyboard(), parse_mode='HTML')
+
+
+@router.message(RetiredTopicButton())
+async def handle_retired_topic(message: Message):
+    # The fresh main menu replaces the stale keyboard
+    return message.answer(RETIRED_TOPIC_TEXT, reply_markup=main_menu_keyboard())
+
+
+@router.message(F.text == HOME_BUTTON)
 async def back_to_main(message: Message):
-    await message.answer(
+    return message.answer(
         "Asosiy menyu 👇",
         reply_markup=main_menu_keyboard()
     )
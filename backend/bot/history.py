@@ -0,0 +1,140 @@
+"""
+AI uchun suhbat konteksti: har bir foydalanuvchining oxirgi xabarlari bot jarayoni xotirasida.
+
+- Yozuvlar message_log.log() orqali keladi — bazaga yoziladigan xabarlar bilan bir xil oqim.
+- Xotirada yo'q foydalanuvchi birinchi marta so'ralganda bitta indeksli so'rov
+  (message_user_ts_idx) va hali yozilmagan buferdagi xabarlardan tiklanadi.
+- LRU va bo'sh turish vaqti (HISTORY_IDLE_TTL) bo'yicha chiqariladi; umumiy hajm
+  HISTORY_MAX_CHARS bilan cheklanadi va metrikalarda ko'rsatiladi.
+"""
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from bot.metrics import metrics
+
+ROLES = {'user': 'user', 'bot': 'assistant'}
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for a budget; no tokenizer dependency
+    return len(text) // 4 + 1
+
+
+@dataclass
+class _Entry:
+    turns: deque
+    chars: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class ConversationHistory:
+
+    def __init__(self, max_users: int, max_turns: int, max_tokens: int, max_message_chars: int,
+                 max_chars: int, idle_ttl: float):
+        self.max_users = max_users
+        self.max_turns = max_turns
+        self.max_tokens = max_tokens
+        self.max_message_chars = max_message_chars
+        self.max_chars = max_chars
+        self.idle_ttl = idle_ttl
+        self.chars = 0
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def context(self, user_id: int) -> list[dict]:
+        """
+        AI so'roviga qo'shiladigan oldingi xabarlar (eskidan yangiga), token byudjeti ichida.
+        Joriy savol yozilishidan OLDIN chaqiriladi.
+        """
+        self._evict_idle()
+        entry = self._entries.get(user_id)
+        if entry is None:
+            rows = await sync_to_async(self._load)(user_id)
+            entry = self._entries[user_id] = _Entry(turns=deque(maxlen=self.max_turns))
+            for role, text in rows:
+                self._append(entry, role, text)
+            metrics.inc('history.seeded')
+            self._enforce_limits()
+        else:
+            self._entries.move_to_end(user_id)
+        entry.last_used = time.monotonic()
+        return self._window(entry)
+
+    def record(self, user_id: int, role: str, text: str):
+        """message_log.log() dan: faqat xotirada bor foydalanuvchilar uchun (qolganlari bazadan tiklanadi)"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        self._entries.move_to_end(user_id)
+        entry.last_used = time.monotonic()
+        self._append(entry, role, text)
+        self._enforce_limits()
+
+    def _load(self, user_id: int) -> list[tuple[str, str]]:
+        from bot.message_log import message_log
+        from conversations.models import Message
+
+        since = timezone.now() - timedelta(seconds=self.idle_ttl)
+        rows = list(
+            Message.objects.filter(user_id=user_id, timestamp__gte=since)
+            .order_by('-timestamp')
+            .values_list('role', 'text')[:self.max_turns]
+        )
+        rows.reverse()
+        # Rows still waiting in the write-behind buffer are newer than anything in the table
+        return (rows + message_log.pending_for(user_id))[-self.max_turns:]
+
+    def _append(self, entry: _Entry, role: str, text: str):
+        text = text[:self.max_message_chars]
+        if len(entry.turns) == entry.turns.maxlen:
+            entry.chars -= len(entry.turns[0][1])
+            self.chars -= len(entry.turns[0][1])
+        entry.turns.append((role, text))
+        entry.chars += len(text)
+        self.chars += len(text)
+
+    def _window(self, entry: _Entry) -> list[dict]:
+        budget = self.max_tokens
+        window = []
+        for role, text in reversed(entry.turns):
+            budget -= estimate_tokens(text)
+            if budget < 0:
+                break
+            window.append({'role': ROLES.get(role, role), 'content': text})
+        window.reverse()
+        return window
+
+    def _drop_oldest(self):
+        _, entry = self._entries.popitem(last=False)
+        self.chars -= entry.chars
+
+    def _evict_idle(self):
+        deadline = time.monotonic() - self.idle_ttl
+        while self._entries and next(iter(self._entries.values())).last_used < deadline:
+            self._drop_oldest()
+            metrics.inc('history.expired')
+
+    def _enforce_limits(self):
+        while len(self._entries) > self.max_users or self.chars > self.max_chars:
+            self._drop_oldest()
+            metrics.inc('history.evicted')
+        metrics.set('history.users', len(self._entries))
+        metrics.set('history.chars', self.chars)
+
+
+conversation_history = ConversationHistory(
+    max_users=settings.HISTORY_MAX_USERS,
+    max_turns=settings.HISTORY_MAX_TURNS,
+    max_tokens=settings.HISTORY_MAX_TOKENS,
+    max_message_chars=settings.HISTORY_MAX_MESSAGE_CHARS,
+    max_chars=settings.HISTORY_MAX_CHARS,
+    idle_ttl=settings.HISTORY_IDLE_TTL,
+)
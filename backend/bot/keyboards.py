@@ -1,50 +1,54 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
-# 10 ta asosiy mavzu tugmalari
-TOPICS = [
-    ("💰 Bolalar nafaqasi", "children_benefit"),
-    ("🏠 Moddiy yordam", "social_aid"),
-    ("🪪 Pasport olish/almashtirish", "passport"),
-    ("🏫 Maktabga qabul", "school"),
-    ("🧒 Bog'chaga navbat", "kindergarten"),
-    ("💍 Nikoh hujjatlari", "marriage"),
-    ("🚔 Jarimalar", "fines"),
-    ("📋 Doimiy ro'yxat", "registration"),
-    ("💡 Subsidiyalar", "subsidy"),
-    ("🏢 Davlat xizmatlari markazi", "gov_center"),
-]
+ASK_BUTTON = "✍️ Savol berish"
+HOME_BUTTON = "🏠 Asosiy menyu"
 
 
-def main_menu_keyboard() -> ReplyKeyboardMarkup:
-    """Asosiy menyu — 2 ustunli tugmalar"""
+def topic_label(emoji: str, title: str) -> str:
+    """Mavzu tugmasi matni — Topic jadvalidan (emoji + nom)"""
+    return f"{emoji} {title}"
+
+
+def build_main_menu(labels) -> ReplyKeyboardMarkup:
+    """Asosiy menyu — 2 ustunli tugmalar. Bilim bazasi versiyasiga bir marta quriladi."""
     buttons = []
     row = []
-    for i, (label, _) in enumerate(TOPICS):
+    for label in labels:
         row.append(KeyboardButton(text=label))
         if len(row) == 2:
             buttons.append(row)
             row = []
     if row:
         buttons.append(row)
-    buttons.append([KeyboardButton(text="✍️ Savol berish")])
+    buttons.append([KeyboardButton(text=ASK_BUTTON)])
 
     return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
 
 
+def main_menu_keyboard() -> ReplyKeyboardMarkup:
+    from bot.knowledge_cache import knowledge_cache
+    return knowledge_cache.snapshot.main_menu
+
+
+BACK_KEYBOARD = ReplyKeyboardMarkup(
+    keyboard=[
+        [KeyboardButton(text=ASK_BUTTON)],
+        [KeyboardButton(text=HOME_BUTTON)]
+    ],
+    resize_keyboard=True
+)
+
+SUBSCRIPTION_KEYBOARD = InlineKeyboardMarkup(
+    inline_keyboard=[
+        [InlineKeyboardButton(text="📢 Kanalga obuna bo'lish", url="https://t.me/dustliknews")],
+        [InlineKeyboardButton(text="✅ Obuna bo'ldim", callback_data="check_subscription")]
+    ]
+)
+
+
 def back_keyboard() -> ReplyKeyboardMarkup:
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="✍️ Savol berish")],
-            [KeyboardButton(text="🏠 Asosiy menyu")]
-        ],
-        resize_keyboard=True
-    )
+    return BACK_KEYBOARD
 
 
 def subscription_keyboard() -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text="📢 Kanalga obuna bo'lish", url="https://t.me/dustliknews")],
-            [InlineKeyboardButton(text="✅ Obuna bo'ldim", callback_data="check_subscription")]
-        ]
-    )
+    return SUBSCRIPTION_KEYBOARD
@@ -0,0 +1,133 @@
+"""
+Bot worker xotirasidagi bilim bazasi nusxasi (snapshot).
+Faol mavzular va FAQlar bitta marta yuklanadi; javob HTML'i, asosiy menyu va
+tugma → mavzu xaritasi oldindan tayyorlanadi. Nofaol, o'chirilgan yoki nomi o'zgargan mavzular
+tugmalari (foydalanuvchining eski klaviaturasida qolgan) alohida to'plamda saqlanadi.
+KnowledgeVersion o'zgarganda yangi nusxa quriladi va bitta o'zlashtirish bilan almashtiriladi —
+handlerlar mavzuni bazaga murojaatsiz beradi.
+"""
+import logging
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from aiogram.types import ReplyKeyboardMarkup
+
+from bot.keyboards import build_main_menu, topic_label
+from knowledge.models import FAQ, KnowledgeVersion, Topic
+from knowledge.retrieval import document_from_faq, faq_index
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TopicEntry:
+    id: int
+    slug: str
+    title: str
+    emoji: str
+    order: int
+    label: str
+    response_html: str
+
+
+@dataclass(frozen=True)
+class KnowledgeSnapshot:
+    version: int = -1
+    topics: tuple = ()
+    by_slug: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    by_label: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    retired_labels: frozenset = frozenset()
+    documents: tuple = ()
+    main_menu: ReplyKeyboardMarkup = field(default_factory=lambda: build_main_menu([]))
+
+    def topic(self, slug: str) -> TopicEntry | None:
+        return self.by_slug.get(slug)
+
+    def topic_for_button(self, text: str | None) -> TopicEntry | None:
+        return self.by_label.get(text)
+
+    def is_retired_button(self, text: str | None) -> bool:
+        return text in self.retired_labels
+
+
+def render_topic_response(topic: Topic, faq: FAQ | None) -> str:
+    if faq:
+        return (
+            f"{topic.emoji} <b>{topic.title}</b>\n\n"
+            f"{faq.answer}\n\n"
+            f"─────────────────────\n"
+            f"✅ Agar xohlasangiz, yana savol berishingiz mumkin\n"
+            f"✍️ Erkin savol uchun \"Savol berish\" tugmasini bosing"
+        )
+    return (
+        f"{topic.emoji} <b>{topic.title}</b>\n\n"
+        f"Bu mavzu bo'yicha ma'lumot yaqinda qo'shiladi.\n"
+        f"Hozircha tegishli idoraga murojaat qiling.\n\n"
+        f"🏢 <b>Do'stlik tumani Davlat xizmatlari markazi:</b>\n"
+        f"Do'stlik tumani, markaziy ko'cha\n\n"
+        f"✅ Agar xohlasangiz, yana savol berishingiz mumkin"
+    )
+
+
+def build_snapshot(version: int, previous: KnowledgeSnapshot | None = None) -> KnowledgeSnapshot:
+    """
+    Ikki so'rov: barcha mavzular va faol mavzularning faol FAQlari.
+    previous — oldingi nusxa: undagi, endi yo'q tugmalar ham eskirgan deb belgilanadi.
+    """
+    all_topics = list(Topic.objects.order_by('order', 'id'))
+    topics = [topic for topic in all_topics if topic.is_active]
+    faqs = list(
+        FAQ.objects.filter(is_active=True, topic__is_active=True)
+        .select_related('topic').order_by('topic_id', 'id')
+    )
+    first_faq = {}
+    for faq in faqs:
+        first_faq.setdefault(faq.topic_id, faq)
+
+    entries = tuple(
+        TopicEntry(
+            id=topic.id,
+            slug=topic.slug,
+            title=topic.title,
+            emoji=topic.emoji,
+            order=topic.order,
+            label=topic_label(topic.emoji, topic.title),
+            response_html=render_topic_response(topic, first_faq.get(topic.id)),
+        )
+        for topic in topics
+    )
+    retired = {topic_label(topic.emoji, topic.title) for topic in all_topics if not topic.is_active}
+    if previous is not None:
+        retired |= previous.retired_labels | set(previous.by_label)
+    retired -= {entry.label for entry in entries}
+    return KnowledgeSnapshot(
+        version=version,
+        topics=entries,
+        by_slug=MappingProxyType({entry.slug: entry for entry in entries}),
+        by_label=MappingProxyType({entry.label: entry for entry in entries}),
+        retired_labels=frozenset(retired),
+        documents=tuple(document_from_faq(faq) for faq in faqs),
+        main_menu=build_main_menu(entry.label for entry in entries),
+    )
+
+
+class KnowledgeCache:
+    def __init__(self):
+        self.snapshot = KnowledgeSnapshot()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Versiya o'zgargan bo'lsa, yangi nusxani quradi va almashtiradi (sync — sync_to_async orqali).
+        Versiya ma'lumotdan oldin o'qiladi: nusxa hech qachon o'z versiyasidan eski bo'lmaydi.
+        """
+        version = KnowledgeVersion.current()
+        if not force and version == self.snapshot.version:
+            return False
+        snapshot = build_snapshot(version, previous=self.snapshot)
+        faq_index.sync(snapshot.documents)
+        self.snapshot = snapshot
+        logger.info(f"Knowledge snapshot v{version}: {len(snapshot.topics)} mavzu, {len(snapshot.documents)} FAQ")
+        return True
+
+
+knowledge_cache = KnowledgeCache()
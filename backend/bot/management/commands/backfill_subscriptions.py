@@ -0,0 +1,49 @@
+import asyncio
+import sys
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from aiogram import Bot
+
+from bot.check_sub import fetch_subscription, save_subscription_state
+from conversations.models import TelegramUser
+
+
+class Command(BaseCommand):
+    help = "Mavjud foydalanuvchilarning kanalga obuna holatini Telegram API orqali to'ldiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Holati ma'lum foydalanuvchilarni ham qayta tekshirish")
+        parser.add_argument('--rate', type=float, default=20, help="Soniyasiga API so'rovlari soni")
+
+    def handle(self, *args, **options):
+        if not settings.BOT_TOKEN:
+            self.stderr.write("BOT_TOKEN topilmadi! .env faylini tekshiring.")
+            sys.exit(1)
+        asyncio.run(self._backfill(options['all'], options['rate']))
+
+    async def _backfill(self, recheck_all: bool, rate: float):
+        qs = TelegramUser.objects.order_by('id').values_list('telegram_id', flat=True)
+        if not recheck_all:
+            qs = qs.filter(is_subscribed__isnull=True)
+        user_ids = await sync_to_async(list)(qs)
+
+        bot = Bot(token=settings.BOT_TOKEN)
+        checked = subscribed_count = failed = 0
+        try:
+            for user_id in user_ids:
+                subscribed = await fetch_subscription(bot, user_id)
+                if subscribed is None:
+                    failed += 1
+                else:
+                    await save_subscription_state(user_id, subscribed)
+                    checked += 1
+                    subscribed_count += subscribed
+                await asyncio.sleep(1 / rate)
+        finally:
+            await bot.session.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Tekshirildi: {checked}, obuna: {subscribed_count}, xatolik: {failed}"
+        ))
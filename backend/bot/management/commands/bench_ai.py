@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand
+
+from bot.ai_providers import FakeProvider
+from bot.utils import AIService
+
+
+class Command(BaseCommand):
+    help = "AI xizmatining parallel foydalanuvchilar ostidagi o'tkazuvchanligini o'lchaydi (fake provayder bilan)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Parallel foydalanuvchilar soni")
+        parser.add_argument('--requests', type=int, default=500, help="Jami so'rovlar soni")
+        parser.add_argument('--latency', type=float, default=0.2, help="Fake provayder kechikishi (soniya)")
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options['users'], options['requests'], options['latency']))
+
+    async def _run(self, users: int, total: int, latency: float):
+        service = AIService(provider=FakeProvider(latency=latency))
+        queue = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(f"Savol #{i}")
+        latencies = []
+        failures = 0
+
+        async def user_loop():
+            nonlocal failures
+            while not queue.empty():
+                question = queue.get_nowait()
+                started = time.perf_counter()
+                answer = await service.get_response(question)
+                latencies.append(time.perf_counter() - started)
+                if answer is None:
+                    failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user_loop() for _ in range(users)))
+        elapsed = time.perf_counter() - started
+        await service.close()
+
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f"requests={total} users={users} elapsed={elapsed:.2f}s "
+            f"throughput={total / elapsed:.1f} req/s p50={p50 * 1000:.0f}ms p99={p99 * 1000:.0f}ms "
+            f"failures={failures}"
+        )
@@ -0,0 +1,100 @@
+import asyncio
+import time
+
+from aiogram.methods import TelegramMethod
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from bot.ai_providers import FakeProvider
+from bot.app import create_bot, create_dispatcher
+from bot.benchmarks import BENCH_TOKEN, FakeTelegram, bench_database, drive, percentile
+from bot.knowledge_cache import knowledge_cache
+from bot.metrics import metrics
+from bot.streaming import PLACEHOLDER_TEXT
+from bot.utils import ai_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Erkin savolga javobni oddiy (to'liq javobni kutish) va oqimli (placeholder + tahrirlar) "
+        "rejimlarda solishtiradi: birinchi ko'ringan matn, birinchi javob matni va to'liq javob vaqti."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20, help="Parallel foydalanuvchilar soni")
+        parser.add_argument('--questions', type=int, default=100, help="Har bir rejim uchun savollar soni")
+        parser.add_argument('--latency', type=float, default=0.5, help="Fake provayder: birinchi tokengacha (soniya)")
+        parser.add_argument('--token-delay', type=float, default=0.02, help="Fake provayder: har bir so'z (soniya)")
+        parser.add_argument('--words', type=int, default=150, help="Javobdagi so'zlar soni (taxminan)")
+        parser.add_argument('--interval', type=float, help="Tahrirlar oralig'i (standart: AI_STREAM_EDIT_INTERVAL)")
+        parser.add_argument('--limit-sends', action='store_true', help="Telegram limitlarini (SendLimiter) yoqish")
+
+    def handle(self, *args, **options):
+        stream_settings = {'AI_CACHE_ENABLED': False, 'THROTTLE_RATE': 1e6, 'THROTTLE_BURST': 1e6}
+        if options['interval'] is not None:
+            stream_settings['AI_STREAM_EDIT_INTERVAL'] = options['interval']
+        with bench_database(users=options['users']), override_settings(**stream_settings):
+            knowledge_cache.refresh(force=True)
+            asyncio.run(self._run(options))
+
+    async def _run(self, options: dict):
+        ai_service._provider = FakeProvider(latency=options['latency'], token_delay=options['token_delay'])
+        ai_service._provider_ready = True
+
+        fake = FakeTelegram()
+        await fake.start()
+        bot = create_bot(BENCH_TOKEN, api_base=fake.url, limit_sends=options['limit_sends'])
+        dp = create_dispatcher()
+        await dp.emit_startup(bot=bot)
+        try:
+            for streaming in (False, True):
+                with override_settings(AI_STREAMING=streaming):
+                    await self._measure(dp, bot, fake, streaming, options)
+        finally:
+            await dp.emit_shutdown(bot=bot)
+            await bot.session.close()
+            await fake.stop()
+
+    async def _measure(self, dp, bot, fake: FakeTelegram, streaming: bool, options: dict):
+        # Filler words that no FAQ entry matches, so every question reaches the AI provider
+        filler = ' '.join(f"zq{i}x" for i in range(options['words']))
+        first_visible, first_answer = [], []
+
+        async def send(user_id: int) -> float:
+            marks = {}
+
+            def on_text(method: str, text: str):
+                now = time.perf_counter()
+                marks.setdefault('visible', now)
+                if text != PLACEHOLDER_TEXT:
+                    marks.setdefault('answer', now)
+
+            fake.watch(user_id, on_text)
+            started = time.perf_counter()
+            result = await dp.feed_raw_update(bot, fake.next_update(user_id, f"{user_id} {filler}"))
+            if isinstance(result, TelegramMethod):
+                await bot(result)
+            finished = time.perf_counter()
+            fake.watch(user_id, None)
+            first_visible.append(marks.get('visible', finished) - started)
+            first_answer.append(marks.get('answer', finished) - started)
+            return finished - started
+
+        fake.calls = 0
+        edits_before = metrics.snapshot().get('stream.edits', 0)
+        elapsed, complete = await drive(send, options['users'], options['questions'])
+
+        def ms(values, p):
+            return f"{percentile(values, p) * 1000:.0f}"
+
+        mode = 'stream' if streaming else 'complete'
+        self.stdout.write(
+            f"{mode}: questions={len(complete)} elapsed={elapsed:.2f}s "
+            f"first_visible p50={ms(first_visible, 0.5)}ms p95={ms(first_visible, 0.95)}ms | "
+            f"first_answer_text p50={ms(first_answer, 0.5)}ms p95={ms(first_answer, 0.95)}ms | "
+            f"complete p50={ms(complete, 0.5)}ms p95={ms(complete, 0.95)}ms | "
+            f"api_calls/question={fake.calls / len(complete):.1f}"
+        )
+        if streaming:
+            edits = metrics.snapshot().get('stream.edits', 0) - edits_before
+            self.stdout.write(f"{mode}: edits/question={edits / len(complete):.1f}")
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from bot.app import ALLOWED_UPDATES, create_dispatcher
+from bot.benchmarks import FakeTelegram, bench_database, drive, percentile
+from bot.knowledge_cache import knowledge_cache
+from bot.metrics import metrics
+from bot.webhook import create_webhook_app
+
+WEBHOOK_PATH = '/bench/webhook'
+WEBHOOK_SECRET = 'bench-secret'
+
+
+class Command(BaseCommand):
+    help = (
+        "Polling va webhook rejimlarini lokal soxta Telegram server bilan solishtiradi "
+        "(updates/s va p99 kechikish). Haqiqiy handlerlar, vaqtinchalik test bazasida."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50, help="Parallel foydalanuvchilar soni")
+        parser.add_argument('--updates', type=int, default=2000, help="Har bir rejim uchun updatelar soni")
+        parser.add_argument('--mode', choices=['polling', 'webhook', 'both'], default='both')
+        parser.add_argument('--text', help="Yuboriladigan matn (standart: birinchi mavzu tugmasi)")
+        parser.add_argument('--reply-timeout', type=float, default=1.0, help="Webhook ichida javob qaytarish oynasi")
+
+    def handle(self, *args, **options):
+        # Simulated users write faster than the per-user flood limit allows
+        with bench_database(users=options['users']), override_settings(THROTTLE_RATE=1e6, THROTTLE_BURST=1e6):
+            knowledge_cache.refresh(force=True)
+            topics = knowledge_cache.snapshot.topics
+            text = options['text'] or (topics[0].label if topics else '/start')
+            asyncio.run(self._run(text, options))
+
+    async def _run(self, text: str, options: dict):
+        fake = FakeTelegram()
+        await fake.start()
+        bot = fake.bot()
+        dp = create_dispatcher()
+        try:
+            if options['mode'] in ('polling', 'both'):
+                self._report('polling', await self._polling(dp, bot, fake, text, options), fake)
+            if options['mode'] in ('webhook', 'both'):
+                self._report('webhook', await self._webhook(dp, bot, fake, text, options), fake)
+        finally:
+            await bot.session.close()
+            await fake.stop()
+
+    async def _polling(self, dp, bot, fake: FakeTelegram, text: str, options: dict):
+        polling = asyncio.create_task(dp.start_polling(
+            bot, allowed_updates=ALLOWED_UPDATES, handle_signals=False, close_bot_session=False,
+        ))
+
+        async def send(user_id: int) -> float:
+            reply = fake.expect_reply(user_id)
+            started = time.perf_counter()
+            fake.push(fake.next_update(user_id, text))
+            return await reply - started
+
+        try:
+            return await drive(send, options['users'], options['updates'])
+        finally:
+            await dp.stop_polling()
+            await polling
+
+    async def _webhook(self, dp, bot, fake: FakeTelegram, text: str, options: dict):
+        app = create_webhook_app(dp, bot, path=WEBHOOK_PATH, secret=WEBHOOK_SECRET,
+                                 reply_timeout=options['reply_timeout'])
+        # The benchmark owns the bot session; the webhook app must not close it
+        app.on_shutdown.clear()
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        host, port = runner.addresses[0][:2]
+        url = f'http://{host}:{port}{WEBHOOK_PATH}'
+        inline = 0
+
+        async with aiohttp.ClientSession(headers={'X-Telegram-Bot-Api-Secret-Token': WEBHOOK_SECRET}) as client:
+            async def send(user_id: int) -> float:
+                nonlocal inline
+                reply = fake.expect_reply(user_id)
+                started = time.perf_counter()
+                async with client.post(url, json=fake.next_update(user_id, text)) as response:
+                    await response.read()
+                    if response.content_type.startswith('multipart'):
+                        # Answered inside the webhook response: no Bot API round trip
+                        inline += 1
+                        fake.cancel_reply(user_id)
+                        return time.perf_counter() - started
+                return await reply - started
+
+            try:
+                result = await drive(send, options['users'], options['updates'])
+            finally:
+                await dp.emit_shutdown(bot=bot)
+                await runner.cleanup()
+        self.stdout.write(f"webhook: inline javoblar {inline}/{len(result[1])}")
+        return result
+
+    def _report(self, mode: str, result, fake: FakeTelegram):
+        elapsed, latencies = result
+        self.stdout.write(
+            f"{mode}: updates={len(latencies)} elapsed={elapsed:.2f}s "
+            f"throughput={len(latencies) / elapsed:.1f} upd/s "
+            f"p50={percentile(latencies, 0.5) * 1000:.1f}ms p99={percentile(latencies, 0.99) * 1000:.1f}ms "
+            f"api_calls={fake.calls}"
+        )
+        scheduler = {k: v for k, v in metrics.snapshot().items() if k.startswith('scheduler.') and 'pending' not in k}
+        if scheduler:
+            self.stdout.write(f"{mode}: " + " ".join(f"{k}={v}" for k, v in sorted(scheduler.items())))
+        fake.calls = 0
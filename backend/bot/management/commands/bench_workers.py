@@ -0,0 +1,62 @@
+import asyncio
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from bot.benchmarks import BENCH_TOKEN, FakeTelegram, bench_database, drive, percentile
+from bot.knowledge_cache import knowledge_cache
+from bot.workers import WorkerPool, poll_updates
+
+
+class Command(BaseCommand):
+    help = (
+        "runbot --workers rejimini lokal soxta Telegram server bilan o'lchaydi: "
+        "har bir worker soni uchun updates/s va p50/p99 kechikish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', default='1,2,4', help="Vergul bilan ajratilgan worker sonlari")
+        parser.add_argument('--users', type=int, default=100, help="Parallel foydalanuvchilar soni")
+        parser.add_argument('--updates', type=int, default=3000, help="Har bir o'lchov uchun updatelar soni")
+        parser.add_argument('--text', help="Yuboriladigan matn (standart: birinchi mavzu tugmasi)")
+
+    def handle(self, *args, **options):
+        # Simulated users write faster than the per-user flood limit; workers read it from the env
+        os.environ['THROTTLE_RATE'] = os.environ['THROTTLE_BURST'] = '1000000'
+        # Workers are spawned inside bench_database(), so they open the test database as well
+        with bench_database(users=options['users']):
+            knowledge_cache.refresh(force=True)
+            topics = knowledge_cache.snapshot.topics
+            text = options['text'] or (topics[0].label if topics else '/start')
+            for count in [int(value) for value in options['workers'].split(',')]:
+                asyncio.run(self._run(count, text, options))
+
+    async def _run(self, count: int, text: str, options: dict):
+        fake = FakeTelegram()
+        await fake.start()
+        pool = WorkerPool(count, BENCH_TOKEN, api_base=fake.url, limit_sends=False)
+        pool.start()
+        polling = asyncio.create_task(poll_updates(BENCH_TOKEN, pool, api_base=fake.url, timeout=1))
+
+        async def send(user_id: int) -> float:
+            reply = fake.expect_reply(user_id)
+            started = time.perf_counter()
+            fake.push(fake.next_update(user_id, text))
+            return await reply - started
+
+        try:
+            # Warm-up: workers start with a fresh Django and knowledge snapshot
+            await drive(send, options['users'], options['users'])
+            elapsed, latencies = await drive(send, options['users'], options['updates'])
+        finally:
+            polling.cancel()
+            await pool.stop()
+            await fake.stop()
+
+        self.stdout.write(
+            f"workers={count}: updates={len(latencies)} elapsed={elapsed:.2f}s "
+            f"throughput={len(latencies) / elapsed:.1f} upd/s "
+            f"p50={percentile(latencies, 0.5) * 1000:.1f}ms p99={percentile(latencies, 0.99) * 1000:.1f}ms "
+            f"errors={sum(worker.errors for worker in pool.workers)}"
+        )
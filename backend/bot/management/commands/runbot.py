@@ -1,5 +1,7 @@
 import asyncio
+import logging
 import os
+import signal
 import sys
 
 # Django setup
@@ -8,39 +10,169 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 import django
 django.setup()
 
+from asgiref.sync import sync_to_async
 from django.core.management.base import BaseCommand
 from django.conf import settings
 from aiogram import Bot, Dispatcher
-from aiogram.enums import ParseMode
-from aiogram.client.default import DefaultBotProperties
+from aiohttp import web
 
-from bot.handlers import start, topics, freetext
+from bot.app import ALLOWED_UPDATES, create_bot, create_dispatcher, report_metrics, watch_knowledge
+from bot.broadcast import watch_broadcasts
+from bot.metrics import metrics
+from bot.knowledge_cache import knowledge_cache
+
+logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
-    help = "Telegram botni ishga tushiradi (long-polling)"
+    help = "Telegram botni ishga tushiradi (long-polling yoki --webhook)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--webhook', action='store_true', help="Webhook rejimi (aiohttp server)")
+        parser.add_argument('--host', default=settings.WEBHOOK_HOST, help="Webhook server manzili")
+        parser.add_argument('--port', type=int, default=settings.WEBHOOK_PORT, help="Webhook server porti")
+        parser.add_argument('--path', default=settings.WEBHOOK_PATH, help="Webhook yo'li")
+        parser.add_argument('--workers', type=int, default=settings.BOT_WORKERS,
+                            help="Worker jarayonlar soni (>1 bo'lsa updatelar foydalanuvchi bo'yicha taqsimlanadi)")
 
     def handle(self, *args, **options):
         token = settings.BOT_TOKEN
         if not token:
             self.stderr.write("BOT_TOKEN topilmadi! .env faylini tekshiring.")
             sys.exit(1)
+        if options['webhook'] and not settings.WEBHOOK_URL:
+            self.stderr.write("WEBHOOK_URL topilmadi! Webhook rejimi uchun tashqi HTTPS manzil kerak.")
+            sys.exit(1)
 
+        logging.basicConfig(level=logging.INFO)
         self.stdout.write(self.style.SUCCESS("🤖 Bot ishga tushmoqda..."))
-        asyncio.run(self._run_bot(token))
+        asyncio.run(self._run_bot(token, options))
+
+    async def _run_bot(self, token: str, options: dict):
+        # Periodic metrics report (cache hits/misses etc.) and message retention
+        metrics_task = asyncio.create_task(report_metrics())
+        retention_task = asyncio.create_task(self._run_retention())
+        try:
+            if options['workers'] > 1:
+                await self._run_front(token, options)
+            else:
+                await self._run_single(token, options)
+        finally:
+            metrics_task.cancel()
+            retention_task.cancel()
+            metrics.log()
+
+    async def _run_single(self, token: str, options: dict):
+        bot = create_bot(token)
+        dp = create_dispatcher()
+
+        # Knowledge snapshot (topics + FAQ index): loaded before polling, swapped on version change
+        await sync_to_async(knowledge_cache.refresh)(force=True)
+        knowledge_task = asyncio.create_task(watch_knowledge())
+        # Broadcasts share the bot's send limiter with handler replies
+        broadcast_task = asyncio.create_task(watch_broadcasts(bot))
+
+        try:
+            if options['webhook']:
+                await self._serve_webhook(dp, bot, options)
+            else:
+                print("✅ Bot tayyor! Telegram'da /start yozing.")
+                await dp.start_polling(bot, allowed_updates=ALLOWED_UPDATES)
+        finally:
+            knowledge_task.cancel()
+            broadcast_task.cancel()
+
+    async def _run_front(self, token: str, options: dict):
+        """Front jarayon: updatelarni qabul qilib, foydalanuvchi bo'yicha workerlarga taqsimlaydi"""
+        from bot.workers import WorkerPool, poll_updates
+
+        pool = WorkerPool(options['workers'], token)
+        pool.start()
+        # Broadcasts are sent from the front process with their own limiter. The token has one
+        # global limit, so while a broadcast runs its rate is taken out of the workers' share
+        broadcast_rate = min(settings.BROADCAST_RATE, settings.SEND_GLOBAL_RATE - 1)
+        broadcast_bot = create_bot(token, global_rate=broadcast_rate)
+
+        def on_broadcast(running: bool):
+            pool.set_send_rate(settings.SEND_GLOBAL_RATE - broadcast_rate if running else settings.SEND_GLOBAL_RATE)
+
+        broadcast_task = asyncio.create_task(watch_broadcasts(broadcast_bot, on_running=on_broadcast))
+        try:
+            if options['webhook']:
+                from bot.webhook import create_front_webhook_app, webhook_secret
+                bot = Bot(token=token)
+                secret = webhook_secret()
+                await self._register_webhook(bot, options['path'], secret)
+                try:
+                    app = create_front_webhook_app(pool, path=options['path'], secret=secret)
+                    await self._serve(app, options)
+                finally:
+                    await bot.delete_webhook()
+                    await bot.session.close()
+            else:
+                print(f"✅ Bot tayyor ({options['workers']} worker)! Telegram'da /start yozing.")
+                polling = asyncio.create_task(poll_updates(token, pool))
+                try:
+                    await self._wait_for_signal()
+                finally:
+                    polling.cancel()
+        finally:
+            broadcast_task.cancel()
+            await broadcast_bot.session.close()
+            await pool.stop()
+
+    async def _serve_webhook(self, dp: Dispatcher, bot: Bot, options: dict):
+        from bot.webhook import create_webhook_app, webhook_secret
+
+        secret = webhook_secret()
+
+        async def register_webhook(bot: Bot):
+            await self._register_webhook(bot, options['path'], secret)
+
+        async def unregister_webhook(bot: Bot):
+            await bot.delete_webhook()
+            logger.info("Webhook o'chirildi")
+
+        dp.startup.register(register_webhook)
+        dp.shutdown.register(unregister_webhook)
+
+        app = create_webhook_app(
+            dp, bot, path=options['path'], secret=secret, reply_timeout=settings.WEBHOOK_REPLY_TIMEOUT,
+        )
+        # on_shutdown: dispatcher shutdown (webhook o'chirish, log flush), keyin bot sessiyasi
+        await self._serve(app, options)
+
+    async def _register_webhook(self, bot: Bot, path: str, secret: str):
+        url = settings.WEBHOOK_URL.rstrip('/') + path
+        await bot.set_webhook(url, secret_token=secret, allowed_updates=ALLOWED_UPDATES)
+        logger.info(f"Webhook o'rnatildi: {url}")
 
-    async def _run_bot(self, token: str):
-        bot = Bot(token=token, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-        dp = Dispatcher()
+    async def _serve(self, app: web.Application, options: dict):
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, options['host'], options['port']).start()
+        print(f"✅ Webhook server {options['host']}:{options['port']}{options['path']} da tayyor.")
+        try:
+            await self._wait_for_signal()
+        finally:
+            await runner.cleanup()
 
-        # Register middlewares
-        from bot.middlewares import SubscriptionMiddleware
-        dp.message.middleware(SubscriptionMiddleware())
+    async def _wait_for_signal(self):
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
 
-        # Register routers
-        dp.include_router(start.router)
-        dp.include_router(topics.router)
-        dp.include_router(freetext.router)
+    async def _run_retention(self):
+        from conversations.retention import RetentionEngine
+        while True:
+            await asyncio.sleep(settings.RETENTION_INTERVAL)
+            try:
+                result = await sync_to_async(RetentionEngine.from_settings().run)()
+                logger.info(f"Retention: {result}")
+                metrics.inc('retention.archived', result.archived)
+                metrics.inc('retention.deleted', result.deleted)
+            except Exception as e:
+                logger.error(f"Retention error: {e}")
 
-        print("✅ Bot tayyor! Telegram'da /start yozing.")
-        await dp.start_polling(bot, allowed_updates=['message', 'callback_query'])
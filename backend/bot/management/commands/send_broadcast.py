@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import sys
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from bot.app import create_bot
+from bot.broadcast import BroadcastRunner, claim_broadcast
+from conversations.models import Broadcast
+
+
+class Command(BaseCommand):
+    help = "Barcha foydalanuvchilarga e'lon yuboradi (yoki uzilib qolgan e'lonni davom ettiradi)"
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--text', help="Xabar matni (HTML)")
+        source.add_argument('--file', help="Xabar matni yozilgan fayl")
+        source.add_argument('--resume', type=int, metavar='ID', help="Mavjud e'lonni cursor'dan davom ettirish")
+        parser.add_argument('--enqueue', action='store_true',
+                            help="Faqat navbatga qo'yish; yuborishni ishlab turgan runbot bajaradi")
+        parser.add_argument('--rate', type=float, default=settings.BROADCAST_RATE, help="Xabar/soniya")
+
+    def handle(self, *args, **options):
+        if options['resume']:
+            # Failed jobs are resumable by hand; a running one is picked up only once its heartbeat is stale
+            reset = Broadcast.objects.filter(pk=options['resume'], status=Broadcast.FAILED).update(
+                status=Broadcast.PENDING, error='', finished_at=None,
+            )
+            if not reset and not Broadcast.objects.filter(pk=options['resume']).exists():
+                raise CommandError(f"E'lon #{options['resume']} topilmadi")
+            broadcast_id = options['resume']
+        else:
+            text = options['text'] or open(options['file'], encoding='utf-8').read()
+            if not text.strip():
+                raise CommandError("Xabar matni bo'sh")
+            broadcast_id = Broadcast.objects.create(text=text).pk
+            self.stdout.write(f"E'lon #{broadcast_id} yaratildi")
+            if options['enqueue']:
+                return
+
+        if not settings.BOT_TOKEN:
+            self.stderr.write("BOT_TOKEN topilmadi! .env faylini tekshiring.")
+            sys.exit(1)
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(self._send(broadcast_id, options['rate']))
+
+    async def _send(self, broadcast_id: int, rate: float):
+        broadcast = await sync_to_async(claim_broadcast)(broadcast_id)
+        if broadcast is None:
+            status = await sync_to_async(
+                Broadcast.objects.filter(pk=broadcast_id).values_list('status', flat=True).first
+            )()
+            raise CommandError(f"E'lon #{broadcast_id} yuborib bo'lmaydi (holati: {status})")
+
+        bot = create_bot(settings.BOT_TOKEN, global_rate=rate)
+        try:
+            broadcast = await BroadcastRunner(bot, rate=rate, on_progress=self._progress).run(broadcast)
+        finally:
+            await bot.session.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"E'lon #{broadcast.pk} {broadcast.status}: yuborildi {broadcast.sent}, "
+            f"xatolik {broadcast.failed}, bloklagan {broadcast.blocked} (jami {broadcast.total})"
+        ))
+
+    def _progress(self, broadcast: Broadcast):
+        percent = 100 * broadcast.processed / broadcast.total if broadcast.total else 100
+        self.stdout.write(f"  {broadcast.processed}/{broadcast.total} ({percent:.0f}%) "
+                          f"sent={broadcast.sent} failed={broadcast.failed} blocked={broadcast.blocked}")
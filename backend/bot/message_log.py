@@ -0,0 +1,143 @@
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DataError, IntegrityError, transaction
+from django.utils import timezone
+
+from bot.history import conversation_history
+from bot.metrics import metrics
+from conversations.models import Message as ChatMessage
+
+logger = logging.getLogger(__name__)
+
+
+class MessageLogBuffer:
+    """
+    Write-behind xabarlar jurnali.
+    Handlerlar xabarni navbatga qo'yadi, fon vazifasi esa ularni
+    hajm yoki vaqt chegarasiga yetganda bitta bulk_create bilan yozadi.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending: list[ChatMessage] = []
+        self._flushing: list[ChatMessage] = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def log(self, user, role: str, text: str, topic=None, topic_id=None):
+        message = ChatMessage(user=user, role=role, text=text, topic=topic, timestamp=timezone.now())
+        if topic_id is not None:
+            message.topic_id = topic_id
+        self._pending.append(message)
+        # The buffer must stay bounded while the database is slow or down: the oldest rows go first
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            metrics.inc('message_log.dropped', overflow)
+        conversation_history.record(user.id, role, text)
+        metrics.set('message_log.pending', len(self._pending))
+        if len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_for(self, user_id: int) -> list[tuple[str, str]]:
+        """Hali bazaga yozilmagan (role, text) xabarlar, yozilish tartibida"""
+        return [(m.role, m.text) for m in self._flushing + self._pending if m.user_id == user_id]
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Fon vazifasini to'xtatib, qolgan barcha xabarlarni yozadi"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            if not await self.flush():
+                break
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            # A burst can fill several batches within one interval; write them without waiting
+            while await self.flush() and len(self._pending) >= self.batch_size:
+                pass
+
+    async def flush(self) -> bool:
+        batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+        if not batch:
+            return True
+        self._flushing = batch
+        written = len(batch)
+        try:
+            try:
+                await sync_to_async(self._write)(batch)
+            except (IntegrityError, DataError) as e:
+                # Retrying the same batch would fail forever; find the rows that can never be written
+                logger.warning(f"Message log batch rejected ({e}), writing {len(batch)} rows one by one")
+                written, batch, error = await sync_to_async(self._write_each)(batch)
+                if error is not None:
+                    raise error  # only the rows not yet written are kept
+        except Exception as e:
+            logger.error(f"Message log flush error ({len(batch)} rows): {e}")
+            metrics.inc('message_log.errors')
+            # Keep the rows for the next attempt unless the buffer is already full
+            if len(self._pending) + len(batch) <= self.max_pending:
+                self._pending[:0] = batch
+            else:
+                metrics.inc('message_log.dropped', len(batch))
+            return False
+        finally:
+            self._flushing = []
+            metrics.set('message_log.pending', len(self._pending))
+        metrics.inc('message_log.flushes')
+        metrics.inc('message_log.rows', written)
+        return True
+
+    @staticmethod
+    def _write(batch: list[ChatMessage]):
+        # bulk_create also bumps the message counter once for the whole batch
+        with transaction.atomic():
+            ChatMessage.objects.bulk_create(batch)
+
+    @staticmethod
+    def _write_each(batch: list[ChatMessage]) -> tuple[int, list[ChatMessage], Exception | None]:
+        """
+        Har bir qator alohida tranzaksiyada (FK tekshiruvi commit paytida bo'ladi, savepoint yetmaydi).
+        IntegrityError/DataError bergan qatorlar tashlab yuboriladi va logga yoziladi; boshqa xatoda
+        (baza ishlamayapti) to'xtaydi. Natija: (yozilganlar soni, yozilmay qolganlar, xato).
+        """
+        written = 0
+        for i, message in enumerate(batch):
+            message.pk = None  # the failed batch may have assigned ids before it was rolled back
+            try:
+                with transaction.atomic():
+                    ChatMessage.objects.bulk_create([message])
+            except (IntegrityError, DataError) as e:
+                metrics.inc('message_log.rejected')
+                logger.error(f"Message log row dropped (user_id={message.user_id}, role={message.role}): {e}")
+                continue
+            except Exception as e:
+                return written, batch[i:], e
+            written += 1
+        return written, [], None
+
+
+message_log = MessageLogBuffer(
+    batch_size=settings.MESSAGE_LOG_BATCH_SIZE,
+    flush_interval=settings.MESSAGE_LOG_FLUSH_INTERVAL,
+    max_pending=settings.MESSAGE_LOG_MAX_PENDING,
+)
@@ -0,0 +1,42 @@
+import logging
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+    """
+    Bot jarayoni ichidagi oddiy hisoblagichlar va o'lchovlar (gauge).
+    Qiymatlar vaqti-vaqti bilan logga yoziladi.
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.gauges = {}
+        self.timings = {}
+
+    def observe(self, name: str, value: float):
+        """Taqsimot (masalan kutish vaqti): soni, o'rtachasi va maksimumi hisobotga chiqadi"""
+        count, total, peak = self.timings.get(name, (0, 0.0, 0.0))
+        self.timings[name] = (count + 1, total + value, max(peak, value))
+
+    def inc(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def set(self, name: str, value):
+        self.gauges[name] = value
+
+    def snapshot(self) -> dict:
+        timings = {}
+        for name, (count, total, peak) in self.timings.items():
+            timings[f'{name}.count'] = count
+            timings[f'{name}.avg'] = round(total / count, 1)
+            timings[f'{name}.max'] = round(peak, 1)
+        return {**self.counters, **self.gauges, **timings}
+
+    def log(self):
+        if self.counters or self.gauges or self.timings:
+            logger.info("metrics %s", " ".join(f"{k}={v}" for k, v in sorted(self.snapshot().items())))
+
+
+metrics = Metrics()
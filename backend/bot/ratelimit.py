@@ -0,0 +1,185 @@
+"""
+Tezlik cheklovlari:
+- ThrottlingMiddleware: har bir foydalanuvchi uchun kiruvchi updatelar token-bucket bilan cheklanadi.
+- SendLimiter: Bot sessiyasi middleware'i — chiquvchi xabarlar Telegram limitlariga
+  (global va har bir chat bo'yicha) moslab navbatlanadi, 429 (RetryAfter) bo'lsa qayta yuboriladi.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.types import TelegramObject, Update
+from django.conf import settings
+
+from bot.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+FLOOD_TEXT = "🐢 Juda tez yozyapsiz. Iltimos, bir oz kutib, so'ng qayta yozing."
+
+# Methods that deliver something into a chat and therefore count against Telegram's send limits
+SEND_PREFIXES = ('send', 'edit', 'copy', 'forward')
+UNLIMITED_METHODS = {'sendChatAction'}  # "typing..." status, not a message
+
+
+class TokenBucket:
+    """
+    rate token/soniya, capacity — ruxsat etilgan portlash (burst).
+    take() token band qiladi (kerak bo'lsa qarzga) va navbati kelguncha kutadi — FIFO adolatli.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.warned = False  # ThrottlingMiddleware: limit haqida ogohlantirish yuborilgan
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self) -> bool:
+        now = time.monotonic()
+        self._refill(now)
+        if self.tokens >= 1 and now >= self.blocked_until:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def take(self) -> float:
+        """Token olinguncha kutadi; kutilgan vaqtni (soniya) qaytaradi"""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        delay = max(-self.tokens / self.rate if self.tokens < 0 else 0.0, self.blocked_until - now)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def pause(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class KeyedBuckets:
+    """Kalit (user/chat) bo'yicha bucketlar; eng uzoq ishlatilmaganlari max_size dan oshsa o'chiriladi"""
+
+    def __init__(self, rate: float, capacity: float, max_size: int = 100_000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_size = max_size
+        self._buckets: OrderedDict[int, TokenBucket] = OrderedDict()
+
+    def get(self, key: int) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Update darajasidagi outer middleware. Limitdan oshgan foydalanuvchiga bitta ogohlantirish
+    yuboriladi, keyingi ortiqcha updatelar jimgina tashlab yuboriladi.
+    """
+
+    def __init__(self, rate: float | None = None, burst: float | None = None):
+        self.buckets = KeyedBuckets(
+            settings.THROTTLE_RATE if rate is None else rate,
+            settings.THROTTLE_BURST if burst is None else burst,
+        )
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get('event_from_user')
+        # Only user-initiated input is throttled; chat_member and similar updates pass through
+        if user is None or not isinstance(event, Update) or not (event.message or event.callback_query):
+            return await handler(event, data)
+
+        # The warned flag lives on the bucket, so it is evicted together with it
+        bucket = self.buckets.get(user.id)
+        if bucket.try_take():
+            bucket.warned = False
+            return await handler(event, data)
+
+        metrics.inc('throttle.dropped')
+        if bucket.warned:
+            return None
+        bucket.warned = True
+        if event.callback_query:
+            return event.callback_query.answer(FLOOD_TEXT)
+        return event.message.answer(FLOOD_TEXT)
+
+
+class SendLimiter(BaseRequestMiddleware):
+    """
+    Telegram limitlari: jami ~30 xabar/s, bitta chatga ~1 xabar/s, guruhga ~20 xabar/min.
+    Bitta jarayon ichidagi barcha yuborishlar (handlerlar, broadcast) shu yerdan o'tadi.
+    """
+
+    def __init__(self, global_rate: float | None = None, chat_rate: float | None = None,
+                 chat_burst: float | None = None, group_rate: float | None = None,
+                 max_retries: int | None = None):
+        global_rate = global_rate or settings.SEND_GLOBAL_RATE
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chats = KeyedBuckets(chat_rate or settings.SEND_CHAT_RATE, chat_burst or settings.SEND_CHAT_BURST)
+        self.groups = KeyedBuckets(group_rate or settings.SEND_GROUP_RATE, settings.SEND_CHAT_BURST)
+        self.max_retries = settings.SEND_MAX_RETRIES if max_retries is None else max_retries
+
+    def set_global_rate(self, rate: float):
+        """Jarayon ulushini o'zgartiradi (workerlar: front broadcast boshlaganda yoki tugatganda)"""
+        bucket = self.global_bucket
+        bucket._refill(time.monotonic())
+        bucket.rate = bucket.capacity = rate
+        bucket.tokens = min(bucket.tokens, rate)  # no burst left over from the larger share
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        if isinstance(chat_id, str):  # @channel username
+            return self.groups.get(hash(chat_id))
+        return self.groups.get(chat_id) if chat_id < 0 else self.chats.get(chat_id)
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, 'chat_id', None)
+        api_method = method.__api_method__
+        if chat_id is None or not api_method.startswith(SEND_PREFIXES) or api_method in UNLIMITED_METHODS:
+            return await make_request(bot, method)
+
+        chat_bucket = self._chat_bucket(chat_id)
+        attempt = 0
+        while True:
+            waited = await chat_bucket.take() + await self.global_bucket.take()
+            if waited > 0:
+                metrics.inc('send.throttled')
+                metrics.observe('send.wait_ms', waited * 1000)
+            try:
+                response = await make_request(bot, method)
+                metrics.inc('send.ok')
+                return response
+            except TelegramRetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    metrics.inc('send.retry_exhausted')
+                    raise
+                metrics.inc('send.retried')
+                logger.warning(f"{api_method} chat={chat_id}: 429, {e.retry_after}s kutiladi")
+                chat_bucket.pause(e.retry_after)
+                if e.retry_after > 5:
+                    # Long flood waits are usually bot-wide; slow everyone down, not just this chat
+                    self.global_bucket.pause(e.retry_after)
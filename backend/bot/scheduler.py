@@ -0,0 +1,127 @@
+"""
+Dispatcher ichidagi rejalashtiruvchi:
+- UserSerialMiddleware (update, outer): bitta foydalanuvchining updatelari ketma-ket bajariladi;
+  foydalanuvchining keyingi updatei kutib turgan bo'lsa, handler qaytargan TelegramMethod navbat
+  ichida yuboriladi (aks holda javoblar tartibi buziladi), kutmayotgan bo'lsa qaytariladi (webhookda inline);
+  jami kutayotgan updatelar SCHEDULER_MAX_PENDING dan oshsa, darhol "band" javobi qaytariladi.
+- LaneMiddleware (message): og'ir handlerlar flags={'lane': 'ai' | 'db'} bilan belgilanadi;
+  har bir yo'lak o'z parallellik chegarasi va navbat chuqurligiga ega.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.methods import TelegramMethod
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update
+from django.conf import settings
+
+from bot.metrics import metrics
+
+BUSY_TEXT = "⏳ Hozir so'rovlar juda ko'p. Iltimos, birozdan so'ng qayta urinib ko'ring."
+
+
+def busy_reply(event: TelegramObject):
+    """Handler o'rniga qaytariladigan tezkor javob (webhookda inline yuboriladi)"""
+    if isinstance(event, Update):
+        event = event.message or event.callback_query
+    if isinstance(event, (Message, CallbackQuery)):
+        return event.answer(BUSY_TEXT)
+    return None
+
+
+class UserSerialMiddleware(BaseMiddleware):
+    def __init__(self, max_pending: int | None = None):
+        self.max_pending = max_pending or settings.SCHEDULER_MAX_PENDING
+        self.pending = 0
+        self._locks: dict[int, list] = {}  # user_id -> [lock, users waiting or running]
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
+        if self.pending >= self.max_pending:
+            metrics.inc('scheduler.shed')
+            return busy_reply(event)
+
+        entry = self._locks.setdefault(user.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        self.pending += 1
+        metrics.set('scheduler.pending', self.pending)
+        started = time.perf_counter()
+        try:
+            async with entry[0]:
+                metrics.observe('scheduler.user_wait_ms', (time.perf_counter() - started) * 1000)
+                result = await handler(event, data)
+                if isinstance(result, TelegramMethod) and entry[1] > 1:
+                    # This user's next update is already waiting: returned to the webhook, the reply
+                    # would be sent after the lock is released, i.e. possibly after that update's reply
+                    await data['bot'](result)
+                    return None
+                return result
+        finally:
+            self.pending -= 1
+            metrics.set('scheduler.pending', self.pending)
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[user.id]
+
+
+class Lane:
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.max_queue = max_queue
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.waiting = 0
+        self.in_flight = 0
+
+    def publish(self):
+        metrics.set(f'scheduler.{self.name}.waiting', self.waiting)
+        metrics.set(f'scheduler.{self.name}.in_flight', self.in_flight)
+
+
+class LaneMiddleware(BaseMiddleware):
+    def __init__(self, lanes: dict[str, Lane] | None = None):
+        self.lanes = lanes or {
+            'ai': Lane('ai', settings.SCHEDULER_AI_CONCURRENCY, settings.SCHEDULER_AI_QUEUE),
+            'db': Lane('db', settings.SCHEDULER_DB_CONCURRENCY, settings.SCHEDULER_DB_QUEUE),
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        lane = self.lanes.get(get_flag(data, 'lane'))
+        if lane is None:
+            return await handler(event, data)
+
+        if lane.semaphore.locked() and lane.waiting >= lane.max_queue:
+            metrics.inc(f'scheduler.{lane.name}.shed')
+            return busy_reply(event)
+
+        lane.waiting += 1
+        lane.publish()
+        started = time.perf_counter()
+        try:
+            await lane.semaphore.acquire()
+        finally:
+            lane.waiting -= 1
+        metrics.observe(f'scheduler.{lane.name}.wait_ms', (time.perf_counter() - started) * 1000)
+
+        lane.in_flight += 1
+        lane.publish()
+        try:
+            return await handler(event, data)
+        finally:
+            lane.in_flight -= 1
+            lane.semaphore.release()
+            lane.publish()
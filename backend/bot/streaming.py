@@ -0,0 +1,81 @@
+"""
+AI javobini oqim bilan ko'rsatish: darhol placeholder xabar yuboriladi, keyin u to'plangan matn
+bilan tahrirlanadi. Tahrirlar AI_STREAM_EDIT_INTERVAL dan tez-tez bo'lmaydi va bir vaqtda bittadan
+ortiq tahrir yuborilmaydi — token kelishi Telegram so'rovlarini kutib qolmaydi.
+"""
+import asyncio
+import logging
+import time
+
+from aiogram.enums import ChatAction
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import Message
+from django.conf import settings
+
+from bot.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_TEXT = "⏳ Javob tayyorlanmoqda..."
+CURSOR = " ▌"
+MAX_TEXT_LENGTH = 4096  # Telegram message limit
+
+
+class StreamingReply:
+    """Bitta javob xabari: start() → feed(delta)... → finish(text)"""
+
+    def __init__(self, message: Message, interval: float | None = None):
+        self.message = message
+        self.interval = settings.AI_STREAM_EDIT_INTERVAL if interval is None else interval
+        self.reply: Message | None = None
+        self.text = ''
+        self._shown = ''
+        self._last_edit = 0.0
+        self._edit_task: asyncio.Task | None = None
+        self._started = 0.0
+
+    async def start(self, reply_markup=None):
+        # The reply keyboard can only be attached when sending, not when editing
+        self.reply = await self.message.answer(PLACEHOLDER_TEXT, reply_markup=reply_markup)
+        # _last_edit stays 0: the first tokens are shown as soon as they arrive
+        self._started = time.monotonic()
+        try:
+            await self.message.bot.send_chat_action(self.message.chat.id, ChatAction.TYPING)
+        except Exception as e:
+            logger.debug(f"send_chat_action: {e}")
+
+    def feed(self, delta: str):
+        if not self.text:
+            metrics.observe('stream.first_token_ms', (time.monotonic() - self._started) * 1000)
+        self.text += delta
+        in_flight = self._edit_task is not None and not self._edit_task.done()
+        if not in_flight and time.monotonic() - self._last_edit >= self.interval:
+            # Partial text is sent without parse_mode: unclosed HTML tags would be rejected
+            self._edit_task = asyncio.create_task(self._edit(self.text[:MAX_TEXT_LENGTH - len(CURSOR)] + CURSOR, None))
+
+    async def finish(self, text: str):
+        """Yakuniy matn HTML sifatida; HTML noto'g'ri bo'lsa oddiy matn sifatida qoldiriladi"""
+        if self._edit_task is not None:
+            await self._edit_task
+        text = text[:MAX_TEXT_LENGTH]
+        if not await self._edit(text, 'HTML'):
+            await self._edit(text, None)
+
+    async def _edit(self, text: str, parse_mode: str | None) -> bool:
+        self._last_edit = time.monotonic()
+        if text == self._shown:
+            return True
+        try:
+            await self.reply.edit_text(text, parse_mode=parse_mode)
+        except TelegramBadRequest as e:
+            if 'not modified' in e.message:
+                return True
+            logger.warning(f"Stream edit chat={self.message.chat.id}: {e.message}")
+            return False
+        except Exception as e:
+            logger.warning(f"Stream edit chat={self.message.chat.id}: {e}")
+            return False
+        self._shown = text
+        metrics.inc('stream.edits')
+        return True
+
@@ -0,0 +1,397 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+from aiogram import Bot, Dispatcher
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.methods import SendMessage
+from aiogram.types import PhotoSize, Update
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, OperationalError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from bot.ai_providers import BaseProvider, FakeProvider
+from bot.benchmarks import BENCH_TOKEN
+from bot.broadcast import BroadcastRunner, claim_broadcast, watch_broadcasts
+from bot.handlers import freetext, topics
+from bot.knowledge_cache import KnowledgeCache
+from bot.message_log import MessageLogBuffer
+from bot.metrics import metrics
+from bot.ratelimit import FLOOD_TEXT, SendLimiter, ThrottlingMiddleware
+from bot.scheduler import UserSerialMiddleware
+from bot.users import UserDirectory
+from bot.utils import AIService, AIStreamError
+from bot.workers import SEND_RATE, WorkerPool
+from conversations.models import TOTAL_MESSAGES, Broadcast, CounterShard, TelegramUser
+from conversations.models import Message as ChatMessage
+from knowledge.models import Topic
+
+HISTORY = [{'role': 'user', 'content': "oldingi savol"}]
+
+
+class BrokenStreamProvider(BaseProvider):
+
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    async def stream(self, messages, **kwargs):
+        for delta in self.deltas:
+            yield delta
+        raise RuntimeError("connection reset")
+
+
+class FakeReply:
+    instances = []
+
+    def __init__(self, message):
+        self.text = ''
+        self.finished = None
+        FakeReply.instances.append(self)
+
+    async def start(self, reply_markup=None):
+        pass
+
+    def feed(self, delta):
+        self.text += delta
+
+    async def finish(self, text):
+        self.finished = text
+
+
+@override_settings(AI_CACHE_ENABLED=False)
+class StreamFailureTests(SimpleTestCase):
+
+    async def test_stream_response_raises_after_partial_output(self):
+        service = AIService(provider=BrokenStreamProvider(["Birinchi", " qism"]))
+        received = []
+        with self.assertRaises(AIStreamError), self.assertLogs('bot.utils', 'ERROR'):
+            async for delta in service.stream_response("savol", history=HISTORY):
+                received.append(delta)
+        self.assertEqual(received, ["Birinchi", " qism"])
+
+    async def _answer(self, deltas):
+        FakeReply.instances.clear()
+        service = AIService(provider=BrokenStreamProvider(deltas))
+        with mock.patch.object(freetext, 'ai_service', service), \
+                mock.patch.object(freetext, 'StreamingReply', FakeReply), \
+                mock.patch.object(freetext, 'message_log') as message_log, \
+                self.assertLogs('bot.utils', 'ERROR'):
+            await freetext.stream_ai_answer(SimpleNamespace(text="savol"), user=object(), history=HISTORY)
+        return FakeReply.instances[0].finished, message_log.log
+
+    async def test_partial_answer_gets_a_notice_and_is_not_logged(self):
+        finished, log = await self._answer(["Birinchi", " qism"])
+        self.assertEqual(finished, "Birinchi qism" + freetext.STREAM_INTERRUPTED_TEXT)
+        log.assert_not_called()
+
+    async def test_failure_before_first_token_falls_back(self):
+        finished, log = await self._answer([])
+        self.assertEqual(finished, freetext.FALLBACK_TEXT)
+        log.assert_called_once()
+
+
+class FormatFAQAnswerTests(SimpleTestCase):
+
+    def test_question_is_escaped_and_answer_html_is_kept(self):
+        doc = SimpleNamespace(topic_emoji='📋', question="Yosh < 16 & pasport?", answer="<b>Kerak</b>")
+        text = freetext.format_faq_answer(doc)
+        self.assertIn("<b>Yosh &lt; 16 &amp; pasport?</b>", text)
+        self.assertIn("<b>Kerak</b>", text)
+
+
+class SlowBot:
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.sent = []
+
+    async def send_message(self, chat_id, text):
+        await asyncio.sleep(self.delay)
+        self.sent.append(chat_id)
+
+
+@override_settings(BROADCAST_STALE_AFTER=0.2)
+class BroadcastHeartbeatTests(TestCase):
+
+    async def test_slow_chunk_is_not_reclaimed(self):
+        await TelegramUser.objects.abulk_create([TelegramUser(telegram_id=i) for i in (1, 2)])
+        created = await Broadcast.objects.acreate(text="E'lon")
+        broadcast = await sync_to_async(claim_broadcast)()
+        bot = SlowBot(delay=0.6)
+        runner = BroadcastRunner(bot, rate=100, chunk_size=2)
+
+        run = asyncio.create_task(runner.run(broadcast))
+        await asyncio.sleep(0.4)  # the chunk is still in flight, two stale periods later
+        self.assertIsNone(await sync_to_async(claim_broadcast)(created.pk))
+        result = await run
+
+        self.assertEqual(result.status, Broadcast.DONE)
+        self.assertEqual(sorted(bot.sent), [1, 2])
+
+
+class UserSerialMiddlewareTests(SimpleTestCase):
+
+    async def test_returned_method_is_sent_before_the_next_update_runs(self):
+        events = []
+
+        async def bot(method):
+            await asyncio.sleep(0.01)
+            events.append(f"sent {method.text}")
+
+        async def handler(event, data):
+            events.append(f"handle {event}")
+            await asyncio.sleep(0)  # b arrives while a is running
+            return SendMessage(chat_id=1, text=event)
+
+        middleware = UserSerialMiddleware(max_pending=10)
+        data = {'event_from_user': SimpleNamespace(id=1), 'bot': bot}
+        results = await asyncio.gather(middleware(handler, 'a', dict(data)), middleware(handler, 'b', dict(data)))
+
+        # b has nothing queued behind it, so its reply goes back to the caller (webhook: inline)
+        self.assertEqual(events, ['handle a', 'sent a', 'handle b'])
+        self.assertEqual(results[0], None)
+        self.assertEqual(results[1].text, 'b')
+
+    async def test_uncontended_method_is_returned(self):
+        bot = mock.AsyncMock()
+        middleware = UserSerialMiddleware(max_pending=10)
+        result = await middleware(mock.AsyncMock(return_value=SendMessage(chat_id=1, text='a')), 'a',
+                                  {'event_from_user': SimpleNamespace(id=1), 'bot': bot})
+        self.assertEqual(result.text, 'a')
+        bot.assert_not_called()
+
+
+class MessageLogBufferTests(TestCase):
+
+    def setUp(self):
+        self.user = TelegramUser.objects.create(telegram_id=1)
+
+    def test_pending_rows_are_capped_oldest_first(self):
+        buffer = MessageLogBuffer(batch_size=2, flush_interval=60, max_pending=3)
+        dropped = metrics.counters['message_log.dropped']
+        for i in range(5):
+            buffer.log(self.user, 'user', str(i))
+        self.assertEqual([text for _, text in buffer.pending_for(self.user.id)], ['2', '3', '4'])
+        self.assertEqual(metrics.counters['message_log.dropped'] - dropped, 2)
+
+    async def test_full_batches_are_written_without_waiting_for_the_interval(self):
+        buffer = MessageLogBuffer(batch_size=2, flush_interval=60, max_pending=100)
+        await buffer.start()
+        try:
+            for i in range(5):
+                buffer.log(self.user, 'user', str(i))
+            await asyncio.sleep(0.2)
+            self.assertEqual(await ChatMessage.objects.acount(), 4)
+        finally:
+            await buffer.stop()
+        self.assertEqual(await ChatMessage.objects.acount(), 5)
+
+
+class MessageLogBadRowTests(TransactionTestCase):
+    """Foreign keys are checked at commit, so these need real transactions"""
+
+    async def test_bad_rows_are_dropped_and_the_rest_written(self):
+        user = await TelegramUser.objects.acreate(telegram_id=1)
+        deleted = await TelegramUser.objects.acreate(telegram_id=2)
+        buffer = MessageLogBuffer(batch_size=10, flush_interval=60, max_pending=100)
+        buffer.log(user, 'user', "birinchi")
+        buffer.log(user, 'bot', None)  # NOT NULL
+        buffer.log(deleted, 'user', "o'chirilgan foydalanuvchi")
+        buffer.log(user, 'bot', "ikkinchi")
+        await TelegramUser.objects.filter(pk=deleted.pk).adelete()
+
+        with self.assertLogs('bot.message_log', 'ERROR') as logs:
+            self.assertTrue(await buffer.flush())
+        self.assertEqual(len([line for line in logs.output if 'dropped' in line]), 2)
+        self.assertEqual(buffer.pending_for(user.id), [])
+        texts = [text async for text in ChatMessage.objects.order_by('id').values_list('text', flat=True)]
+        self.assertEqual(texts, ["birinchi", "ikkinchi"])
+        self.assertEqual(await sync_to_async(CounterShard.objects.total)(TOTAL_MESSAGES), 2)
+
+    async def test_unavailable_database_keeps_the_batch(self):
+        user = await TelegramUser.objects.acreate(telegram_id=1)
+        buffer = MessageLogBuffer(batch_size=10, flush_interval=60, max_pending=100)
+        buffer.log(user, 'user', "salom")
+        with mock.patch.object(MessageLogBuffer, '_write', side_effect=OperationalError("database is locked")), \
+                self.assertLogs('bot.message_log', 'ERROR'):
+            self.assertFalse(await buffer.flush())
+        self.assertEqual(buffer.pending_for(user.id), [('user', "salom")])
+        self.assertTrue(await buffer.flush())
+        self.assertEqual(await ChatMessage.objects.acount(), 1)
+
+
+def message_update(update_id: int, user_id: int) -> Update:
+    sender = {'id': user_id, 'is_bot': False, 'first_name': "Ali"}
+    return Update.model_validate({
+        'update_id': update_id,
+        'message': {'message_id': update_id, 'date': 0, 'chat': {'id': user_id, 'type': 'private'},
+                    'from': sender, 'text': "salom"},
+    })
+
+
+class ThrottlingMiddlewareTests(SimpleTestCase):
+
+    async def feed(self, middleware, update_id, user_id=1):
+        async def handler(event, data):
+            return 'handled'
+
+        return await middleware(handler, message_update(update_id, user_id),
+                                {'event_from_user': SimpleNamespace(id=user_id)})
+
+    async def test_zero_rate_allows_only_the_burst_and_warns_once(self):
+        middleware = ThrottlingMiddleware(rate=0, burst=2)
+        self.assertEqual(middleware.buckets.rate, 0)
+        results = [await self.feed(middleware, i) for i in range(5)]
+        self.assertEqual(results[:2], ['handled', 'handled'])
+        self.assertEqual(results[2].text, FLOOD_TEXT)
+        self.assertEqual(results[3:], [None, None])
+
+    async def test_warned_users_are_evicted_with_their_buckets(self):
+        middleware = ThrottlingMiddleware(rate=0, burst=0)
+        middleware.buckets.max_size = 3
+        for user_id in range(10):
+            self.assertEqual((await self.feed(middleware, user_id, user_id)).text, FLOOD_TEXT)
+        self.assertEqual(len(middleware.buckets), 3)
+        # The first user's bucket and flag were evicted, so they are warned again
+        self.assertEqual((await self.feed(middleware, 10, 0)).text, FLOOD_TEXT)
+
+
+class RetiredTopicButtonTests(TestCase):
+
+    def setUp(self):
+        self.active = Topic.objects.create(slug='pasport', title="Pasport", emoji='🪪')
+        Topic.objects.create(slug='eski', title="Eski mavzu", emoji='📋', is_active=False)
+        self.cache = KnowledgeCache()
+        self.cache.refresh(force=True)
+
+    def test_inactive_and_renamed_topic_labels_are_retired(self):
+        snapshot = self.cache.snapshot
+        self.assertTrue(snapshot.is_retired_button("📋 Eski mavzu"))
+        self.assertFalse(snapshot.is_retired_button("🪪 Pasport"))
+
+        self.active.title = "Pasport olish"
+        self.active.save()
+        self.cache.refresh(force=True)
+        self.assertTrue(self.cache.snapshot.is_retired_button("🪪 Pasport"))
+        self.assertIsNotNone(self.cache.snapshot.topic_for_button("🪪 Pasport olish"))
+
+    async def test_retired_label_gets_the_unavailable_reply_instead_of_ai(self):
+        message = message_update(1, 1).message.model_copy(update={'text': "📋 Eski mavzu"})
+        with mock.patch.object(freetext, 'knowledge_cache', self.cache), \
+                mock.patch.object(topics, 'knowledge_cache', self.cache):
+            self.assertFalse(freetext.is_free_text(message.text))
+            self.assertTrue(await topics.RetiredTopicButton()(message))
+            reply = await topics.handle_retired_topic(message)
+        self.assertEqual(reply.text, topics.RETIRED_TOPIC_TEXT)
+
+
+class NonTextMessageTests(SimpleTestCase):
+
+    async def test_photo_is_not_sent_to_ai_or_logged(self):
+        photo = message_update(1, 1).message.model_copy(
+            update={'text': None, 'photo': [PhotoSize(file_id='x', file_unique_id='x', width=1, height=1)]},
+        )
+        update = Update(update_id=1, message=photo)
+        dp = Dispatcher()
+        dp.include_router(freetext.router)
+        with mock.patch.object(freetext, 'ai_service') as ai_service, \
+                mock.patch.object(freetext, 'message_log') as message_log, \
+                mock.patch.object(freetext, 'user_directory') as user_directory:
+            result = await dp.feed_update(Bot('42:TEST'), update)
+        self.assertIs(result, UNHANDLED)
+        self.assertFalse(freetext.is_free_text(None))
+        ai_service.get_response.assert_not_called()
+        message_log.log.assert_not_called()
+        user_directory.get.assert_not_called()
+
+
+class BroadcastSendBudgetTests(SimpleTestCase):
+
+    def test_worker_share_follows_the_front(self):
+        pool = WorkerPool(2, BENCH_TOKEN)
+        self.assertEqual(pool.send_rate, settings.SEND_GLOBAL_RATE / 2)
+        pool.set_send_rate(5)
+        self.assertEqual([worker.updates.get(timeout=5) for worker in pool.workers], [(SEND_RATE, 2.5)] * 2)
+        self.assertEqual(pool.send_rate, 2.5)  # restarted workers start with the reduced share
+
+    def test_limiter_share_can_shrink(self):
+        limiter = SendLimiter(global_rate=30)
+        limiter.set_global_rate(2.5)
+        self.assertEqual((limiter.global_bucket.rate, limiter.global_bucket.tokens), (2.5, 2.5))
+
+    async def test_watcher_reports_running_broadcasts(self):
+        events = []
+        claims = iter([SimpleNamespace(pk=1)])
+
+        def claim():
+            try:
+                return next(claims)
+            except StopIteration:
+                raise asyncio.CancelledError
+
+        runner = mock.Mock()
+        runner.return_value.run = mock.AsyncMock(side_effect=lambda broadcast: events.append('run'))
+        with mock.patch('bot.broadcast.claim_broadcast', claim), mock.patch('bot.broadcast.BroadcastRunner', runner), \
+                self.assertRaises(asyncio.CancelledError):
+            await watch_broadcasts(bot=None, on_running=events.append)
+        self.assertEqual(events, [True, 'run', False])
+
+
+@override_settings(AI_CACHE_ENABLED=True)
+class AnswerCacheWriteTests(SimpleTestCase):
+
+    async def test_answer_is_returned_before_the_cache_write(self):
+        release = threading.Event()
+        stored = []
+
+        def slow_store(question, answer, latency_ms):
+            release.wait(5)
+            stored.append(question)
+
+        service = AIService(provider=FakeProvider(latency=0))
+        with mock.patch('bot.utils.answer_cache.lookup', return_value=None), \
+                mock.patch('bot.utils.answer_cache.store', slow_store):
+            self.assertIn("savol", await service.get_response("savol"))
+            self.assertEqual([delta async for delta in service.stream_response("oqim")][-1].strip()[-1], "n")
+            self.assertEqual(stored, [])
+            release.set()
+            await service.close()
+        self.assertEqual(sorted(stored), ["oqim", "savol"])
+
+    async def test_failed_write_is_logged(self):
+        service = AIService(provider=FakeProvider(latency=0))
+        with mock.patch('bot.utils.answer_cache.lookup', return_value=None), \
+                mock.patch('bot.utils.answer_cache.store', side_effect=DatabaseError("locked")), \
+                self.assertLogs('bot.utils', 'ERROR') as logs:
+            await service.get_response("savol")
+            await service.close()
+        self.assertIn("AI cache store error: locked", logs.output[0])
+
+
+class UserDirectoryTests(TestCase):
+
+    def setUp(self):
+        self.directory = UserDirectory(max_size=100, ttl=600, flush_interval=30)
+        self.tg_user = SimpleNamespace(id=42, username='ali', full_name="Ali", language_code='uz')
+
+    async def test_user_deleted_in_this_process_is_dropped_from_cache(self):
+        with mock.patch('bot.users.user_directory', self.directory):
+            first = await self.directory.get(self.tg_user)
+            await TelegramUser.objects.filter(pk=first.pk).adelete()
+            self.assertEqual(len(self.directory), 0)
+            second = await self.directory.get(self.tg_user)
+        self.assertNotEqual(first.pk, second.pk)
+        self.assertEqual(await self.directory.flush(), 1)
+
+    async def test_flush_forgets_user_deleted_elsewhere(self):
+        first = await self.directory.get(self.tg_user)
+        await TelegramUser.objects.filter(pk=first.pk).adelete()  # another process: no signal reaches this cache
+        self.assertEqual(len(self.directory), 1)
+
+        self.assertEqual(await self.directory.flush(), 0)
+        self.assertEqual(len(self.directory), 0)
+        self.assertEqual(await self.directory.flush(), 0)  # not requeued
+        second = await self.directory.get(self.tg_user)
+        self.assertNotEqual(first.pk, second.pk)
@@ -0,0 +1,155 @@
+"""
+Bot jarayonidagi foydalanuvchilar katalogi: telegram_id → TelegramUser (LRU).
+
+Ma'lum foydalanuvchi uchun bazaga so'rov yuborilmaydi. Har bir update last_active'ni va
+(o'zgargan bo'lsa) username/full_name'ni faqat xotirada yangilaydi; o'zgarganlar
+USER_FLUSH_INTERVAL da bir marta bulk_update bilan yoziladi. O'chirilgan yoki admin panelda
+o'zgartirilgan foydalanuvchi keshdan chiqariladi (signal yoki flush paytida qatori topilmasa).
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from bot.metrics import metrics
+from conversations.models import TelegramUser
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FIELDS = ['username', 'full_name', 'last_active']
+
+
+class UserDirectory:
+
+    def __init__(self, max_size: int, ttl: float, flush_interval: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self._users: OrderedDict[int, tuple[TelegramUser, float]] = OrderedDict()
+        self._dirty: dict[int, TelegramUser] = {}  # pk → user with unsaved changes
+        self._task = None
+
+    def __len__(self):
+        return len(self._users)
+
+    async def get(self, tg_user) -> TelegramUser:
+        """Telegram foydalanuvchisi uchun TelegramUser (kerak bo'lsa yaratiladi); faollik qayd etiladi"""
+        cached = self._users.get(tg_user.id)
+        if cached is not None and time.monotonic() - cached[1] < self.ttl:
+            self._users.move_to_end(tg_user.id)
+            user = cached[0]
+            metrics.inc('users.hit')
+        else:
+            # TTL re-check also notices users deleted from the admin panel
+            user = await self._load(tg_user)
+            metrics.inc('users.miss')
+        self._touch(user, tg_user)
+        return user
+
+    async def _load(self, tg_user) -> TelegramUser:
+        user, _ = await TelegramUser.objects.aget_or_create(
+            telegram_id=tg_user.id,
+            defaults={
+                'username': tg_user.username or '',
+                'full_name': tg_user.full_name or '',
+                'language_code': tg_user.language_code or 'uz',
+            }
+        )
+        self._users[tg_user.id] = (user, time.monotonic())
+        self._users.move_to_end(tg_user.id)
+        while len(self._users) > self.max_size:
+            self._users.popitem(last=False)
+        metrics.set('users.cached', len(self._users))
+        return user
+
+    def forget(self, telegram_id: int, pk: int | None = None):
+        """Keshdagi yozuvni tashlaydi; pk berilsa (qator o'chirilgan) yozilmagan o'zgarishlari ham"""
+        self._users.pop(telegram_id, None)
+        if pk is not None:
+            self._dirty.pop(pk, None)
+        metrics.set('users.cached', len(self._users))
+
+    def _touch(self, user: TelegramUser, tg_user):
+        user.username = tg_user.username or ''
+        user.full_name = tg_user.full_name or ''
+        user.last_active = timezone.now()
+        self._dirty[user.pk] = user
+        metrics.set('users.dirty', len(self._dirty))
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        batch, self._dirty = list(self._dirty.values()), {}
+        metrics.set('users.dirty', 0)
+        if not batch:
+            return 0
+        try:
+            missing = await sync_to_async(self._write)(batch)
+        except Exception as e:
+            logger.error(f"User flush error ({len(batch)} rows): {e}")
+            metrics.inc('users.flush_errors')
+            for user in batch:
+                self._dirty.setdefault(user.pk, user)
+            return 0
+        for user in missing:
+            # Deleted in another process (admin panel): the next update creates the user again
+            self.forget(user.telegram_id, user.pk)
+        metrics.inc('users.vanished', len(missing))
+        metrics.inc('users.flushed', len(batch) - len(missing))
+        return len(batch) - len(missing)
+
+    @staticmethod
+    def _write(batch: list[TelegramUser]) -> list[TelegramUser]:
+        """O'zgarishlarni yozadi; bazada qatori qolmagan foydalanuvchilarni qaytaradi"""
+        missing = []
+        for start in range(0, len(batch), 500):
+            chunk = batch[start:start + 500]
+            pks = [user.pk for user in chunk]
+            existing = set(TelegramUser.objects.filter(pk__in=pks).values_list('pk', flat=True))
+            missing.extend(user for user in chunk if user.pk not in existing)
+            TelegramUser.objects.bulk_update([user for user in chunk if user.pk in existing], PROFILE_FIELDS)
+            # Anyone who wrote to the bot has unblocked it; only rows that need it are touched
+            TelegramUser.objects.filter(pk__in=pks, is_blocked=True).update(is_blocked=False)
+        return missing
+
+
+user_directory = UserDirectory(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL,
+    flush_interval=settings.USER_FLUSH_INTERVAL,
+)
+
+
+@receiver(post_save, sender=TelegramUser)
+def user_saved(sender, instance, created, **kwargs):
+    # Admin edits (is_blocked, is_subscribed) are picked up on the next update; bulk_update sends no signal
+    if not created:
+        user_directory.forget(instance.telegram_id)
+
+
+@receiver(post_delete, sender=TelegramUser)
+def user_deleted(sender, instance, **kwargs):
+    user_directory.forget(instance.telegram_id, instance.pk)
@@ -4,14 +4,31 @@ import django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 django.setup()
 
+import asyncio
+import logging
+import time
+from typing import AsyncIterator
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from bot.ai_providers import build_provider
+from bot.metrics import metrics
+from knowledge import answer_cache
+
+logger = logging.getLogger(__name__)
+
+
+class AIStreamError(Exception):
+    """Oqim javob tugashidan oldin uzildi; shu paytgacha kelgan bo'laklar to'liq javob emas"""
+
 
 class AIService:
     """
-    AI javob xizmati.
-    AI_API_KEY bo'lsa → real API chaqiriladi.
+    AI javob xizmati (asinxron).
+    AI_API_KEY bo'lsa → real API chaqiriladi (bitta umumiy klient orqali).
     Bo'lmasa → None qaytaradi, bot fallback javob beradi.
+    AI_PROVIDER=fake bo'lsa → tarmoqsiz lokal provayder ishlatiladi.
     """
 
     SYSTEM_PROMPT = """Sen "Do'stlik tumani AI Maslahatchisi"san.
@@ -31,27 +48,172 @@ Qoidalar:
 5) Har bir javob oxirida: "Agar xohlasangiz, yana savol berishingiz mumkin" deb yoz
 """
 
-    def get_response(self, question: str) -> str | None:
-        api_key = settings.AI_API_KEY
-        if not api_key:
+    def __init__(self, provider=None):
+        self._provider = provider
+        self._provider_ready = provider is not None
+        self._semaphore = None
+        self._cache_writes: set[asyncio.Task] = set()  # references keep running writes from being collected
+
+    @property
+    def provider(self):
+        # Provayder birinchi chaqiruvda bir marta yaratiladi va keyin qayta ishlatiladi
+        if not self._provider_ready:
+            self._provider = build_provider()
+            self._provider_ready = True
+        return self._provider
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # Bir vaqtda ketayotgan AI so'rovlari soni uchun global cheklov
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.AI_MAX_CONCURRENCY)
+        return self._semaphore
+
+    def _messages(self, question: str, history: list[dict] | None) -> list[dict]:
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            *(history or []),
+            {"role": "user", "content": question},
+        ]
+
+    async def get_response(self, question: str, history: list[dict] | None = None) -> str | None:
+        """history — oldingi xabarlar (bot.history); bo'lsa javob keshi ishlatilmaydi"""
+        provider = self.provider
+        if provider is None:
             return None
 
+        # A follow-up's answer depends on the conversation, so only standalone questions use the cache
+        use_cache = not history
+        cached = await self._cache_lookup(question) if use_cache else None
+        if cached is not None:
+            return cached
+
+        messages = self._messages(question, history)
+
+        try:
+            started = time.perf_counter()
+            async with self.semaphore:
+                answer = await provider.complete(
+                    messages,
+                    max_tokens=800,
+                    temperature=0.7,
+                    timeout=settings.AI_TIMEOUT,
+                )
+        except Exception as e:
+            logger.error(f"AI xatolik: {e}")
+            return None
+
+        if use_cache:
+            self._cache_store(question, answer, int((time.perf_counter() - started) * 1000))
+        return answer
+
+    async def stream_response(self, question: str, history: list[dict] | None = None) -> AsyncIterator[str]:
+        """
+        get_response'ning oqimli varianti: javob bo'laklarini kelishi bilan beradi.
+        Keshdagi javob bitta bo'lak bo'lib keladi. Provayder xatosida AIStreamError — chaqiruvchi
+        qisman matnni yakuniy javob deb hisoblamasligi kerak. Faqat to'liq javob keshlanadi.
+        Qayta urinishlar (AI_MAX_RETRIES) get_response'dagidek faqat javob boshlanguncha ishlaydi.
+        """
+        provider = self.provider
+        if provider is None:
+            return
+
+        use_cache = not history
+        cached = await self._cache_lookup(question) if use_cache else None
+        if cached is not None:
+            yield cached
+            return
+
+        messages = self._messages(question, history)
+
+        parts = []
+        started = time.perf_counter()
         try:
-            import openai
-            client = openai.OpenAI(api_key=api_key)
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    {"role": "user", "content": question},
-                ],
-                max_tokens=800,
-                temperature=0.7,
-            )
-            return response.choices[0].message.content
+            async with self.semaphore:
+                async for delta in provider.stream(
+                    messages,
+                    max_tokens=800,
+                    temperature=0.7,
+                    timeout=settings.AI_TIMEOUT,
+                ):
+                    parts.append(delta)
+                    yield delta
         except Exception as e:
-            print(f"AI xatolik: {e}")
+            logger.error(f"AI stream xatolik: {e}")
+            metrics.inc('ai.stream_errors')
+            raise AIStreamError(str(e)) from e
+
+        if use_cache:
+            self._cache_store(question, ''.join(parts), int((time.perf_counter() - started) * 1000))
+
+    async def _cache_lookup(self, question: str) -> str | None:
+        if not settings.AI_CACHE_ENABLED:
+            return None
+        try:
+            entry = await sync_to_async(answer_cache.lookup)(question)
+        except Exception as e:
+            logger.error(f"AI cache lookup error: {e}")
             return None
+        metrics.inc('ai_cache.hit' if entry else 'ai_cache.miss')
+        return entry.answer if entry else None
+
+    def _cache_store(self, question: str, answer: str | None, latency_ms: int):
+        """Keshga yozish fonda: javob (yoki oqimning yakuniy tahriri) bazaga yozilishini kutmaydi"""
+        if not settings.AI_CACHE_ENABLED or not answer:
+            return
+        task = asyncio.create_task(sync_to_async(answer_cache.store)(question, answer, latency_ms))
+        self._cache_writes.add(task)
+        task.add_done_callback(self._cache_store_done)
+
+    def _cache_store_done(self, task: asyncio.Task):
+        self._cache_writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"AI cache store error: {task.exception()}")
+
+    async def close(self):
+        if self._cache_writes:
+            await asyncio.wait(list(self._cache_writes))
+        if self._provider is not None:
+            await self._provider.close()
+
+
+class AnswerCacheMaintenance:
+    """
+    Javob keshi uchun fon vazifasi: xotiradagi hit/miss hisoblagichlarini bazaga yozadi va
+    eskirgan yozuvlarni o'chiradi. Javob berish yo'lida kesh faqat o'qiladi.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.run_once(evict=False)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    async def run_once(self, evict: bool = True):
+        try:
+            await sync_to_async(answer_cache.flush_stats)()
+            if evict and settings.AI_CACHE_ENABLED:
+                metrics.inc('ai_cache.evicted', await sync_to_async(answer_cache.evict)())
+        except Exception as e:
+            logger.error(f"AI cache maintenance error: {e}")
 
 
 ai_service = AIService()
+answer_cache_maintenance = AnswerCacheMaintenance(interval=settings.AI_CACHE_MAINTENANCE_INTERVAL)
@@ -0,0 +1,78 @@
+"""
+Webhook rejimi (aiohttp). Dispatcher TelegramMethod qaytarsa va u reply_timeout ichida
+tayyor bo'lsa, javob to'g'ridan-to'g'ri webhook javobida yuboriladi — Bot API'ga alohida
+so'rov kerak emas. Sekinroq handlerlar (AI) fonda davom etadi.
+
+Foydalanuvchining navbatida keyingi update kutib turgan bo'lsa, javobni UserSerialMiddleware
+tartibni saqlash uchun o'zi yuboradi; inline faqat navbati bo'sh foydalanuvchilar javoblari va
+tezkor "band" javoblari ketadi.
+"""
+import hashlib
+import hmac
+import time
+import warnings
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from django.conf import settings
+
+from bot.metrics import metrics
+
+# feed_webhook_update warns every time a handler outlives the inline window; that is expected here
+warnings.filterwarnings('ignore', message='Detected slow response into webhook', category=RuntimeWarning)
+
+
+def webhook_secret() -> str:
+    """WEBHOOK_SECRET yoki tokendan barqaror hosil qilingan maxfiy kalit (A-Z, a-z, 0-9)"""
+    return settings.WEBHOOK_SECRET or hashlib.sha256(settings.BOT_TOKEN.encode()).hexdigest()
+
+
+class InlineReplyRequestHandler(SimpleRequestHandler):
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, reply_timeout: float, **kwargs):
+        super().__init__(dispatcher, bot, handle_in_background=False, **kwargs)
+        self.reply_timeout = reply_timeout
+
+    async def _handle_request(self, bot: Bot, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        result = await self.dispatcher.feed_webhook_update(
+            bot,
+            await request.json(loads=bot.session.json_loads),
+            _timeout=self.reply_timeout,
+            **self.data,
+        )
+        metrics.inc('webhook.updates')
+        if result is not None:
+            metrics.inc('webhook.inline_replies')
+        metrics.set('webhook.last_ms', round((time.perf_counter() - started) * 1000, 1))
+        return web.Response(body=self._build_response_writer(bot=bot, result=result))
+
+
+def create_webhook_app(dp: Dispatcher, bot: Bot, *, path: str, secret: str | None,
+                       reply_timeout: float) -> web.Application:
+    app = web.Application()
+    # Dispatcher shutdown (webhook o'chirish, log flush) bot sessiyasi yopilishidan oldin ishlaydi
+    setup_application(app, dp, bot=bot)
+    InlineReplyRequestHandler(dp, bot, reply_timeout=reply_timeout, secret_token=secret).register(app, path=path)
+    return app
+
+
+def create_front_webhook_app(pool, *, path: str, secret: str | None) -> web.Application:
+    """
+    --workers rejimi: update xom JSON holida workerga uzatiladi va darhol bo'sh javob qaytariladi.
+    Workerlar navbati to'lgan bo'lsa 503 — Telegram updateni keyinroq qayta yuboradi.
+    """
+    async def handle(request: web.Request) -> web.Response:
+        token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if secret and not hmac.compare_digest(token, secret):
+            return web.Response(body="Unauthorized", status=401)
+        if pool.depth >= settings.BOT_WORKER_MAX_PENDING:
+            metrics.inc('webhook.rejected')
+            return web.Response(status=503)
+        pool.dispatch(await request.json())
+        metrics.inc('webhook.updates')
+        return web.json_response({})
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    return app
@@ -0,0 +1,290 @@
+"""
+Ko'p jarayonli bot: front jarayon updatelarni qabul qiladi (polling yoki webhook) va ularni
+from_user.id bo'yicha N ta worker jarayonga taqsimlaydi (multiprocessing navbatlari orqali).
+Bitta foydalanuvchining updatelari doim bitta workerga tushadi va u yerda ketma-ket bajariladi,
+shuning uchun tartib saqlanadi; turli foydalanuvchilar parallel ishlanadi.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from dataclasses import dataclass, field
+
+import aiohttp
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from django.conf import settings
+
+from bot.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+STOP = None  # navbatdagi to'xtash belgisi
+SEND_RATE = 'send_rate'  # boshqaruv xabari: (SEND_RATE, shu workerning global yuborish ulushi)
+
+
+def shard_key(update: dict) -> int:
+    """Update muallifi (from.id, bo'lmasa chat.id); topilmasa 0"""
+    for key, value in update.items():
+        if key == 'update_id' or not isinstance(value, dict):
+            continue
+        author = value.get('from') or value.get('chat')
+        if author:
+            return author['id']
+    return 0
+
+
+@dataclass
+class WorkerHandle:
+    index: int
+    updates: multiprocessing.Queue
+    process: multiprocessing.Process | None = None
+    dispatched: int = 0
+    processed: int = 0
+    errors: int = 0
+    restarts: int = 0
+    last_heartbeat: float = field(default_factory=time.monotonic)
+
+    @property
+    def depth(self) -> int:
+        return self.dispatched - self.processed
+
+
+class WorkerPool:
+    """Front jarayon tomoni: workerlarni ishga tushiradi, taqsimlaydi va holatini kuzatadi"""
+
+    def __init__(self, count: int, token: str, api_base: str | None = None, limit_sends: bool = True):
+        self.count = count
+        self.token = token
+        self.api_base = api_base
+        self.limit_sends = limit_sends
+        self._ctx = multiprocessing.get_context('spawn')  # every worker gets a fresh Django + event loop
+        # Telegram's global send limit is per bot, so each worker gets an equal share of it
+        self.send_rate = settings.SEND_GLOBAL_RATE / count
+        self._status = self._ctx.Queue()
+        self.workers = [WorkerHandle(index=i, updates=self._ctx.Queue()) for i in range(count)]
+        self._monitor_task = None
+
+    def start(self):
+        for worker in self.workers:
+            self._spawn(worker)
+        self._monitor_task = asyncio.create_task(self._monitor())
+
+    def _spawn(self, worker: WorkerHandle):
+        worker.process = self._ctx.Process(
+            target=worker_main,
+            args=(worker.index, self.send_rate, self.token, self.api_base, self.limit_sends,
+                  worker.updates, self._status),
+            name=f"bot-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.last_heartbeat = time.monotonic()
+
+    def set_send_rate(self, total: float):
+        """Workerlarning umumiy yuborish tezligi (xabar/soniya) teng bo'linadi; qayta tug'ilgan worker ham shuni oladi"""
+        self.send_rate = total / self.count
+        for worker in self.workers:
+            worker.updates.put((SEND_RATE, self.send_rate))
+
+    def dispatch(self, update: dict):
+        worker = self.workers[shard_key(update) % self.count]
+        worker.updates.put(update)
+        worker.dispatched += 1
+        metrics.inc('workers.dispatched')
+
+    @property
+    def depth(self) -> int:
+        return sum(worker.depth for worker in self.workers)
+
+    async def wait_capacity(self):
+        """Backpressure: workerlar navbati to'lib ketsa, yangi updatelarni olishni kutib turadi"""
+        while self.depth >= settings.BOT_WORKER_MAX_PENDING:
+            metrics.inc('workers.backpressure_waits')
+            await asyncio.sleep(0.05)
+
+    async def _monitor(self):
+        interval = settings.BOT_WORKER_HEARTBEAT_INTERVAL
+        while True:
+            await asyncio.sleep(interval / 2)
+            self._drain_status()
+            now = time.monotonic()
+            for worker in self.workers:
+                alive = worker.process.is_alive()
+                if not alive:
+                    logger.error(f"Worker {worker.index} to'xtadi (exit={worker.process.exitcode}), qayta ishga tushirilmoqda")
+                    # Updates still in its queue are picked up by the replacement; in-flight ones are lost
+                    worker.processed = worker.dispatched - _queued(worker)
+                    worker.restarts += 1
+                    metrics.inc('workers.restarts')
+                    self._spawn(worker)
+                prefix = f'workers.{worker.index}'
+                metrics.set(f'{prefix}.alive', int(alive))
+                metrics.set(f'{prefix}.depth', worker.depth)
+                metrics.set(f'{prefix}.processed', worker.processed)
+                metrics.set(f'{prefix}.heartbeat_age', round(now - worker.last_heartbeat, 1))
+            metrics.set('workers.depth', self.depth)
+
+    def _drain_status(self):
+        while True:
+            try:
+                index, processed, errors = self._status.get_nowait()
+            except queue.Empty:
+                return
+            # Workers report increments, so a restarted worker does not reset the totals
+            worker = self.workers[index]
+            worker.processed += processed
+            worker.errors += errors
+            worker.last_heartbeat = time.monotonic()
+
+    async def stop(self, timeout: float = 30):
+        """Har bir workerga to'xtash belgisini yuboradi va navbatni tugatishini kutadi"""
+        if self._monitor_task:
+            self._monitor_task.cancel()
+        for worker in self.workers:
+            worker.updates.put(STOP)
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            await asyncio.to_thread(worker.process.join, max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning(f"Worker {worker.index} o'z vaqtida to'xtamadi, majburan to'xtatilmoqda")
+                worker.process.terminate()
+        self._drain_status()
+
+
+def _queued(worker: WorkerHandle) -> int:
+    try:
+        return worker.updates.qsize()
+    except NotImplementedError:  # macOS
+        return worker.depth
+
+
+async def poll_updates(token: str, pool: WorkerPool, api_base: str | None = None, timeout: int = 30):
+    """
+    getUpdates'dan olingan xom JSON to'g'ridan-to'g'ri workerlarga uzatiladi —
+    front jarayon updatelarni aiogram modellariga aylantirmaydi.
+    """
+    from bot.app import ALLOWED_UPDATES
+
+    api = TelegramAPIServer.from_base(api_base) if api_base else PRODUCTION
+    url = api.api_url(token=token, method='getUpdates')
+    offset = 0
+    backoff = 1.0
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout + 10)) as session:
+        while True:
+            await pool.wait_capacity()
+            try:
+                async with session.post(url, json={
+                    'offset': offset, 'timeout': timeout, 'allowed_updates': ALLOWED_UPDATES,
+                }) as response:
+                    payload = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"getUpdates xatolik: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            if not payload.get('ok'):
+                retry_after = payload.get('parameters', {}).get('retry_after', backoff)
+                logger.error(f"getUpdates: {payload.get('description')}")
+                await asyncio.sleep(retry_after)
+                continue
+            backoff = 1.0
+            for update in payload['result']:
+                offset = update['update_id'] + 1
+                pool.dispatch(update)
+
+
+# --- worker jarayoni ---
+
+def worker_main(index: int, send_rate: float, token: str, api_base: str | None, limit_sends: bool,
+                updates, status):
+    # Shutdown is driven by the front process through the STOP sentinel
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    django.setup()
+    logging.basicConfig(level=logging.INFO, format=f'[worker {index}] %(levelname)s:%(name)s:%(message)s')
+    asyncio.run(_worker(index, send_rate, token, api_base, limit_sends, updates, status))
+
+
+async def _worker(index: int, send_rate: float, token: str, api_base: str | None, limit_sends: bool,
+                  updates, status):
+    from aiogram.methods import TelegramMethod
+    from asgiref.sync import sync_to_async
+
+    from bot.app import create_bot, create_dispatcher, report_metrics, watch_knowledge
+    from bot.knowledge_cache import knowledge_cache
+    from bot.ratelimit import SendLimiter
+
+    # Kept at hand so the front process can change this worker's share (SEND_RATE)
+    limiter = SendLimiter(global_rate=send_rate)
+    bot = create_bot(token, api_base, limit_sends=False)
+    if limit_sends:
+        bot.session.middleware(limiter)
+    dp = create_dispatcher()
+    await sync_to_async(knowledge_cache.refresh)(force=True)
+    await dp.emit_startup(bot=bot)
+    background = [asyncio.create_task(watch_knowledge()), asyncio.create_task(report_metrics())]
+
+    parent = os.getppid()
+    processed = errors = 0  # since the last heartbeat
+    tails: dict[int, asyncio.Task] = {}
+
+    async def process(update: dict, previous: asyncio.Task | None):
+        nonlocal processed, errors
+        if previous is not None:
+            await asyncio.wait([previous])  # same user: strictly after the previous update
+        try:
+            result = await dp.feed_raw_update(bot, update)
+            if isinstance(result, TelegramMethod):
+                await dp.silent_call_request(bot, result)
+        except Exception as e:
+            errors += 1
+            logger.exception(f"Update {update.get('update_id')} xatolik: {e}")
+        finally:
+            processed += 1
+
+    def forget(user_id: int, task: asyncio.Task):
+        if tails.get(user_id) is task:
+            del tails[user_id]
+
+    def report():
+        nonlocal processed, errors
+        status.put((index, processed, errors))
+        processed = errors = 0
+
+    async def heartbeat():
+        while True:
+            report()
+            if os.getppid() != parent:  # front process is gone
+                updates.put(STOP)
+                return
+            await asyncio.sleep(settings.BOT_WORKER_HEARTBEAT_INTERVAL / 2)
+
+    background.append(asyncio.create_task(heartbeat()))
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            update = await loop.run_in_executor(None, updates.get)
+            if update is STOP:
+                break
+            if isinstance(update, tuple):  # control message from the front process
+                kind, value = update
+                if kind == SEND_RATE:
+                    limiter.set_global_rate(value)
+                continue
+            user_id = shard_key(update)
+            task = asyncio.create_task(process(update, tails.get(user_id)))
+            tails[user_id] = task
+            task.add_done_callback(lambda t, user_id=user_id: forget(user_id, t))
+        if tails:
+            await asyncio.wait(list(tails.values()))
+    finally:
+        for task in background:
+            task.cancel()
+        report()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
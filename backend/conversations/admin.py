@@ -1,28 +1,68 @@
 from django.contrib import admin
-from .models import TelegramUser, Message, SystemStats
+from django.db.models import Q
+from .models import TelegramUser, Message, CounterShard, Broadcast
+from .search import matching_messages
 
 
 @admin.register(TelegramUser)
 class TelegramUserAdmin(admin.ModelAdmin):
     list_display = ['full_name', 'username', 'telegram_id', 'message_count', 'created_at', 'last_active']
+    list_filter = ['is_subscribed', 'is_blocked']
     search_fields = ['full_name', 'username', 'telegram_id']
-    readonly_fields = ['telegram_id', 'created_at', 'last_active']
+    readonly_fields = ['telegram_id', 'created_at', 'last_active', 'is_subscribed', 'subscription_updated_at']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_message_count('_message_count')
 
     def message_count(self, obj):
-        return obj.messages.count()
+        return obj._message_count
     message_count.short_description = "Xabarlar"
+    message_count.admin_order_field = '_message_count'
 
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
     list_display = ['user', 'role', 'text_short', 'topic', 'timestamp']
+    list_select_related = ['user', 'topic']
     list_filter = ['role', 'topic', 'timestamp']
     search_fields = ['text', 'user__full_name', 'user__username']
     readonly_fields = ['timestamp']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Message text goes through the full-text index instead of LIKE '%...%'
+        if not search_term:
+            return queryset, False
+        matched = matching_messages(Message.objects.all(), search_term).values('pk')
+        queryset = queryset.filter(
+            Q(pk__in=matched) | Q(user__full_name__icontains=search_term) | Q(user__username__icontains=search_term)
+        )
+        return queryset, False
+
+    def text_short(self, obj):
+        return obj.text[:80]
+    text_short.short_description = "Xabar"
+
+
+@admin.register(CounterShard)
+class CounterShardAdmin(admin.ModelAdmin):
+    list_display = ['name', 'shard', 'value']
+    list_filter = ['name']
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ['id', 'text_short', 'status', 'total', 'sent', 'failed', 'blocked', 'created_at', 'finished_at']
+    list_filter = ['status']
+    readonly_fields = [
+        'status', 'created_by', 'total', 'sent', 'failed', 'blocked', 'cursor', 'last_user_id', 'error',
+        'created_at', 'started_at', 'finished_at', 'heartbeat_at',
+    ]
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
     def text_short(self, obj):
         return obj.text[:80]
     text_short.short_description = "Xabar"
-@admin.register(SystemStats)
-class SystemStatsAdmin(admin.ModelAdmin):
-    list_display = ['total_messages']
@@ -0,0 +1,16 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class ConversationsConfig(AppConfig):
+    name = 'conversations'
+
+    def ready(self):
+        post_migrate.connect(ensure_search_index, sender=self)
+
+
+def ensure_search_index(using, **kwargs):
+    # SQLite drops FTS triggers whenever a migration rebuilds conversations_message
+    from django.db import connections
+    from .search import install_search_index
+    install_search_index(connections[using])
@@ -0,0 +1,50 @@
+import random
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from knowledge.models import Topic
+from .models import Message, TelegramUser
+
+BENCH_TELEGRAM_ID_BASE = 9_000_000_000
+
+
+def seed_messages(rows: int, users: int, days: int = 90, batch_size: int = 5000):
+    """Benchmark uchun sintetik foydalanuvchilar va xabarlar (tranzaksiya ichida chaqiring)"""
+    now = timezone.now()
+    TelegramUser.objects.bulk_create(
+        [TelegramUser(telegram_id=BENCH_TELEGRAM_ID_BASE + i, full_name=f"Bench {i}") for i in range(users)],
+        batch_size=batch_size,
+    )
+    user_ids = list(
+        TelegramUser.objects.filter(telegram_id__gte=BENCH_TELEGRAM_ID_BASE).values_list('id', flat=True)
+    )
+    topic_ids = list(Topic.objects.values_list('id', flat=True)) + [None] * 5
+    span = days * 86400
+
+    batch = []
+    for i in range(rows):
+        batch.append(Message(
+            user_id=random.choice(user_ids),
+            role='user' if i % 2 else 'bot',
+            text=f"Bench xabar {i} bolalar nafaqasi pasport",
+            topic_id=random.choice(topic_ids),
+            timestamp=now - timedelta(seconds=random.randrange(span)),
+        ))
+        if len(batch) >= batch_size:
+            Message.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Message.objects.bulk_create(batch)
+    return user_ids
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """fn ni repeat marta bajarib, eng yaxshi vaqtni millisekundda qaytaradi"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
@@ -0,0 +1,204 @@
+"""
+Xabarlar va foydalanuvchilarni CSV yoki JSONL ko'rinishida oqim bilan eksport qilish.
+
+Qatorlar values_list().iterator(chunk_size) bilan o'qiladi (PostgreSQL'da server-side cursor),
+EXPORT_FLUSH_BYTES hajmdagi bo'laklarga yig'ilib darhol yuboriladi; gzip so'ralsa, har bir
+bo'lak zlib bilan siqiladi. Shuning uchun xotira eksport qilinadigan qatorlar soniga bog'liq emas.
+"""
+import csv
+import io
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Message, TelegramUser
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+EXPORT_FLUSH_BYTES = 64 * 1024
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+class ExportError(ValueError):
+    """Noto'g'ri eksport parametri (API'da 400, buyruqda CommandError)"""
+
+
+@dataclass(frozen=True)
+class ExportSpec:
+    model: type
+    columns: dict  # column name → ORM path
+    date_field: str
+    filters: frozenset  # role/topic/user filters this kind accepts
+
+
+EXPORTS = {
+    'messages': ExportSpec(
+        model=Message,
+        columns={
+            'id': 'id',
+            'timestamp': 'timestamp',
+            'user_id': 'user_id',
+            'telegram_id': 'user__telegram_id',
+            'role': 'role',
+            'topic': 'topic__slug',
+            'text': 'text',
+        },
+        date_field='timestamp',
+        filters=frozenset({'role', 'topic', 'user'}),
+    ),
+    'users': ExportSpec(
+        model=TelegramUser,
+        columns={
+            'id': 'id',
+            'telegram_id': 'telegram_id',
+            'username': 'username',
+            'full_name': 'full_name',
+            'phone': 'phone',
+            'language_code': 'language_code',
+            'is_subscribed': 'is_subscribed',
+            'is_blocked': 'is_blocked',
+            'created_at': 'created_at',
+            'last_active': 'last_active',
+        },
+        date_field='created_at',
+        filters=frozenset({'user'}),
+    ),
+}
+
+
+def parse_filters(kind: str, params) -> dict:
+    """
+    So'rov parametrlari (from, to, role, topic, user) → ORM filtrlari.
+    from/to — sana (YYYY-MM-DD, to kuni ham kiradi) yoki ISO vaqt.
+    """
+    spec = EXPORTS[kind]
+    filters = {}
+
+    start = _parse_moment(params.get('from'), 'from')
+    if start is not None:
+        filters[f'{spec.date_field}__gte'] = start
+    end = _parse_moment(params.get('to'), 'to', end_of_day=True)
+    if end is not None:
+        filters[f'{spec.date_field}__lt'] = end
+
+    for name in ('role', 'topic', 'user'):
+        value = params.get(name)
+        if value in (None, ''):
+            continue
+        if name not in spec.filters:
+            raise ExportError(f"'{name}' filtri {kind} eksporti uchun mavjud emas")
+        if name == 'role':
+            roles = dict(Message.ROLE_CHOICES)
+            if value not in roles:
+                raise ExportError(f"role: {', '.join(roles)} dan biri bo'lishi kerak")
+            filters['role'] = value
+        elif name == 'topic':
+            # Numeric value is the topic id, anything else its slug
+            filters['topic_id' if str(value).isdigit() else 'topic__slug'] = value
+        else:
+            if not str(value).isdigit():
+                raise ExportError("user: foydalanuvchi id raqami bo'lishi kerak")
+            filters['user_id' if kind == 'messages' else 'pk'] = int(value)
+    return filters
+
+
+def _parse_moment(value, name: str, end_of_day: bool = False) -> datetime | None:
+    if value in (None, ''):
+        return None
+    try:
+        # Date-only first: parse_datetime also accepts "YYYY-MM-DD" (as midnight)
+        day = parse_date(value)
+        moment = None if day else parse_datetime(value)
+    except ValueError:  # well-formed but impossible, e.g. 2026-02-30 or T25:00
+        day = moment = None
+    if day is not None:
+        if end_of_day:
+            day += timedelta(days=1)
+        return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+    if moment is None:
+        raise ExportError(f"{name}: YYYY-MM-DD yoki ISO vaqt bo'lishi kerak")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def export_rows(kind: str, filters: dict) -> Iterator[tuple]:
+    spec = EXPORTS[kind]
+    queryset = (
+        spec.model.objects.filter(**filters)
+        .order_by(spec.date_field, 'pk')
+        .values_list(*spec.columns.values())
+    )
+    return queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def render(rows: Iterable[tuple], columns: list[str], fmt: str) -> Iterator[str]:
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+
+        def write(row):
+            writer.writerow([_csv_cell(value) for value in row])
+    else:
+        def write(row):
+            buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False, default=_text))
+            buffer.write('\n')
+
+    for row in rows:
+        write(row)
+        if buffer.tell() >= EXPORT_FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _text(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return '' if value is None else value
+
+
+def _csv_cell(value):
+    value = _text(value)
+    # Spreadsheets run cells starting with these as formulas (user text like =HYPERLINK(...))
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes the gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_export(kind: str, params, fmt: str = 'csv', compress: bool = False) -> Iterator[bytes]:
+    """
+    Parametrlar shu yerda tekshiriladi (ExportError), qatorlar esa faqat oqim o'qilganda olinadi.
+    """
+    if kind not in EXPORTS:
+        raise ExportError(f"Noma'lum eksport turi: {kind}")
+    if fmt not in FORMATS:
+        raise ExportError(f"fmt: {', '.join(FORMATS)} dan biri bo'lishi kerak")
+    filters = parse_filters(kind, params)
+    columns = list(EXPORTS[kind].columns)
+    chunks = (text.encode() for text in render(export_rows(kind, filters), columns, fmt))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_filename(kind: str, fmt: str, compress: bool) -> str:
+    return f"{kind}-{timezone.localdate():%Y%m%d}.{fmt}{'.gz' if compress else ''}"
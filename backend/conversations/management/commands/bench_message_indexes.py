@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from conversations.benchmarks import seed_messages, timed
+from conversations.models import Message
+
+
+class Command(BaseCommand):
+    help = (
+        "Message indekslarini tekshiradi: katta jadvalni seed qilib, asosiy so'rovlarning "
+        "query plan va vaqtini indekslarsiz va indekslar bilan chiqaradi. Hammasi rollback qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200_000)
+        parser.add_argument('--users', type=int, default=2_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['rows']} messages...")
+            user_ids = seed_messages(options['rows'], options['users'])
+            queries = self._queries(user_ids[len(user_ids) // 2])
+            indexes = Message._meta.indexes
+
+            # Raw DDL instead of `with schema_editor()`: SQLite refuses the
+            # editor context inside an open transaction
+            editor = connection.schema_editor(collect_sql=True)
+            editor.deferred_sql = []
+            self._execute(index.remove_sql(Message, editor) for index in indexes)
+            self._analyze()
+            self._run("WITHOUT indexes", queries, options['repeat'])
+
+            self._execute(index.create_sql(Message, editor) for index in indexes)
+            self._analyze()
+            self._run("WITH indexes", queries, options['repeat'])
+
+            transaction.set_rollback(True)
+
+    def _queries(self, user_id):
+        now = timezone.now()
+        return {
+            'messages by user (MessageViewSet ?user=)': lambda: Message.objects.filter(user_id=user_id).order_by('-timestamp')[:10],
+            'latest messages page (MessageViewSet)': lambda: Message.objects.order_by('-timestamp')[:10],
+            'user messages last 7d (stats daily)': lambda: Message.objects.filter(
+                role='user', timestamp__gte=now - timedelta(days=7)).values('id'),
+            'top topics last 30d (stats)': lambda: Message.objects.filter(
+                topic__isnull=False, timestamp__gte=now - timedelta(days=30),
+            ).values('topic_id').annotate(count=Count('id')).order_by('-count')[:5],
+        }
+
+    def _run(self, title, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== {title}"))
+        for label, build in queries.items():
+            elapsed = timed(lambda: list(build()), repeat)
+            self.stdout.write(self.style.SUCCESS(f"\n{label}: {elapsed:.2f} ms"))
+            self.stdout.write(build().explain())
+
+    def _execute(self, statements):
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(str(statement))
+
+    def _analyze(self):
+        self._execute(['ANALYZE'])
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from conversations.benchmarks import seed_messages, timed
+from conversations.models import Message, TelegramUser
+from conversations.pagination import encode_cursor
+from conversations.views import MessageViewSet, TelegramUserViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "/api/messages/ va /api/users/ sahifalashini o'lchaydi: sahifa raqami (COUNT + OFFSET) va "
+        "keyset (cursor) rejimlarida turli chuqurlikdagi sahifalar vaqti. Hammasi rollback qilinadi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Xabarlar soni")
+        parser.add_argument('--users', type=int, default=100_000, help="Foydalanuvchilar soni")
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f"Seeding {options['rows']} messages, {options['users']} users...")
+            seed_messages(options['rows'], options['users'])
+            if connection.vendor in ('sqlite', 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            admin = User.objects.create(username='bench-pagination')
+
+            endpoints = [
+                ('messages', MessageViewSet, Message.objects.all(), 'timestamp'),
+                ('users', TelegramUserViewSet, TelegramUser.objects.all(), 'created_at'),
+            ]
+            for name, viewset, queryset, field in endpoints:
+                self._bench(name, viewset, queryset, field, admin, options)
+
+            transaction.set_rollback(True)
+
+    def _bench(self, name, viewset, queryset, field, admin, options):
+        page_size = options['page_size']
+        total = queryset.count()
+        last_page = max(1, (total + page_size - 1) // page_size)
+        depths = sorted({page for page in (1, 10, 100, 1_000, 10_000, last_page) if page <= last_page})
+        view = viewset.as_view({'get': 'list'})
+        factory = APIRequestFactory()
+
+        def get(params: dict):
+            request = factory.get(f'/api/{name}/', {'page_size': page_size, **params})
+            force_authenticate(request, user=admin)
+            response = view(request)
+            assert response.status_code == 200, response.data
+            return response
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n=== /api/{name}/ ({total} rows, page_size={page_size})"))
+        for page in depths:
+            page_ms = timed(lambda: get({'page': page}), options['repeat'])
+            cursor = self._cursor_before(queryset, field, (page - 1) * page_size)
+            params = {'cursor': cursor} if cursor else {'pagination': 'cursor'}
+            keyset_ms = timed(lambda: get(params), options['repeat'])
+            self.stdout.write(
+                f"page {page:>6}: page-number {page_ms:9.1f} ms   keyset {keyset_ms:7.1f} ms"
+            )
+
+    def _cursor_before(self, queryset, field: str, offset: int) -> str | None:
+        """offset-qatordan oldingi qatorga ishora qiluvchi cursor (o'lchovga kirmaydi)"""
+        if offset == 0:
+            return None
+        value, pk = (queryset.filter(**{f'{field}__isnull': False})
+                     .order_by(f'-{field}', '-pk').values_list(field, 'pk')[offset - 1])
+        return encode_cursor(value, pk)
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from conversations.export import EXPORTS, FORMATS, ExportError, stream_export
+
+
+class Command(BaseCommand):
+    help = "Xabarlar yoki foydalanuvchilarni CSV/JSONL ko'rinishida oqim bilan eksport qiladi (/api/*/export/ bilan bir xil)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(EXPORTS))
+        parser.add_argument('--fmt', choices=list(FORMATS), default='csv')
+        parser.add_argument('--from', dest='from', help="Boshlanish sanasi (YYYY-MM-DD yoki ISO vaqt)")
+        parser.add_argument('--to', help="Tugash sanasi (shu kun ham kiradi)")
+        parser.add_argument('--role', help="Faqat shu rol (user/bot), messages uchun")
+        parser.add_argument('--topic', help="Mavzu id yoki slug, messages uchun")
+        parser.add_argument('--user', help="Foydalanuvchi id")
+        parser.add_argument('--gzip', action='store_true', help="gzip bilan siqish")
+        parser.add_argument('--output', '-o', default='-', help="Fayl yo'li ('-' — stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            chunks = stream_export(options['kind'], options, options['fmt'], options['gzip'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        written = 0
+        out = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+        finally:
+            if out is not sys.stdout.buffer:
+                out.close()
+            else:
+                out.flush()
+        if options['output'] != '-':
+            self.stdout.write(self.style.SUCCESS(f"Yozildi: {written} bayt → {options['output']}"))
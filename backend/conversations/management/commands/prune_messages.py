@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from conversations.retention import RetentionEngine
+
+
+class Command(BaseCommand):
+    help = "Xabarlarni saqlash siyosati bo'yicha arxivlab o'chiradi (sozlamalar settings.RETENTION_*)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-days', type=int, help="Shundan eski xabarlarni o'chirish")
+        parser.add_argument('--max-total', type=int, help="Jami eng yangi N ta xabarni saqlash")
+        parser.add_argument('--max-per-user', type=int, help="Har bir foydalanuvchi uchun eng yangi N ta xabar")
+        parser.add_argument('--chunk-size', type=int, help="Bitta DELETE dagi qatorlar soni")
+        parser.add_argument('--archive-dir', help="Arxiv papkasi")
+        parser.add_argument('--no-archive', action='store_true', help="Arxivlamasdan o'chirish")
+        parser.add_argument('--dry-run', action='store_true', help="Faqat nechta qator o'chishini ko'rsatish")
+
+    def handle(self, *args, **options):
+        overrides = {
+            key: options[key]
+            for key in ('max_age_days', 'max_total', 'max_per_user', 'chunk_size', 'archive_dir')
+            if options[key] is not None
+        }
+        if options['no_archive']:
+            overrides['archive_dir'] = None
+        engine = RetentionEngine.from_settings(**overrides)
+
+        if options['dry_run']:
+            self.stdout.write(f"O'chiriladi: {engine.estimate()} ta xabar (dry-run)")
+            return
+
+        result = engine.run()
+        self.stdout.write(self.style.SUCCESS(f"Arxivlandi: {result.archived}, o'chirildi: {result.deleted}"))
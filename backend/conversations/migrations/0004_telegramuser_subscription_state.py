@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0003_systemstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramuser',
+            name='is_subscribed',
+            field=models.BooleanField(blank=True, null=True, verbose_name='Kanalga obuna'),
+        ),
+        migrations.AddField(
+            model_name='telegramuser',
+            name='subscription_updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Obuna holati yangilangan'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:57
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0004_telegramuser_subscription_state'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='message',
+            name='timestamp',
+            field=models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True, verbose_name='Vaqt'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.2 on 2026-10-18 10:58
+
+from django.db import migrations, models
+
+
+def copy_system_stats(apps, schema_editor):
+    SystemStats = apps.get_model('conversations', 'SystemStats')
+    CounterShard = apps.get_model('conversations', 'CounterShard')
+    Message = apps.get_model('conversations', 'Message')
+    stats = SystemStats.objects.filter(id=1).first()
+    total = stats.total_messages if stats and stats.total_messages else Message.objects.count()
+    if total:
+        CounterShard.objects.create(name='total_messages', shard=0, value=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0005_message_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Nomi')),
+                ('shard', models.PositiveSmallIntegerField(default=0, verbose_name='Shard')),
+                ('value', models.BigIntegerField(default=0, verbose_name='Qiymat')),
+            ],
+            options={
+                'verbose_name': 'Hisoblagich',
+                'verbose_name_plural': 'Hisoblagichlar',
+            },
+        ),
+        migrations.RunPython(copy_system_stats, migrations.RunPython.noop),
+        migrations.DeleteModel(
+            name='SystemStats',
+        ),
+        migrations.AddConstraint(
+            model_name='countershard',
+            constraint=models.UniqueConstraint(fields=('name', 'shard'), name='unique_counter_shard'),
+        ),
+    ]
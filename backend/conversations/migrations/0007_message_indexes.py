@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0006_countershard'),
+        ('knowledge', '0002_alter_faq_created_at_alter_faq_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['-timestamp'], name='message_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['user', '-timestamp'], name='message_user_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['topic', 'timestamp'], name='message_topic_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('role', 'user')), fields=['timestamp'], name='message_user_role_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='telegramuser',
+            index=models.Index(fields=['-created_at'], name='tguser_created_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:05
+
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from conversations.search import install_search_index
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    from conversations.search import uninstall_search_index
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0007_message_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0008_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramuser',
+            name='is_blocked',
+            field=models.BooleanField(default=False, verbose_name='Botni bloklagan'),
+        ),
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField(verbose_name='Xabar matni (HTML)')),
+                ('status', models.CharField(choices=[('pending', 'Navbatda'), ('running', 'Yuborilmoqda'), ('done', 'Tugadi'), ('cancelled', 'Bekor qilindi'), ('failed', 'Xatolik')], db_index=True, default='pending', max_length=10, verbose_name='Holat')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Qabul qiluvchilar')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Yuborildi')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Xatolik')),
+                ('blocked', models.PositiveIntegerField(default=0, verbose_name='Bloklagan')),
+                ('cursor', models.BigIntegerField(default=0, verbose_name='Oxirgi ishlangan foydalanuvchi ID')),
+                ('last_user_id', models.BigIntegerField(blank=True, null=True, verbose_name='Qabul qiluvchilar chegarasi (ID)')),
+                ('error', models.TextField(blank=True, verbose_name='Xatolik matni')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Yaratilgan')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Boshlangan')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Tugagan')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Oxirgi faollik')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Yaratgan')),
+            ],
+            options={
+                'verbose_name': "E'lon",
+                'verbose_name_plural': "E'lonlar",
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Yuborilmoqda'), ('sent', 'Yuborildi'), ('failed', 'Xatolik'), ('blocked', 'Bloklagan')], default='pending', max_length=10, verbose_name='Holat')),
+                ('error', models.CharField(blank=True, max_length=300, verbose_name='Xatolik')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan')),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='conversations.broadcast', verbose_name="E'lon")),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='conversations.telegramuser', verbose_name='Foydalanuvchi')),
+            ],
+            options={
+                'verbose_name': 'Yetkazish',
+                'verbose_name_plural': 'Yetkazishlar',
+                'indexes': [models.Index(fields=['broadcast', 'status'], name='delivery_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('broadcast', 'user'), name='unique_broadcast_delivery')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('conversations', '0009_broadcast'),
+        ('knowledge', '0004_knowledgeversion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='message',
+            name='message_ts_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='telegramuser',
+            name='tguser_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['-timestamp', '-id'], name='message_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='telegramuser',
+            index=models.Index(fields=['-created_at', '-id'], name='tguser_created_id_idx'),
+        ),
+    ]
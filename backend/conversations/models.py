@@ -1,4 +1,21 @@
-from django.db import models
+import random
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, connections, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class TelegramUserQuerySet(models.QuerySet):
+    def with_message_count(self, name: str = 'message_count'):
+        """Xabarlar soni: JOIN + GROUP BY o'rniga korrelyatsion subquery — faqat olingan qatorlar sanaladi"""
+        return self.annotate(**{name: Coalesce(Subquery(
+            Message.objects.filter(user=OuterRef('pk')).order_by().values('user')
+            .annotate(count=Count('pk')).values('count')
+        ), 0)})
 
 
 class TelegramUser(models.Model):
@@ -9,25 +26,102 @@ class TelegramUser(models.Model):
     language_code = models.CharField(max_length=10, default='uz', verbose_name="Til")
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True, verbose_name="Ro'yxatdan o'tgan")
     last_active = models.DateTimeField(auto_now=True, null=True, blank=True, verbose_name="Oxirgi faollik")
+    is_subscribed = models.BooleanField(null=True, blank=True, verbose_name="Kanalga obuna")
+    subscription_updated_at = models.DateTimeField(null=True, blank=True, verbose_name="Obuna holati yangilangan")
+    is_blocked = models.BooleanField(default=False, verbose_name="Botni bloklagan")
+
+    objects = TelegramUserQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Telegram foydalanuvchi"
         verbose_name_plural = "Telegram foydalanuvchilar"
         ordering = ['-created_at']
+        indexes = [
+            # Default ordering and keyset pages of /api/users/ on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='tguser_created_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.full_name or self.username or str(self.telegram_id)}"
 
 
-class SystemStats(models.Model):
-    total_messages = models.PositiveBigIntegerField(default=0, verbose_name="Jami murojaatlar")
+TOTAL_MESSAGES = 'total_messages'
+# Dashboard stats are cached for STATS_CACHE_TTL under the current STATS_VERSION_KEY.
+# Counter writes bump the version once per committed transaction (not per message),
+# after the commit, so a cache outage cannot roll back a message batch
+STATS_CACHE_KEY = 'conversations:stats'
+STATS_VERSION_KEY = 'conversations:stats:version'
+
+
+def bump_stats_version(using: str | None = None):
+    """Commit bo'lgach dashboard keshini eskirgan deb belgilaydi; bitta tranzaksiya — bitta yozuv"""
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    # Same coalescing as knowledge.signals.bump_version: only the first callback of a commit writes
+    generation = getattr(connection, 'stats_version_generation', 0)
+
+    def bump():
+        if getattr(connection, 'stats_version_generation', 0) != generation:
+            return
+        connection.stats_version_generation = generation + 1
+        cache.set(STATS_VERSION_KEY, uuid.uuid4().hex, None)
+
+    # robust: a failing cache is logged instead of raised into the writer
+    transaction.on_commit(bump, using=using, robust=True)
+
+
+class CounterManager(models.Manager):
+    def increment(self, name: str, amount: int = 1):
+        """Tasodifiy shard qatorini atomar oshiradi (read-modify-write yo'q)"""
+        if not amount:
+            return
+        shard = random.randrange(settings.COUNTER_SHARDS)
+        bump_stats_version(self.db)
+        if self.filter(name=name, shard=shard).update(value=F('value') + amount):
+            return
+        try:
+            with transaction.atomic():
+                self.create(name=name, shard=shard, value=amount)
+        except IntegrityError:
+            # Another writer created the shard first
+            self.filter(name=name, shard=shard).update(value=F('value') + amount)
+
+    def total(self, name: str) -> int:
+        """Barcha shardlar yig'indisi — bitta so'rov"""
+        return self.filter(name=name).aggregate(total=Sum('value'))['total'] or 0
+
+
+class CounterShard(models.Model):
+    """
+    Shardlangan hisoblagich: bitta nom bir nechta qatorga bo'lingan,
+    qiymat o'qilganda yig'iladi. Issiq bitta qator uchun raqobat bo'lmaydi.
+    """
+    name = models.CharField(max_length=50, verbose_name="Nomi")
+    shard = models.PositiveSmallIntegerField(default=0, verbose_name="Shard")
+    value = models.BigIntegerField(default=0, verbose_name="Qiymat")
+
+    objects = CounterManager()
 
     class Meta:
-        verbose_name = "Tizim statistikasi"
-        verbose_name_plural = "Tizim statistikasi"
+        verbose_name = "Hisoblagich"
+        verbose_name_plural = "Hisoblagichlar"
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'shard'], name='unique_counter_shard'),
+        ]
 
     def __str__(self):
-        return f"Statistika: {self.total_messages}"
+        return f"{self.name}[{self.shard}]: {self.value}"
+
+
+class MessageQuerySet(models.QuerySet):
+    def bulk_create(self, objs, batch_size=None, ignore_conflicts=False, update_conflicts=False, **kwargs):
+        # save() chetlab o'tiladi, shuning uchun hisoblagichni shu yerda oshiramiz
+        if ignore_conflicts or update_conflicts:
+            # Skipped or updated rows are indistinguishable from inserted ones, so the count would drift
+            raise ValueError("Message.bulk_create: ignore_conflicts/update_conflicts qo'llab-quvvatlanmaydi")
+        created = super().bulk_create(objs, batch_size=batch_size, **kwargs)
+        CounterShard.objects.increment(TOTAL_MESSAGES, len(created))
+        return created
 
 
 class Message(models.Model):
@@ -42,12 +136,24 @@ class Message(models.Model):
         'knowledge.Topic', on_delete=models.SET_NULL,
         null=True, blank=True, related_name='messages', verbose_name="Mavzu"
     )
-    timestamp = models.DateTimeField(auto_now_add=True, null=True, blank=True, verbose_name="Vaqt")
+    timestamp = models.DateTimeField(default=timezone.now, null=True, blank=True, verbose_name="Vaqt")
+
+    objects = MessageQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Xabar"
         verbose_name_plural = "Xabarlar"
         ordering = ['-timestamp']
+        indexes = [
+            # stats_view date ranges, MessageViewSet default ordering and keyset pages on (timestamp, id)
+            models.Index(fields=['-timestamp', '-id'], name='message_ts_id_idx'),
+            # MessageViewSet ?user= filter ordered by newest
+            models.Index(fields=['user', '-timestamp'], name='message_user_ts_idx'),
+            # Top topics over the last 30 days
+            models.Index(fields=['topic', 'timestamp'], name='message_topic_ts_idx'),
+            # Daily chart only counts user questions
+            models.Index(fields=['timestamp'], condition=Q(role='user'), name='message_user_role_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user} [{self.role}]: {self.text[:60]}"
@@ -57,13 +163,91 @@ class Message(models.Model):
         super().save(*args, **kwargs)
 
         if is_new:
-            # 1. Update persistent stats (Dashboard count)
-            stats, _ = SystemStats.objects.get_or_create(id=1)
-            stats.total_messages += 1
-            stats.save()
-
-            # 2. Check message cap (200 limit)
-            # If more than 200 messages exist, delete all except the latest one or follow "start fresh" logic
-            if Message.objects.count() > 200:
-                # Delete all other messages
-                Message.objects.exclude(id=self.id).delete()
+            # Update persistent stats (Dashboard count).
+            # Message cap is enforced outside the request path by conversations.retention
+            CounterShard.objects.increment(TOTAL_MESSAGES)
+
+
+class Broadcast(models.Model):
+    """
+    Barcha foydalanuvchilarga e'lon yuborish vazifasi.
+    Holat va hisoblagichlar har bir bo'lakdan keyin yangilanadi (jonli progress);
+    cursor — oxirgi ishlangan TelegramUser.id, qayta ishga tushganda shundan davom etiladi.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    CANCELLED = 'cancelled'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Navbatda'),
+        (RUNNING, 'Yuborilmoqda'),
+        (DONE, 'Tugadi'),
+        (CANCELLED, 'Bekor qilindi'),
+        (FAILED, 'Xatolik'),
+    ]
+
+    text = models.TextField(verbose_name="Xabar matni (HTML)")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True, verbose_name="Holat")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Yaratgan",
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name="Qabul qiluvchilar")
+    sent = models.PositiveIntegerField(default=0, verbose_name="Yuborildi")
+    failed = models.PositiveIntegerField(default=0, verbose_name="Xatolik")
+    blocked = models.PositiveIntegerField(default=0, verbose_name="Bloklagan")
+    cursor = models.BigIntegerField(default=0, verbose_name="Oxirgi ishlangan foydalanuvchi ID")
+    last_user_id = models.BigIntegerField(null=True, blank=True, verbose_name="Qabul qiluvchilar chegarasi (ID)")
+    error = models.TextField(blank=True, verbose_name="Xatolik matni")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Boshlangan")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Tugagan")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi faollik")
+
+    class Meta:
+        verbose_name = "E'lon"
+        verbose_name_plural = "E'lonlar"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"#{self.pk} {self.text[:50]}"
+
+    @property
+    def processed(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+
+class BroadcastDelivery(models.Model):
+    """
+    Bitta qabul qiluvchiga yetkazish holati. Qator yuborishdan OLDIN (pending) yoziladi:
+    jarayon yiqilsa, pending qatorlar qayta yuborilmaydi — takroriy xabar bo'lmaydi.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    BLOCKED = 'blocked'
+    STATUS_CHOICES = [
+        (PENDING, 'Yuborilmoqda'),
+        (SENT, 'Yuborildi'),
+        (FAILED, 'Xatolik'),
+        (BLOCKED, 'Bloklagan'),
+    ]
+
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='deliveries', verbose_name="E'lon")
+    user = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='deliveries', verbose_name="Foydalanuvchi")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name="Holat")
+    error = models.CharField(max_length=300, blank=True, verbose_name="Xatolik")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Yetkazish"
+        verbose_name_plural = "Yetkazishlar"
+        constraints = [
+            models.UniqueConstraint(fields=['broadcast', 'user'], name='unique_broadcast_delivery'),
+        ]
+        indexes = [
+            models.Index(fields=['broadcast', 'status'], name='delivery_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.broadcast_id} → {self.user_id}: {self.status}"
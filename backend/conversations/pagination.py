@@ -0,0 +1,156 @@
+"""
+API sahifalash.
+
+Standart rejim — sahifa raqami (?page=N, jami soni bilan), moslik uchun saqlangan.
+?cursor=... yoki ?pagination=cursor bilan keyset rejimi yoqiladi: sahifa (maydon, id) juftligidan
+keyin keladigan qatorlar sifatida olinadi, shuning uchun COUNT(*) va OFFSET yo'q — chuqur
+sahifalar ham birinchi sahifa kabi tez. Keyset rejimida tartib doim vaqt bo'yicha (yangidan eskiga).
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def page_size_from(request, default: int) -> int:
+    """?page_size=N, API_MAX_PAGE_SIZE bilan cheklangan"""
+    try:
+        size = int(request.query_params['page_size'])
+    except (KeyError, ValueError):
+        return default
+    return min(size, settings.API_MAX_PAGE_SIZE) if size > 0 else default
+
+
+def encode_cursor(value, pk: int, reverse: bool = False) -> str:
+    payload = [value.isoformat() if isinstance(value, datetime) else value, pk, int(reverse)]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple[tuple, bool]:
+    """((qiymat, id), reverse); buzilgan cursor uchun ValueError"""
+    try:
+        value, pk, reverse = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except TypeError:
+        raise ValueError(token)
+    # Only values produced by encode_cursor: an aware ISO datetime string and an integer id
+    if not isinstance(value, str) or not isinstance(pk, int) or isinstance(pk, bool):
+        raise ValueError(token)
+    parsed = parse_datetime(value)
+    if parsed is None or timezone.is_naive(parsed):
+        raise ValueError(token)
+    return (parsed, pk), bool(reverse)
+
+
+class SizedPageNumberPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+
+
+class KeysetPagination(BasePagination):
+    """
+    (field, id) bo'yicha kamayish tartibida keyset sahifalash.
+    Cursor — oxirgi ko'rilgan qatorning (qiymat, id) juftligi va yo'nalish (base64 JSON).
+    field NULL bo'lgan qatorlar bu rejimda chiqmaydi.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = "Noto'g'ri cursor"
+
+    def __init__(self, field: str):
+        self.field = field
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = page_size_from(request, settings.REST_FRAMEWORK['PAGE_SIZE'])
+        position, reverse = self._decode(request.query_params.get(self.cursor_query_param))
+        field = self.field
+
+        queryset = queryset.filter(**{f'{field}__isnull': False})
+        if position is None:
+            queryset = queryset.order_by(f'-{field}', '-pk')
+        else:
+            value, pk = position
+            # The redundant <=/>= bound lets the database range-scan the (field, id) index
+            if reverse:
+                queryset = queryset.filter(**{f'{field}__gte': value}).filter(
+                    Q(**{f'{field}__gt': value}) | Q(pk__gt=pk)).order_by(field, 'pk')
+            else:
+                queryset = queryset.filter(**{f'{field}__lte': value}).filter(
+                    Q(**{f'{field}__lt': value}) | Q(pk__lt=pk)).order_by(f'-{field}', '-pk')
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def _link(self, row, reverse: bool) -> str:
+        token = encode_cursor(getattr(row, self.field), row.pk, reverse)
+        url = remove_query_param(self.request.build_absolute_uri(), 'page')
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def _decode(self, token: str | None):
+        if not token:
+            return None, False
+        try:
+            return decode_cursor(token)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+
+class KeysetPaginationMixin:
+    """
+    ViewSet uchun: ?cursor= yoki ?pagination=cursor bo'lsa keyset, aks holda sahifa raqami.
+    keyset_field — tartib maydoni (id bilan birga ishlatiladi).
+    """
+    keyset_field = None
+    pagination_class = SizedPageNumberPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if 'cursor' in params or params.get('pagination') == 'cursor':
+                self._paginator = KeysetPagination(self.keyset_field)
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
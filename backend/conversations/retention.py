@@ -0,0 +1,149 @@
+import gzip
+import json
+import os
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Message
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'user__telegram_id', 'role', 'text', 'topic_id', 'timestamp']
+
+
+@dataclass
+class RetentionResult:
+    archived: int = 0
+    deleted: int = 0
+
+    def __str__(self):
+        return f"archived={self.archived} deleted={self.deleted}"
+
+
+class RetentionEngine:
+    """
+    Xabarlar jadvalini saqlash siyosati bo'yicha tozalaydi:
+    - max_age_days: shundan eski xabarlar
+    - max_per_user: har bir foydalanuvchi uchun eng yangi N tadan ortig'i
+    - max_total: jami eng yangi N tadan ortig'i
+    O'chirish chunk_size bo'laklarda bajariladi; archive_dir berilsa, qatorlar
+    sana bo'yicha bo'lingan .jsonl.gz fayllarga yoziladi. Har bir bo'lakning DELETE'i va
+    arxivga yozilishi bitta tranzaksiyada: biri muvaffaqiyatsiz bo'lsa, ikkinchisi ham
+    bekor qilinadi (fayl avvalgi hajmiga qaytariladi).
+    """
+
+    def __init__(self, max_age_days=None, max_total=None, max_per_user=None,
+                 chunk_size=1000, archive_dir=None):
+        self.max_age_days = max_age_days
+        self.max_total = max_total
+        self.max_per_user = max_per_user
+        self.chunk_size = chunk_size
+        self.archive_dir = Path(archive_dir) if archive_dir else None
+        self.run_id = f"{timezone.now():%Y%m%dT%H%M%S}-{os.getpid()}"
+
+    @classmethod
+    def from_settings(cls, **overrides):
+        options = {
+            'max_age_days': settings.RETENTION_MAX_AGE_DAYS,
+            'max_total': settings.RETENTION_MAX_TOTAL,
+            'max_per_user': settings.RETENTION_MAX_PER_USER,
+            'chunk_size': settings.RETENTION_CHUNK_SIZE,
+            'archive_dir': settings.RETENTION_ARCHIVE_DIR,
+        }
+        options.update(overrides)
+        return cls(**options)
+
+    def run(self) -> RetentionResult:
+        result = RetentionResult()
+
+        if self.max_age_days:
+            cutoff = timezone.now() - timedelta(days=self.max_age_days)
+            self._purge(Message.objects.filter(timestamp__lt=cutoff), None, result)
+
+        if self.max_per_user:
+            over_cap = (
+                Message.objects.values('user_id')
+                .annotate(total=Count('id'))
+                .filter(total__gt=self.max_per_user)
+                .values_list('user_id', 'total')
+            )
+            for user_id, total in list(over_cap):
+                self._purge(Message.objects.filter(user_id=user_id), total - self.max_per_user, result)
+
+        if self.max_total:
+            excess = Message.objects.count() - self.max_total
+            if excess > 0:
+                self._purge(Message.objects.all(), excess, result)
+
+        return result
+
+    def estimate(self) -> int:
+        """Dry-run: hech narsani o'chirmasdan, o'chiriladigan qatorlar sonini hisoblaydi"""
+        remaining = Message.objects.all()
+        count = 0
+        if self.max_age_days:
+            cutoff = timezone.now() - timedelta(days=self.max_age_days)
+            count += remaining.filter(timestamp__lt=cutoff).count()
+            remaining = remaining.exclude(timestamp__lt=cutoff)
+        if self.max_per_user:
+            totals = remaining.values('user_id').annotate(total=Count('id')).filter(total__gt=self.max_per_user)
+            count += sum(row['total'] - self.max_per_user for row in totals)
+        if self.max_total:
+            count += max(0, Message.objects.count() - count - self.max_total)
+        return count
+
+    def _purge(self, queryset, limit, result: RetentionResult):
+        """Eng eski qatorlardan boshlab limit tagacha (None — hammasi) bo'laklab o'chiradi"""
+        queryset = queryset.order_by('timestamp', 'id')
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+            rows = list(queryset.values(*ARCHIVE_FIELDS)[:size])
+            if not rows:
+                break
+            appended = []
+            try:
+                with transaction.atomic():
+                    deleted, _ = Message.objects.filter(id__in=[row['id'] for row in rows]).delete()
+                    # Written last: a failed archive rolls the DELETE back, a failed DELETE never archives
+                    if self.archive_dir:
+                        self._archive(rows, appended)
+            except BaseException:
+                self._unarchive(appended)
+                raise
+            if self.archive_dir:
+                result.archived += len(rows)
+            result.deleted += deleted
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def _archive(self, rows, appended: list):
+        """appended'ga (fayl, avvalgi hajmi yoki None) yoziladi — _unarchive uchun"""
+        partitions = {}
+        for row in rows:
+            ts = row['timestamp']
+            key = timezone.localtime(ts).strftime('%Y/%m/%d') if ts else 'undated'
+            partitions.setdefault(key, []).append(row)
+
+        for key, partition in partitions.items():
+            directory = self.archive_dir / key
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"messages-{self.run_id}.jsonl.gz"
+            appended.append((path, path.stat().st_size if path.exists() else None))
+            # Each chunk is appended as a new gzip member; readers see one stream
+            with gzip.open(path, 'at', encoding='utf-8') as fh:
+                for row in partition:
+                    fh.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+    @staticmethod
+    def _unarchive(appended: list):
+        """Muvaffaqiyatsiz bo'lakning arxivdagi qismini olib tashlaydi"""
+        for path, size in reversed(appended):
+            if size is None:
+                path.unlink(missing_ok=True)
+            else:
+                os.truncate(path, size)
@@ -0,0 +1,130 @@
+"""
+Xabarlar va foydalanuvchilar bo'yicha indeksli qidiruv.
+
+PostgreSQL: xabarlar uchun to_tsvector GIN indeksi, ism/username uchun pg_trgm indekslari.
+SQLite: xabarlar uchun FTS5 jadvali (triggerlar orqali sinxronlanadi).
+Boshqa bazalarda oddiy icontains ishlatiladi.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramSimilarity
+from django.db import connection
+from django.db.models import F, Func, Q
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Greatest
+
+SEARCH_CONFIG = 'simple'  # Uzbek has no Postgres dictionary; keep words unstemmed
+FTS_TABLE = 'conversations_message_fts'
+FTS_TRIGGERS = {
+    'conversations_message_fts_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS conversations_message_fts_ai AFTER INSERT ON conversations_message BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+    'conversations_message_fts_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS conversations_message_fts_ad AFTER DELETE ON conversations_message BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        END""",
+    'conversations_message_fts_au': f"""
+        CREATE TRIGGER IF NOT EXISTS conversations_message_fts_au AFTER UPDATE OF text ON conversations_message BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+        END""",
+}
+POSTGRES_INDEXES = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS message_text_fts_idx ON conversations_message "
+    f"USING gin (to_tsvector('{SEARCH_CONFIG}'::regconfig, text))",
+    # Django compiles icontains as UPPER(col::text) LIKE UPPER(%s) on Postgres
+    "CREATE INDEX IF NOT EXISTS tguser_full_name_trgm_idx ON conversations_telegramuser "
+    "USING gin (UPPER(full_name::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS tguser_username_trgm_idx ON conversations_telegramuser "
+    "USING gin (UPPER(username::text) gin_trgm_ops)",
+]
+
+
+class MessageDocument(Func):
+    """to_tsvector(text) — migratsiyadagi GIN indeks ifodasi bilan aynan bir xil bo'lishi kerak"""
+    template = f"to_tsvector('{SEARCH_CONFIG}'::regconfig, %(expressions)s)"
+    output_field = SearchVectorField()
+
+
+def _fts5_query(query: str) -> str:
+    # Every word must match (prefix search); quoting keeps FTS5 syntax out of user input
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def matching_messages(queryset, query: str):
+    """Matni qidiruvga mos keladigan xabarlar (tartiblanmagan)"""
+    if connection.vendor == 'postgresql':
+        return queryset.annotate(search_document=MessageDocument('text')).filter(
+            search_document=SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch'),
+        )
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return queryset.none()
+        return queryset.filter(id__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,),
+        ))
+    return queryset.filter(text__icontains=query)
+
+
+def search_messages(queryset, query: str):
+    """Mos xabarlar, eng relevantlari birinchi"""
+    queryset = matching_messages(queryset, query)
+    if connection.vendor == 'postgresql':
+        rank = SearchRank(F('search_document'), SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch'))
+    elif connection.vendor == 'sqlite':
+        rank = RawSQL(
+            f"(SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = conversations_message.id)",
+            (_fts5_query(query),),
+        )
+    else:
+        return queryset.order_by('-timestamp')
+    return queryset.annotate(search_rank=rank).order_by('-search_rank', '-timestamp')
+
+
+def search_users(queryset, query: str):
+    """Ism yoki username bo'yicha qidiruv (Postgres'da trigram indeks va o'xshashlik bo'yicha tartib)"""
+    queryset = queryset.filter(Q(full_name__icontains=query) | Q(username__icontains=query))
+    if connection.vendor == 'postgresql':
+        queryset = queryset.annotate(
+            search_rank=Greatest(TrigramSimilarity('full_name', query), TrigramSimilarity('username', query)),
+        ).order_by('-search_rank', '-created_at')
+    return queryset
+
+
+def install_search_index(conn):
+    """Qidiruv indekslarini yaratadi (idempotent). Migratsiya va post_migrate dan chaqiriladi."""
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            for statement in POSTGRES_INDEXES:
+                cursor.execute(statement)
+        elif conn.vendor == 'sqlite':
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"text, content='conversations_message', content_rowid='id', tokenize='unicode61')"
+            )
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name IN (%s)"
+                % ', '.join('%s' for _ in FTS_TRIGGERS),
+                list(FTS_TRIGGERS),
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            if existing != set(FTS_TRIGGERS):
+                # SQLite table rebuilds (ALTER in migrations) drop triggers; recreate and reindex
+                for sql in FTS_TRIGGERS.values():
+                    cursor.execute(sql)
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def uninstall_search_index(conn):
+    with conn.cursor() as cursor:
+        if conn.vendor == 'postgresql':
+            for name in ('message_text_fts_idx', 'tguser_full_name_trgm_idx', 'tguser_username_trgm_idx'):
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        elif conn.vendor == 'sqlite':
+            for name in FTS_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
@@ -1,16 +1,13 @@
 from rest_framework import serializers
-from .models import TelegramUser, Message
+from .models import TelegramUser, Message, Broadcast
 
 
 class TelegramUserSerializer(serializers.ModelSerializer):
-    message_count = serializers.SerializerMethodField()
+    message_count = serializers.IntegerField(read_only=True)  # annotated in TelegramUserViewSet
 
     class Meta:
         model = TelegramUser
-        fields = ['id', 'telegram_id', 'username', 'full_name', 'phone', 'language_code', 'created_at', 'last_active', 'message_count']
-
-    def get_message_count(self, obj):
-        return obj.messages.count()
+        fields = ['id', 'telegram_id', 'username', 'full_name', 'phone', 'language_code', 'created_at', 'last_active', 'is_subscribed', 'is_blocked', 'message_count']
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -26,3 +23,23 @@ class MessageSerializer(serializers.ModelSerializer):
 
     def get_topic_title(self, obj):
         return obj.topic.title if obj.topic else None
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    processed = serializers.IntegerField(read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Broadcast
+        fields = [
+            'id', 'text', 'status', 'total', 'sent', 'failed', 'blocked', 'processed', 'progress',
+            'error', 'created_at', 'started_at', 'finished_at', 'heartbeat_at',
+        ]
+        read_only_fields = [
+            'status', 'total', 'sent', 'failed', 'blocked',
+            'error', 'created_at', 'started_at', 'finished_at', 'heartbeat_at',
+        ]
+
+    def get_progress(self, obj):
+        """Foizda; qabul qiluvchilar hali hisoblanmagan bo'lsa 0"""
+        return round(100 * obj.processed / obj.total, 1) if obj.total else 0.0
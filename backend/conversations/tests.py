@@ -0,0 +1,296 @@
+import base64
+import csv
+import gzip
+import io
+import json
+import tempfile
+import warnings
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from conversations.models import STATS_VERSION_KEY, TOTAL_MESSAGES, CounterShard, Message, TelegramUser
+from conversations.pagination import encode_cursor
+from conversations.retention import RetentionEngine
+from knowledge.models import FAQ, Topic
+
+
+def local(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.get_current_timezone())
+
+
+class ApiTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='admin'))
+
+
+class ExportTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = TelegramUser.objects.create(telegram_id=1, full_name="Ali")
+        Message.objects.create(user=self.user, role='user', text="kecha", timestamp=local(2026, 10, 17, 12))
+        Message.objects.create(user=self.user, role='user', text="=HYPERLINK(\"http://x\")",
+                               timestamp=local(2026, 10, 18, 15))
+        Message.objects.create(user=self.user, role='bot', text="ertaga", timestamp=local(2026, 10, 19, 9))
+
+    def export(self, **params):
+        response = self.client.get('/api/messages/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_to_date_includes_the_whole_day(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(**{'from': '2026-10-18', 'to': '2026-10-18'}))))
+        self.assertEqual(len(rows), 1)
+
+    def test_impossible_dates_are_rejected(self):
+        for value in ('2026-02-30', '2026-10-18T25:00', 'kecha'):
+            response = self.client.get('/api/messages/export/', {'from': value})
+            self.assertEqual(response.status_code, 400, value)
+
+    def test_csv_cells_cannot_start_formulas(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(role='user'))))
+        self.assertEqual([row['text'] for row in rows], ['kecha', "'=HYPERLINK(\"http://x\")"])
+
+    def test_jsonl_keeps_text_as_is(self):
+        lines = [json.loads(line) for line in self.export(fmt='jsonl', role='user').splitlines()]
+        self.assertEqual(lines[1]['text'], "=HYPERLINK(\"http://x\")")
+
+
+class StatsCacheTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = TelegramUser.objects.create(telegram_id=1)
+
+    def stats(self):
+        return self.client.get('/api/stats/').data
+
+    def test_message_writes_do_not_depend_on_the_cache(self):
+        broken = mock.patch('django.core.cache.cache.set', side_effect=ConnectionError("redis down"))
+        with broken, self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            Message.objects.bulk_create([Message(user=self.user, role='user', text="salom")])
+            Message.objects.create(user=self.user, role='bot', text="alik")
+        self.assertEqual(Message.objects.count(), 2)
+
+    def test_stats_are_cached_until_messages_are_written(self):
+        self.assertEqual(self.stats()['total_messages'], 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.stats()['total_messages'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Message.objects.create(user=self.user, role='user', text="salom")
+        self.assertEqual(self.stats()['total_messages'], 1)
+
+    def test_one_version_bump_per_transaction(self):
+        with mock.patch('django.core.cache.cache.set') as cache_set, self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for i in range(5):
+                    Message.objects.create(user=self.user, role='user', text=str(i))
+                Message.objects.bulk_create([Message(user=self.user, role='bot', text="javob")])
+        self.assertEqual([c.args[0] for c in cache_set.call_args_list], [STATS_VERSION_KEY])
+
+    def test_new_messages_7d_is_a_rolling_window(self):
+        now = timezone.now()
+        first_chart_day = datetime.combine(timezone.localdate(now) - timedelta(days=6), time.min,
+                                           tzinfo=timezone.get_current_timezone())
+        Message.objects.bulk_create([
+            Message(user=self.user, role='user', text="ichida", timestamp=first_chart_day - timedelta(seconds=1)),
+            Message(user=self.user, role='user', text="tashqarida", timestamp=now - timedelta(days=7, minutes=1)),
+        ])
+        data = self.stats()
+        self.assertEqual(data['new_messages_7d'], 1)
+        self.assertEqual(sum(day['messages'] for day in data['daily_messages']), 0)
+
+
+class ListQueryCountTests(ApiTestCase):
+    """Ro'yxat endpointlari: so'rovlar soni sahifa hajmiga bog'liq emas (N+1 yo'q)"""
+
+    def setUp(self):
+        super().setUp()
+        topics = [Topic.objects.create(slug=f'topic-{i}', title=f"Mavzu {i}", order=i) for i in range(12)]
+        FAQ.objects.bulk_create(
+            [FAQ(topic=topics[i % 12], question=f"Savol {i}", answer="Javob") for i in range(24)]
+        )
+        users = TelegramUser.objects.bulk_create([TelegramUser(telegram_id=i) for i in range(1, 31)])
+        Message.objects.bulk_create(
+            [Message(user=users[i % 30], role='user', text=f"xabar {i}", topic=topics[i % 12]) for i in range(60)]
+        )
+
+    def assertListQueries(self, url, queries, page_sizes=(2, 20), **params):
+        for page_size in page_sizes:
+            with self.subTest(url=url, page_size=page_size, **params), self.assertNumQueries(queries):
+                response = self.client.get(url, {'page_size': page_size, **params})
+                self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_users(self):
+        self.assertListQueries('/api/users/', 2)
+        self.assertListQueries('/api/users/', 1, pagination='cursor')
+
+    def test_messages(self):
+        self.assertListQueries('/api/messages/', 2)
+        self.assertListQueries('/api/messages/', 1, pagination='cursor')
+
+    def test_topics(self):
+        # Topics and FAQs use the default page size; the second page is only partly filled
+        for page in (1, 2):
+            with self.subTest(page=page), self.assertNumQueries(2):
+                self.assertEqual(self.client.get('/api/topics/', {'page': page}).status_code, 200)
+
+    def test_faqs(self):
+        for page in (1, 3):
+            with self.subTest(page=page), self.assertNumQueries(2), warnings.catch_warnings():
+                warnings.simplefilter('error')  # UnorderedObjectListWarning
+                self.assertEqual(self.client.get('/api/faqs/', {'page': page}).status_code, 200)
+
+    def test_admin_user_list_counts_messages_without_join(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser('root'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/conversations/telegramuser/', {'o': '-4'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user._message_count for user in response.context['cl'].result_list][:2], [2, 2])
+        self.assertFalse([q['sql'] for q in queries if 'JOIN "conversations_message"' in q['sql']])
+
+
+class CounterTests(TestCase):
+
+    def test_increments_are_summed_across_shards(self):
+        with self.settings(COUNTER_SHARDS=4):
+            for _ in range(20):
+                CounterShard.objects.increment('test', 2)
+        self.assertEqual(CounterShard.objects.total('test'), 40)
+        self.assertLessEqual(CounterShard.objects.filter(name='test').count(), 4)
+
+    def test_message_writes_count_each_row_once(self):
+        user = TelegramUser.objects.create(telegram_id=1)
+        Message.objects.create(user=user, role='user', text="bir")
+        Message.objects.bulk_create([Message(user=user, role='bot', text=str(i)) for i in range(5)])
+        self.assertEqual(CounterShard.objects.total(TOTAL_MESSAGES), 6)
+
+    def test_conflict_options_are_refused(self):
+        user = TelegramUser.objects.create(telegram_id=1)
+        for option in ('ignore_conflicts', 'update_conflicts'):
+            with self.subTest(option=option), self.assertRaises(ValueError):
+                Message.objects.bulk_create([Message(user=user, role='user', text="x")], **{option: True})
+        self.assertEqual(CounterShard.objects.total(TOTAL_MESSAGES), 0)
+
+
+class RetentionTests(TestCase):
+
+    def setUp(self):
+        self.archive = tempfile.TemporaryDirectory()
+        self.addCleanup(self.archive.cleanup)
+        self.users = [TelegramUser.objects.create(telegram_id=i) for i in (1, 2)]
+        now = timezone.now()
+        for i in range(10):
+            Message.objects.create(user=self.users[i % 2], role='user', text=f"xabar {i}",
+                                   timestamp=now - timedelta(days=10 - i))
+
+    def engine(self, **options):
+        return RetentionEngine(chunk_size=3, archive_dir=self.archive.name, **options)
+
+    def archived_ids(self) -> list[int]:
+        ids = []
+        for path in Path(self.archive.name).rglob('*.jsonl.gz'):
+            with gzip.open(path, 'rt', encoding='utf-8') as fh:
+                ids += [json.loads(line)['id'] for line in fh]
+        return sorted(ids)
+
+    def test_defaults_keep_everything(self):
+        self.assertEqual(RetentionEngine.from_settings(archive_dir=self.archive.name).run().deleted, 0)
+        self.assertEqual(Message.objects.count(), 10)
+
+    def test_age_and_per_user_limits_archive_the_oldest(self):
+        oldest = list(Message.objects.order_by('timestamp').values_list('id', flat=True))
+        result = self.engine(max_age_days=7).run()
+        self.assertEqual((result.archived, result.deleted), (4, 4))
+        self.assertEqual(self.archived_ids(), sorted(oldest[:4]))
+
+        self.engine(max_per_user=2).run()
+        for user in self.users:
+            self.assertEqual(user.messages.count(), 2)
+        self.assertEqual(len(self.archived_ids()), 6)
+
+    def test_failed_delete_leaves_nothing_in_the_archive(self):
+        with mock.patch('django.db.models.query.QuerySet.delete', side_effect=DatabaseError("locked")):
+            with self.assertRaises(DatabaseError):
+                self.engine(max_total=5).run()
+        self.assertEqual(Message.objects.count(), 10)
+        self.assertEqual(self.archived_ids(), [])
+
+    def test_failed_archive_keeps_the_rows(self):
+        # The chunk spans several days; writing the second day's file fails after the first was written
+        real_open = gzip.open
+        calls = []
+
+        def flaky_open(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise OSError("disk full")
+            return real_open(*args, **kwargs)
+
+        with mock.patch('conversations.retention.gzip.open', side_effect=flaky_open), self.assertRaises(OSError):
+            self.engine(max_total=4).run()
+        self.assertEqual(Message.objects.count(), 10)
+        self.assertEqual(self.archived_ids(), [])
+
+
+class KeysetPaginationTests(ApiTestCase):
+
+    def setUp(self):
+        super().setUp()
+        user = TelegramUser.objects.create(telegram_id=1)
+        same_time = local(2026, 10, 18, 12)
+        # Ties on timestamp are ordered by id
+        Message.objects.bulk_create(
+            [Message(user=user, role='user', text=str(i), timestamp=same_time if i % 3 else local(2026, 10, 1 + i))
+             for i in range(12)]
+        )
+        self.expected = list(Message.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+
+    def page(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_forward_and_backward_pages_cover_every_row_once(self):
+        data = self.page('/api/messages/', pagination='cursor', page_size=5)
+        self.assertNotIn('count', data)
+        pages = [data]
+        while pages[-1]['next']:
+            pages.append(self.page(pages[-1]['next']))
+        self.assertEqual([row['id'] for page in pages for row in page['results']], self.expected)
+        self.assertIsNone(pages[0]['previous'])
+
+        back = self.page(pages[-1]['previous'])
+        self.assertEqual([row['id'] for row in back['results']], [row['id'] for row in pages[-2]['results']])
+
+    def test_page_number_mode_is_unchanged(self):
+        data = self.page('/api/messages/', page_size=5)
+        self.assertEqual(data['count'], 12)
+        self.assertEqual([row['id'] for row in data['results']], self.expected[:5])
+
+    def test_malformed_cursors_are_not_found(self):
+        def token(payload) -> str:
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+        for cursor in ('!!!', token([5, 1, 0]), token(['2026-10-18T12:00:00', 1, 0]),
+                       token(['2026-10-18T12:00:00+05:00', '1', 0]), token({'a': 1})):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.client.get('/api/messages/', {'cursor': cursor}).status_code, 404)
+        self.assertEqual(
+            self.client.get('/api/messages/', {'cursor': encode_cursor(local(2026, 10, 18, 12), 1)}).status_code, 200,
+        )
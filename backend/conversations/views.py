@@ -1,16 +1,44 @@
-from rest_framework import viewsets, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework import viewsets, permissions, mixins, status
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from django.db.models import Count
+from django.conf import settings
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from datetime import timedelta
-from .models import TelegramUser, Message, SystemStats
-from .serializers import TelegramUserSerializer, MessageSerializer
+from .export import FORMATS, ExportError, export_filename, stream_export
+from .models import TelegramUser, Message, Broadcast, CounterShard, TOTAL_MESSAGES, STATS_CACHE_KEY, STATS_VERSION_KEY
+from .pagination import KeysetPaginationMixin
+from .search import search_messages, search_users
+from .serializers import TelegramUserSerializer, MessageSerializer, BroadcastSerializer
+from knowledge.answer_cache import cache_stats
 from knowledge.models import Topic
 
 
-class TelegramUserViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = TelegramUser.objects.all()
+def export_response(request, kind: str) -> StreamingHttpResponse:
+    """
+    ?fmt=csv|jsonl&gzip=1&from=&to=&role=&topic=&user= — fayl sifatida oqim bilan.
+    'fmt', chunki ?format= DRF renderer tanlovi uchun band.
+    """
+    params = request.query_params
+    fmt = params.get('fmt', 'csv')
+    compress = params.get('gzip') in ('1', 'true')
+    try:
+        chunks = stream_export(kind, params, fmt, compress)
+    except ExportError as e:
+        raise ValidationError({'detail': str(e)})
+    response = StreamingHttpResponse(chunks, content_type='application/gzip' if compress else FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{export_filename(kind, fmt, compress)}"'
+    return response
+
+
+class TelegramUserViewSet(KeysetPaginationMixin, viewsets.ReadOnlyModelViewSet):
+    """?pagination=cursor — keyset sahifalash (created_at, id) bo'yicha"""
+    keyset_field = 'created_at'
+    queryset = TelegramUser.objects.with_message_count().order_by('-created_at')
     serializer_class = TelegramUserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -18,11 +46,17 @@ class TelegramUserViewSet(viewsets.ReadOnlyModelViewSet):
         qs = super().get_queryset()
         search = self.request.query_params.get('search')
         if search:
-            qs = qs.filter(full_name__icontains=search) | qs.filter(username__icontains=search)
+            qs = search_users(qs, search)
         return qs
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        return export_response(request, 'users')
+
 
-class MessageViewSet(viewsets.ReadOnlyModelViewSet):
+class MessageViewSet(KeysetPaginationMixin, viewsets.ReadOnlyModelViewSet):
+    """?pagination=cursor — keyset sahifalash (timestamp, id) bo'yicha"""
+    keyset_field = 'timestamp'
     queryset = Message.objects.select_related('user', 'topic').all()
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -32,43 +66,86 @@ class MessageViewSet(viewsets.ReadOnlyModelViewSet):
         user_id = self.request.query_params.get('user')
         if user_id:
             qs = qs.filter(user_id=user_id)
+        search = self.request.query_params.get('search')
+        if search:
+            qs = search_messages(qs, search)
         return qs
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        return export_response(request, 'messages')
+
+
+class BroadcastViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    E'lon yaratish navbatga qo'yadi; yuborishni runbot (yoki send_broadcast buyrug'i) bajaradi.
+    Progress (sent/failed/blocked) yuborish davomida har bir bo'lakdan keyin yangilanadi.
+    """
+    queryset = Broadcast.objects.all()
+    serializer_class = BroadcastSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        broadcast = self.get_object()
+        cancelled = Broadcast.objects.filter(
+            pk=broadcast.pk, status__in=[Broadcast.PENDING, Broadcast.RUNNING],
+        ).update(status=Broadcast.CANCELLED)
+        if not cancelled:
+            return Response({'detail': "Bu e'lon allaqachon yakunlangan"}, status=status.HTTP_409_CONFLICT)
+        # A running job notices the cancel after its current chunk and stamps finished_at itself
+        Broadcast.objects.filter(pk=broadcast.pk, started_at__isnull=True).update(finished_at=timezone.now())
+        broadcast.refresh_from_db()
+        return Response(self.get_serializer(broadcast).data)
+
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def stats_view(request):
+    # One cache round trip; a payload built before the last message write is ignored
+    cached = cache.get_many([STATS_CACHE_KEY, STATS_VERSION_KEY])
+    version = cached.get(STATS_VERSION_KEY)
+    payload = cached.get(STATS_CACHE_KEY)
+    if payload is not None and payload['version'] == version:
+        return Response(payload['data'])
+
     try:
         now = timezone.now()
+        tz = timezone.get_current_timezone()  # settings.TIME_ZONE (Asia/Tashkent)
         last_7_days = now - timedelta(days=7)
         last_30_days = now - timedelta(days=30)
+        today = timezone.localdate(now)
+        first_day = today - timedelta(days=6)
+
+        users = TelegramUser.objects.aggregate(
+            total=Count('id'),
+            new_7d=Count('id', filter=Q(created_at__gte=last_7_days)),
+        )
+        total_messages = CounterShard.objects.total(TOTAL_MESSAGES)  # Persistent count, one query
 
-        # 1. Persistent Total Messages from SystemStats
-        stats, _ = SystemStats.objects.get_or_create(id=1)
-        
-        # If stats was just created and we already have messages, sync it once
-        if stats.total_messages == 0:
-            actual_count = Message.objects.count()
-            if actual_count > 0:
-                stats.total_messages = actual_count
-                stats.save()
-
-        total_users = TelegramUser.objects.count()
-        total_messages = stats.total_messages  # Use persistent count
-        new_users_7d = TelegramUser.objects.filter(created_at__gte=last_7_days).count()
-        new_messages_7d = Message.objects.filter(timestamp__gte=last_7_days).count()
-
-        # Daily messages for last 7 days (this reflects actual available history)
+        # One grouped query from now - 7 days (rolling window for new_messages_7d); it starts
+        # before first_day's local midnight, so the last 7 local days of the chart are complete
+        per_day = {
+            row['day']: row
+            for row in (
+                Message.objects.filter(timestamp__gte=last_7_days)
+                .annotate(day=TruncDate('timestamp', tzinfo=tz))
+                .values('day')
+                .annotate(total=Count('id'), user_messages=Count('id', filter=Q(role='user')))
+                .order_by()
+            )
+        }
         daily_data = []
-        for i in range(6, -1, -1):
-            day = now - timedelta(days=i)
-            day_start = day.replace(hour=0, minute=0, second=0, microsecond=0)
-            day_end = day.replace(hour=23, minute=59, second=59, microsecond=999999)
-            count = Message.objects.filter(timestamp__range=(day_start, day_end), role='user').count()
+        for i in range(7):
+            day = first_day + timedelta(days=i)
             daily_data.append({
                 'date': day.strftime('%d-%b'),
-                'messages': count
+                'messages': per_day[day]['user_messages'] if day in per_day else 0,
             })
+        new_messages_7d = sum(row['total'] for row in per_day.values())
 
         # Top topics
         top_topics = (
@@ -78,14 +155,17 @@ def stats_view(request):
             .order_by('-count')[:5]
         )
 
-        return Response({
-            'total_users': total_users,
+        data = {
+            'total_users': users['total'],
             'total_messages': total_messages,
-            'new_users_7d': new_users_7d,
+            'new_users_7d': users['new_7d'],
             'new_messages_7d': new_messages_7d,
             'daily_messages': daily_data,
             'top_topics': list(top_topics),
-        })
+            'ai_cache': cache_stats(),
+        }
+        cache.set(STATS_CACHE_KEY, {'version': version, 'data': data}, settings.STATS_CACHE_TTL)
+        return Response(data)
     except Exception as e:
         print(f"Stats error: {e}")
         return Response({
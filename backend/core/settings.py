@@ -9,6 +9,12 @@ load_dotenv()
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+def env_int(name, default=None):
+    """Butun sonli env qiymati; bo'sh bo'lsa default"""
+    value = os.getenv(name, '')
+    return int(value) if value.strip() else default
+
 SECRET_KEY = os.getenv('DJANGO_SECRET_KEY', 'django-insecure-maslahatchi-2024')
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
 ALLOWED_HOSTS = [host.strip() for host in os.getenv('ALLOWED_HOSTS', '*').split(',') if host.strip()]
@@ -68,6 +74,17 @@ DATABASES = {
     )
 }
 
+# Cache: Redis if REDIS_URL is set (shared by web and bot worker), otherwise per-process memory
+REDIS_URL = os.getenv('REDIS_URL', '')
+CACHES = {
+    'default': (
+        {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+        if REDIS_URL else
+        {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    )
+}
+STATS_CACHE_TTL = int(os.getenv('STATS_CACHE_TTL', '30'))  # soniya
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -94,6 +111,8 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
+# ?page_size= upper bound for the messages/users APIs (conversations.pagination)
+API_MAX_PAGE_SIZE = env_int('API_MAX_PAGE_SIZE', 100)
 
 # JWT settings
 SIMPLE_JWT = {
@@ -108,7 +127,109 @@ CORS_ALLOWED_ORIGINS = [
 ]
 CORS_ALLOW_CREDENTIALS = True
 
+# Sharded counters (conversations.CounterShard)
+COUNTER_SHARDS = int(os.getenv('COUNTER_SHARDS', '8'))
+
+# Message retention (conversations.retention); empty value disables a rule (all off by default)
+RETENTION_MAX_AGE_DAYS = env_int('RETENTION_MAX_AGE_DAYS')
+RETENTION_MAX_TOTAL = env_int('RETENTION_MAX_TOTAL')
+RETENTION_MAX_PER_USER = env_int('RETENTION_MAX_PER_USER')
+RETENTION_CHUNK_SIZE = env_int('RETENTION_CHUNK_SIZE', 1000)
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+RETENTION_INTERVAL = float(os.getenv('RETENTION_INTERVAL', '3600'))  # bot worker, soniya
+
+# Streaming export (conversations.export): rows fetched per server-side cursor round trip
+EXPORT_CHUNK_SIZE = env_int('EXPORT_CHUNK_SIZE', 2000)
+
+# Local FAQ retrieval in front of the AI call (knowledge.retrieval)
+FAQ_MATCH_THRESHOLD = float(os.getenv('FAQ_MATCH_THRESHOLD', '0.6'))
+KNOWLEDGE_POLL_INTERVAL = float(os.getenv('KNOWLEDGE_POLL_INTERVAL', '5'))  # versiya tekshiruvi, soniya
+
+# Persistent AI answer cache (knowledge.answer_cache)
+AI_CACHE_ENABLED = os.getenv('AI_CACHE_ENABLED', 'True') == 'True'
+AI_CACHE_TTL = env_int('AI_CACHE_TTL', 7 * 24 * 3600)  # soniya
+AI_CACHE_MAX_ENTRIES = env_int('AI_CACHE_MAX_ENTRIES', 5000)
+AI_CACHE_MAX_DISTANCE = env_int('AI_CACHE_MAX_DISTANCE', 3)  # SimHash Hamming masofasi
+AI_CACHE_MIN_JACCARD = float(os.getenv('AI_CACHE_MIN_JACCARD', '0.6'))
+# Bot workers flush hit/miss stats and evict expired entries this often, off the reply path
+AI_CACHE_MAINTENANCE_INTERVAL = float(os.getenv('AI_CACHE_MAINTENANCE_INTERVAL', '60'))  # soniya
+
 # Telegram Bot Settings
 BOT_TOKEN = os.getenv('BOT_TOKEN', '')
 CHANNEL_ID = "@dustliknews"
+
+# Webhook rejimi (runbot --webhook)
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # tashqi HTTPS manzil, masalan https://bot.example.uz
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram/webhook')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = env_int('WEBHOOK_PORT', env_int('PORT', 8081))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')  # bo'sh bo'lsa BOT_TOKEN dan hosil qilinadi
+WEBHOOK_REPLY_TIMEOUT = float(os.getenv('WEBHOOK_REPLY_TIMEOUT', '1.0'))  # javobni webhook ichida qaytarish oynasi
+
+# Ko'p jarayonli bot (runbot --workers N)
+BOT_WORKERS = env_int('BOT_WORKERS', 1)
+BOT_WORKER_MAX_PENDING = env_int('BOT_WORKER_MAX_PENDING', 5000)  # barcha workerlar navbatidagi updatelar chegarasi
+BOT_WORKER_HEARTBEAT_INTERVAL = float(os.getenv('BOT_WORKER_HEARTBEAT_INTERVAL', '2'))  # soniya
+
+# Subscription check cache (soniya)
+SUB_CACHE_POSITIVE_TTL = float(os.getenv('SUB_CACHE_POSITIVE_TTL', '600'))
+SUB_CACHE_NEGATIVE_TTL = float(os.getenv('SUB_CACHE_NEGATIVE_TTL', '30'))
+SUB_CACHE_MAX_SIZE = int(os.getenv('SUB_CACHE_MAX_SIZE', '50000'))
+
+# Write-behind message log (bot worker)
+MESSAGE_LOG_BATCH_SIZE = int(os.getenv('MESSAGE_LOG_BATCH_SIZE', '100'))
+MESSAGE_LOG_FLUSH_INTERVAL = float(os.getenv('MESSAGE_LOG_FLUSH_INTERVAL', '1.0'))
+MESSAGE_LOG_MAX_PENDING = int(os.getenv('MESSAGE_LOG_MAX_PENDING', '10000'))
+
+# Foydalanuvchilar katalogi (bot.users): telegram_id → TelegramUser, last_active buferlanadi
+USER_CACHE_MAX_SIZE = env_int('USER_CACHE_MAX_SIZE', 50000)
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '600'))  # soniya; keyin bazadan qayta tekshiriladi
+USER_FLUSH_INTERVAL = float(os.getenv('USER_FLUSH_INTERVAL', '30'))  # last_active/profil yozish oralig'i
+
+# AI suhbat konteksti (bot.history): foydalanuvchining oxirgi xabarlari xotirada
+HISTORY_MAX_USERS = env_int('HISTORY_MAX_USERS', 10000)
+HISTORY_MAX_TURNS = env_int('HISTORY_MAX_TURNS', 10)  # foydalanuvchi + bot xabarlari
+HISTORY_MAX_TOKENS = env_int('HISTORY_MAX_TOKENS', 1000)  # AI so'roviga qo'shiladigan kontekst byudjeti
+HISTORY_MAX_MESSAGE_CHARS = env_int('HISTORY_MAX_MESSAGE_CHARS', 2000)
+HISTORY_MAX_CHARS = env_int('HISTORY_MAX_CHARS', 20_000_000)  # barcha foydalanuvchilar bo'yicha jami
+HISTORY_IDLE_TTL = float(os.getenv('HISTORY_IDLE_TTL', '1800'))  # soniya; eskiroq xabarlar kontekstga kirmaydi
+
+# Bot metrics are written to the log every N seconds
+METRICS_LOG_INTERVAL = float(os.getenv('METRICS_LOG_INTERVAL', '60'))
 AI_API_KEY = os.getenv('AI_API_KEY', '')
+
+# AI provider settings
+AI_PROVIDER = os.getenv('AI_PROVIDER', 'openai')  # openai | fake | dotted.path.Provider
+AI_MODEL = os.getenv('AI_MODEL', 'gpt-4o-mini')
+AI_TIMEOUT = float(os.getenv('AI_TIMEOUT', '30'))  # soniya, har bir so'rov uchun
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', '1'))
+AI_MAX_CONCURRENCY = int(os.getenv('AI_MAX_CONCURRENCY', '10'))
+AI_FAKE_LATENCY = float(os.getenv('AI_FAKE_LATENCY', '0.5'))
+AI_FAKE_TOKEN_DELAY = float(os.getenv('AI_FAKE_TOKEN_DELAY', '0'))  # soniya, har bir so'z uchun
+
+# Streaming AI answers: placeholder message edited with accumulated tokens
+AI_STREAMING = os.getenv('AI_STREAMING', 'True') == 'True'
+AI_STREAM_EDIT_INTERVAL = float(os.getenv('AI_STREAM_EDIT_INTERVAL', '1.0'))  # soniya; Telegram ~1 tahrir/s bitta chatga
+
+# Dispatcher rejalashtiruvchisi (bot.scheduler)
+SCHEDULER_MAX_PENDING = env_int('SCHEDULER_MAX_PENDING', 1000)  # jarayondagi jami kutayotgan updatelar
+SCHEDULER_AI_CONCURRENCY = env_int('SCHEDULER_AI_CONCURRENCY', AI_MAX_CONCURRENCY)
+SCHEDULER_AI_QUEUE = env_int('SCHEDULER_AI_QUEUE', 200)
+SCHEDULER_DB_CONCURRENCY = env_int('SCHEDULER_DB_CONCURRENCY', 20)
+SCHEDULER_DB_QUEUE = env_int('SCHEDULER_DB_QUEUE', 500)
+
+# Tezlik cheklovlari (bot.ratelimit)
+THROTTLE_RATE = float(os.getenv('THROTTLE_RATE', '1'))  # foydalanuvchi updatelari/soniya
+THROTTLE_BURST = float(os.getenv('THROTTLE_BURST', '5'))
+SEND_GLOBAL_RATE = float(os.getenv('SEND_GLOBAL_RATE', '30'))  # xabar/soniya, butun bot
+SEND_CHAT_RATE = float(os.getenv('SEND_CHAT_RATE', '1'))  # xabar/soniya, bitta shaxsiy chat
+SEND_CHAT_BURST = float(os.getenv('SEND_CHAT_BURST', '3'))
+SEND_GROUP_RATE = float(os.getenv('SEND_GROUP_RATE', str(20 / 60)))  # guruh/kanal: 20 xabar/min
+SEND_MAX_RETRIES = env_int('SEND_MAX_RETRIES', 3)  # 429 RetryAfter dan keyin qayta urinishlar
+
+# E'lonlar (bot.broadcast)
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', '25'))  # xabar/soniya; qolgan ulush handlerlar javoblari uchun
+BROADCAST_CONCURRENCY = env_int('BROADCAST_CONCURRENCY', 10)  # bir vaqtdagi sendMessage so'rovlari
+BROADCAST_CHUNK_SIZE = env_int('BROADCAST_CHUNK_SIZE', 200)  # bir bo'lakdagi qabul qiluvchilar (progress shu qadamda yangilanadi)
+BROADCAST_POLL_INTERVAL = float(os.getenv('BROADCAST_POLL_INTERVAL', '10'))  # runbot yangi vazifalarni tekshirish oralig'i
+BROADCAST_STALE_AFTER = float(os.getenv('BROADCAST_STALE_AFTER', '120'))  # heartbeat'siz shuncha soniyadan keyin vazifa qayta olinadi
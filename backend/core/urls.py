@@ -3,13 +3,14 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from knowledge.views import TopicViewSet, FAQViewSet
-from conversations.views import TelegramUserViewSet, MessageViewSet, stats_view
+from conversations.views import TelegramUserViewSet, MessageViewSet, BroadcastViewSet, stats_view
 
 router = DefaultRouter()
 router.register(r'topics', TopicViewSet, basename='topics')
 router.register(r'faqs', FAQViewSet, basename='faqs')
 router.register(r'users', TelegramUserViewSet, basename='users')
 router.register(r'messages', MessageViewSet, basename='messages')
+router.register(r'broadcasts', BroadcastViewSet, basename='broadcasts')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
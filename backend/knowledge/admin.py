@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Topic, FAQ
+from django.db.models import Count
+from .models import Topic, FAQ, CachedAnswer
 
 
 class FAQInline(admin.TabularInline):
@@ -16,14 +17,19 @@ class TopicAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
     inlines = [FAQInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_faq_count=Count('faqs'))
+
     def faq_count(self, obj):
-        return obj.faqs.count()
+        return obj._faq_count
     faq_count.short_description = "FAQlar"
+    faq_count.admin_order_field = '_faq_count'
 
 
 @admin.register(FAQ)
 class FAQAdmin(admin.ModelAdmin):
     list_display = ['topic', 'question_short', 'is_active', 'updated_at']
+    list_select_related = ['topic']
     list_filter = ['topic', 'is_active']
     search_fields = ['question', 'answer']
     list_editable = ['is_active']
@@ -31,3 +37,21 @@ class FAQAdmin(admin.ModelAdmin):
     def question_short(self, obj):
         return obj.question[:70]
     question_short.short_description = "Savol"
+
+
+@admin.register(CachedAnswer)
+class CachedAnswerAdmin(admin.ModelAdmin):
+    list_display = ['question_short', 'hits', 'latency_ms', 'created_at', 'last_hit_at']
+    search_fields = ['question', 'answer']
+    readonly_fields = ['key_hash', 'normalized', 'simhash', 'band0', 'band1', 'band2', 'band3',
+                       'latency_ms', 'hits', 'created_at', 'last_hit_at']
+    actions = ['purge_all']
+
+    def question_short(self, obj):
+        return obj.question[:70]
+    question_short.short_description = "Savol"
+
+    @admin.action(description="Butun keshni tozalash (siyosat o'zgarganda)")
+    def purge_all(self, request, queryset):
+        deleted, _ = CachedAnswer.objects.all().delete()
+        self.message_user(request, f"{deleted} ta javob keshdan o'chirildi")
@@ -0,0 +1,176 @@
+"""
+AI javoblari uchun bazada saqlanadigan kesh.
+1) Normallashtirilgan savol bo'yicha aniq moslik. Kalit faqat harf/tinish belgilari/bo'shliqlar
+   bo'yicha normallashtiriladi: stop-so'z va qo'shimchalar olib tashlanmaydi, aks holda
+   "qayerda" va "qachon" savollari bitta javobni olardi.
+2) SimHash (64 bit, 4 ta 16-bitli band): Hamming masofasi <= 3 bo'lsa kamida bitta
+   band to'liq mos keladi, shuning uchun nomzodlar indeksli so'rov bilan olinadi.
+
+Javob berish yo'lida faqat o'qish bor: hit/miss hisoblagichlari xotirada yig'iladi,
+flush_stats() ularni bazaga yozadi, evict() esa vaqti-vaqti bilan chaqiriladi (bot.utils).
+"""
+import hashlib
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.db.models import F, Q, Sum
+from django.utils import timezone
+
+from conversations.models import CounterShard
+from .models import CachedAnswer
+from .text import WORD_RE, normalize_text
+
+HITS = 'ai_cache.hits'
+MISSES = 'ai_cache.misses'
+SAVED_MS = 'ai_cache.saved_ms'
+
+MASK64 = (1 << 64) - 1
+
+_lock = threading.Lock()
+_pending = Counter()  # HITS / MISSES / SAVED_MS since the last flush_stats()
+_entry_hits: dict[int, tuple[int, object]] = {}  # CachedAnswer pk → (hits, last_hit_at)
+
+
+def normalize_question(question: str) -> str:
+    """Kichik harf, kirill → lotin, tinish belgilarisiz; so'zlarning o'zi o'zgarmaydi"""
+    return ' '.join(WORD_RE.findall(normalize_text(question)))
+
+
+def _features(tokens: list[str]) -> list[str]:
+    # Unigrams + bigrams: word order matters a little, extra words matter less
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def simhash(tokens: list[str]) -> int:
+    weights = [0] * 64
+    for feature in _features(tokens):
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    value = 0
+    for bit in range(64):
+        if weights[bit] > 0:
+            value |= 1 << bit
+    return value
+
+
+def bands(value: int) -> list[int]:
+    return [(value >> (16 * i)) & 0xFFFF for i in range(4)]
+
+
+def to_signed(value: int) -> int:
+    """BigIntegerField imzoli 64 bit"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _jaccard(a: str, b: str) -> float:
+    a, b = set(a.split()), set(b.split())
+    return len(a & b) / len(a | b) if a | b else 0.0
+
+
+def lookup(question: str) -> CachedAnswer | None:
+    """Keshdagi javob (aniq yoki deyarli bir xil savol uchun), topilmasa None"""
+    normalized = normalize_question(question)
+    if not normalized:
+        return None
+    fresh = CachedAnswer.objects.filter(created_at__gte=timezone.now() - timedelta(seconds=settings.AI_CACHE_TTL))
+
+    entry = fresh.filter(key_hash=hashlib.sha256(normalized.encode()).hexdigest()).first()
+    if entry is None:
+        value = simhash(normalized.split())
+        b0, b1, b2, b3 = bands(value)
+        candidates = fresh.filter(Q(band0=b0) | Q(band1=b1) | Q(band2=b2) | Q(band3=b3))[:50]
+        best = None
+        for candidate in candidates:
+            distance = bin((candidate.simhash & MASK64) ^ value).count('1')
+            if distance > settings.AI_CACHE_MAX_DISTANCE:
+                continue
+            # SimHash alone is too loose for very short questions
+            if _jaccard(candidate.normalized, normalized) < settings.AI_CACHE_MIN_JACCARD:
+                continue
+            if best is None or distance < best[0]:
+                best = (distance, candidate)
+        entry = best[1] if best else None
+
+    with _lock:
+        if entry is None:
+            _pending[MISSES] += 1
+            return None
+        _pending[HITS] += 1
+        _pending[SAVED_MS] += entry.latency_ms
+        hits, _ = _entry_hits.get(entry.pk, (0, None))
+        _entry_hits[entry.pk] = (hits + 1, timezone.now())
+    return entry
+
+
+def flush_stats() -> int:
+    """Xotiradagi hit/miss hisoblagichlari va yozuvlar hits'ini bazaga yozadi; yozilgan hitlar soni"""
+    with _lock:
+        counters, entry_hits = dict(_pending), dict(_entry_hits)
+        _pending.clear()
+        _entry_hits.clear()
+    try:
+        for name, value in counters.items():
+            CounterShard.objects.increment(name, value)
+        for pk, (hits, last_hit_at) in entry_hits.items():
+            CachedAnswer.objects.filter(pk=pk).update(hits=F('hits') + hits, last_hit_at=last_hit_at)
+    except Exception:
+        # Put everything back for the next attempt; at worst some counts are written twice
+        with _lock:
+            _pending.update(counters)
+            for pk, (hits, last_hit_at) in entry_hits.items():
+                pending, _ = _entry_hits.get(pk, (0, None))
+                _entry_hits[pk] = (pending + hits, last_hit_at)
+        raise
+    return counters.get(HITS, 0)
+
+
+def store(question: str, answer: str, latency_ms: int):
+    normalized = normalize_question(question)
+    if not normalized or not answer:
+        return
+    value = simhash(normalized.split())
+    b0, b1, b2, b3 = bands(value)
+    defaults = {
+        'normalized': normalized, 'question': question, 'answer': answer,
+        'simhash': to_signed(value), 'band0': b0, 'band1': b1, 'band2': b2, 'band3': b3,
+        'latency_ms': latency_ms, 'hits': 0, 'created_at': timezone.now(), 'last_hit_at': None,
+    }
+    try:
+        # Expired entries with the same key are overwritten
+        CachedAnswer.objects.update_or_create(
+            key_hash=hashlib.sha256(normalized.encode()).hexdigest(), defaults=defaults,
+        )
+    except IntegrityError:
+        return
+
+
+def evict() -> int:
+    """TTL dan o'tganlarini va hajm chegarasidan ortganlarini (eng kam ishlatilgan) o'chiradi"""
+    deleted, _ = CachedAnswer.objects.filter(
+        created_at__lt=timezone.now() - timedelta(seconds=settings.AI_CACHE_TTL),
+    ).delete()
+    excess = CachedAnswer.objects.count() - settings.AI_CACHE_MAX_ENTRIES
+    if excess > 0:
+        stale = CachedAnswer.objects.order_by(F('last_hit_at').asc(nulls_first=True), 'created_at')
+        ids = list(stale.values_list('id', flat=True)[:excess])
+        deleted += CachedAnswer.objects.filter(id__in=ids).delete()[0]
+    return deleted
+
+
+def cache_stats() -> dict:
+    totals = dict(
+        CounterShard.objects.filter(name__in=[HITS, MISSES, SAVED_MS])
+        .values('name').annotate(total=Sum('value')).values_list('name', 'total')
+    )
+    hits, misses = totals.get(HITS, 0), totals.get(MISSES, 0)
+    return {
+        'entries': CachedAnswer.objects.count(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0,
+        'saved_seconds': round(totals.get(SAVED_MS, 0) / 1000),
+    }
@@ -0,0 +1,271 @@
+"""
+Savol-javoblarni jadvaldan ommaviy import qilish (CSV, JSONL yoki Excel'dan saqlangan CSV).
+
+Ustunlar: topic (slug), question, answer; ixtiyoriy: is_active, topic_title, topic_emoji.
+Yangi mavzu uchun topic_title majburiy. Kalit — (topic slug, savol), bo'shliqlar normallashtiriladi.
+
+Avval butun fayl tekshiriladi: bitta xato bo'lsa ham hech narsa yozilmaydi va barcha xatolar
+qator raqamlari bilan qaytariladi. Yozish bitta tranzaksiyada bulk_create/bulk_update bilan;
+bilim bazasi versiyasi importdan keyin bir marta oshiriladi.
+"""
+import csv
+import io
+import json
+from dataclasses import asdict, dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FAQ, Topic
+from .signals import bump_version
+
+REQUIRED_COLUMNS = ('topic', 'question', 'answer')
+BATCH_SIZE = 500
+TRUE_VALUES = {'1', 'true', 'yes', 'ha', '+'}
+FALSE_VALUES = {'0', 'false', 'no', "yo'q", 'yoq', '-'}
+
+
+class ImportValidationError(ValueError):
+
+    def __init__(self, errors: list[str]):
+        super().__init__(f"{len(errors)} ta xato")
+        self.errors = errors
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    topics_created: int = 0
+    topics_updated: int = 0
+    dry_run: bool = False
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+    def __str__(self):
+        return (f"created={self.created} updated={self.updated} unchanged={self.unchanged} "
+                f"topics_created={self.topics_created} topics_updated={self.topics_updated}")
+
+
+@dataclass
+class _Row:
+    line: int
+    topic: str
+    question: str
+    answer: str
+    is_active: bool | None = None
+    topic_title: str = ''
+    topic_emoji: str = ''
+
+
+@dataclass
+class _Plan:
+    new_topics: list = field(default_factory=list)
+    changed_topics: list = field(default_factory=list)
+    create: list = field(default_factory=list)  # _Row
+    update: list = field(default_factory=list)  # FAQ with new values
+    unchanged: int = 0
+
+
+def normalize_question(text: str) -> str:
+    return ' '.join(text.split())
+
+
+def read_rows(content: bytes | str, fmt: str | None = None) -> list[tuple[int, dict]]:
+    """Fayl matni → [(qator raqami, ustunlar)]; fmt berilmasa, birinchi belgidan aniqlanadi"""
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')  # Excel writes a BOM
+        except UnicodeDecodeError:
+            raise ImportValidationError(["Fayl UTF-8 kodlashda bo'lishi kerak"])
+    if fmt is None:
+        fmt = 'jsonl' if content.lstrip().startswith('{') else 'csv'
+
+    if fmt == 'jsonl':
+        rows, errors = [], []
+        for line, text in enumerate(content.splitlines(), start=1):
+            if not text.strip():
+                continue
+            try:
+                value = json.loads(text)
+            except json.JSONDecodeError as e:
+                errors.append(f"{line}-qator: JSON xato ({e.msg})")
+                continue
+            if not isinstance(value, dict):
+                errors.append(f"{line}-qator: JSON obyekt bo'lishi kerak")
+                continue
+            rows.append((line, value))
+        if errors:
+            raise ImportValidationError(errors)
+        return rows
+
+    if fmt != 'csv':
+        raise ImportValidationError([f"Noma'lum format: {fmt} (csv yoki jsonl)"])
+    # Excel uses ';' (or tab) as the separator in many locales; the header line tells which
+    header = content.split('\n', 1)[0]
+    delimiter = max(',;\t', key=header.count)
+    reader = csv.DictReader(io.StringIO(content), delimiter=delimiter)
+    reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+    if not reader.fieldnames:
+        return []
+    # The header is checked here so a header-only file reports its columns, not "empty file"
+    missing = [name for name in REQUIRED_COLUMNS if name not in reader.fieldnames]
+    if missing:
+        raise ImportValidationError([f"Ustun(lar) yo'q: {', '.join(missing)}"])
+    # Excel leaves ",,," lines for rows that were only cleared
+    return [(reader.line_num, row) for row in reader if not _is_blank(row)]
+
+
+def _is_blank(row: dict) -> bool:
+    # Extra cells beyond the header are collected as a list under the None key
+    return not any(
+        (value if isinstance(value, str) else ''.join(value or [])).strip() for value in row.values()
+    )
+
+
+def validate(raw_rows: list[tuple[int, dict]]) -> list[_Row]:
+    errors = []
+    if not raw_rows:
+        raise ImportValidationError(["Fayl bo'sh"])
+    missing = [name for name in REQUIRED_COLUMNS if name not in raw_rows[0][1]]
+    if missing:
+        raise ImportValidationError([f"Ustun(lar) yo'q: {', '.join(missing)}"])
+
+    rows, seen, invalid = [], {}, set()
+    for line, data in raw_rows:
+        def text(name):
+            value = data.get(name)
+            return '' if value is None else str(value).strip()
+
+        row = _Row(
+            line=line,
+            topic=text('topic').lower(),
+            question=normalize_question(text('question')),
+            answer=text('answer'),
+            topic_title=text('topic_title'),
+            topic_emoji=text('topic_emoji'),
+        )
+        problems = [f"{name} bo'sh" for name in REQUIRED_COLUMNS if not getattr(row, name)]
+        if row.topic:
+            try:
+                validate_slug(row.topic)
+            except ValidationError:
+                problems.append(f"topic slug noto'g'ri: {row.topic}")
+                invalid.add(row.topic)
+        if len(row.question) > FAQ._meta.get_field('question').max_length:
+            problems.append("question 500 belgidan uzun")
+        if len(row.topic_title) > Topic._meta.get_field('title').max_length:
+            problems.append("topic_title 200 belgidan uzun")
+        if len(row.topic_emoji) > Topic._meta.get_field('emoji').max_length:
+            problems.append("topic_emoji 10 belgidan uzun")
+
+        active = data.get('is_active')
+        if isinstance(active, bool):
+            row.is_active = active
+        elif active not in (None, ''):
+            flag = str(active).strip().lower()
+            if flag in TRUE_VALUES:
+                row.is_active = True
+            elif flag in FALSE_VALUES:
+                row.is_active = False
+            else:
+                problems.append(f"is_active noto'g'ri: {active}")
+
+        key = (row.topic, row.question)
+        if row.question and key in seen:
+            problems.append(f"takroriy savol ({seen[key]}-qator bilan bir xil)")
+        seen.setdefault(key, line)
+
+        errors.extend((line, problem) for problem in problems)
+        rows.append(row)
+
+    # Missing topics can only be created when a title is given
+    existing = set(Topic.objects.filter(slug__in={row.topic for row in rows}).values_list('slug', flat=True))
+    known = existing | invalid | {row.topic for row in rows if row.topic_title}
+    for row in rows:
+        if row.topic and row.topic not in known:
+            errors.append((row.line, f"'{row.topic}' mavzusi yo'q (yangi mavzu uchun topic_title kerak)"))
+            known.add(row.topic)  # one error per missing topic is enough
+    if errors:
+        errors.sort(key=lambda error: error[0])
+        raise ImportValidationError([f"{line}-qator: {problem}" for line, problem in errors])
+    return rows
+
+
+def _plan(rows: list[_Row]) -> _Plan:
+    plan = _Plan()
+    topics = {topic.slug: topic for topic in Topic.objects.filter(slug__in={row.topic for row in rows})}
+
+    for row in rows:
+        topic = topics.get(row.topic)
+        if topic is None:
+            topic = topics[row.topic] = Topic(slug=row.topic, title=row.topic_title, emoji=row.topic_emoji or '📋')
+            plan.new_topics.append(topic)
+        elif topic.pk is None:
+            topic.title = topic.title or row.topic_title
+        elif topic not in plan.changed_topics and (
+            (row.topic_title and row.topic_title != topic.title)
+            or (row.topic_emoji and row.topic_emoji != topic.emoji)
+        ):
+            topic.title = row.topic_title or topic.title
+            topic.emoji = row.topic_emoji or topic.emoji
+            plan.changed_topics.append(topic)
+
+    existing = {}
+    for faq in FAQ.objects.filter(topic__slug__in=[slug for slug, topic in topics.items() if topic.pk]).select_related('topic'):
+        # Oldest row wins if the table already holds duplicates
+        existing.setdefault((faq.topic.slug, normalize_question(faq.question)), faq)
+
+    for row in rows:
+        faq = existing.get((row.topic, row.question))
+        if faq is None:
+            plan.create.append(row)
+            continue
+        is_active = faq.is_active if row.is_active is None else row.is_active
+        if faq.answer == row.answer and faq.is_active == is_active:
+            plan.unchanged += 1
+            continue
+        faq.answer, faq.is_active = row.answer, is_active
+        plan.update.append(faq)
+    return plan
+
+
+def import_faqs(content: bytes | str, fmt: str | None = None, dry_run: bool = False) -> ImportReport:
+    """
+    Faylni tekshirib, (topic, question) bo'yicha upsert qiladi.
+    Xato bo'lsa ImportValidationError (errors ro'yxati bilan); dry_run — faqat hisobot.
+    """
+    rows = validate(read_rows(content, fmt))
+    with transaction.atomic():
+        plan = _plan(rows)
+        report = ImportReport(
+            created=len(plan.create),
+            updated=len(plan.update),
+            unchanged=plan.unchanged,
+            topics_created=len(plan.new_topics),
+            topics_updated=len(plan.changed_topics),
+            dry_run=dry_run,
+        )
+        if dry_run or not (plan.new_topics or plan.changed_topics or plan.create or plan.update):
+            return report
+
+        Topic.objects.bulk_create(plan.new_topics, batch_size=BATCH_SIZE)
+        Topic.objects.bulk_update(plan.changed_topics, ['title', 'emoji'], batch_size=BATCH_SIZE)
+        topics = {topic.slug: topic for topic in Topic.objects.filter(slug__in={row.topic for row in plan.create})}
+        FAQ.objects.bulk_create(
+            [FAQ(topic=topics[row.topic], question=row.question, answer=row.answer,
+                 is_active=True if row.is_active is None else row.is_active)
+             for row in plan.create],
+            batch_size=BATCH_SIZE,
+        )
+        now = timezone.now()
+        for faq in plan.update:
+            faq.updated_at = now  # bulk_update skips auto_now
+        FAQ.objects.bulk_update(plan.update, ['answer', 'is_active', 'updated_at'], batch_size=BATCH_SIZE)
+        # bulk_* sends no post_save, so bot workers are told about the whole import once
+        bump_version()
+    return report
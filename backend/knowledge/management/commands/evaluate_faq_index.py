@@ -0,0 +1,83 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge.retrieval import FAQIndex
+from knowledge.text import CYRILLIC_TO_LATIN
+
+
+class Command(BaseCommand):
+    help = (
+        "FAQ indeksini baholaydi: sekundiga qidiruvlar soni va belgilangan namunalar bo'yicha aniqlik. "
+        "Namuna fayli JSONL: {\"question\": \"...\", \"faq_id\": 3} (mos FAQ yo'q bo'lsa faq_id: null)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples', help="Belgilangan savollar (JSONL), masalan knowledge/fixtures/faq_samples.jsonl",
+        )
+        parser.add_argument('--threshold', type=float, default=None)
+        parser.add_argument('--lookups', type=int, default=20_000, help="Benchmark uchun qidiruvlar soni")
+
+    def handle(self, *args, **options):
+        index = FAQIndex()
+        started = time.perf_counter()
+        index.refresh()
+        self.stdout.write(f"Indeks: {len(index)} ta FAQ, qurish {1000 * (time.perf_counter() - started):.1f} ms")
+        if not len(index):
+            raise CommandError("Faol FAQ topilmadi")
+
+        samples = self._load_samples(options['samples']) if options['samples'] else self._self_samples(index)
+        threshold = settings.FAQ_MATCH_THRESHOLD if options['threshold'] is None else options['threshold']
+        self._benchmark(index, [question for question, _ in samples], options['lookups'])
+        self._precision(index, samples, threshold)
+
+    def _load_samples(self, path):
+        with open(path, encoding='utf-8') as fh:
+            return [(row['question'], row.get('faq_id')) for row in map(json.loads, filter(str.strip, fh))]
+
+    def _self_samples(self, index):
+        """Namuna fayli bo'lmasa: FAQ savollari, ularning kirill va apostrofsiz variantlari"""
+        latin_to_cyrillic = {v: k for k, v in CYRILLIC_TO_LATIN.items() if len(v) == 1}
+        samples = []
+        for doc in index.documents():
+            samples.append((doc.question, doc.faq_id))
+            samples.append((doc.question.replace("'", "ʻ").lower(), doc.faq_id))
+            samples.append((''.join(latin_to_cyrillic.get(c, c) for c in doc.question.lower()), doc.faq_id))
+        samples += [("Bugun ob-havo qanday bo'ladi?", None), ("Salom, ishlaringiz yaxshimi", None)]
+        return samples
+
+    def _benchmark(self, index, questions, lookups):
+        started = time.perf_counter()
+        for i in range(lookups):
+            index.search(questions[i % len(questions)], limit=1)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"Qidiruv: {lookups} ta, {lookups / elapsed:,.0f} lookups/s, "
+            f"o'rtacha {1_000_000 * elapsed / lookups:.0f} µs"
+        )
+
+    def _precision(self, index, samples, threshold):
+        answered = correct = positives = found = 0
+        for question, expected in samples:
+            match = index.match(question, threshold=threshold)
+            positives += expected is not None
+            if match is None:
+                continue
+            answered += 1
+            if match.document.faq_id == expected:
+                correct += 1
+                found += 1
+            else:
+                self.stdout.write(self.style.WARNING(
+                    f"  xato: {question!r} → FAQ #{match.document.faq_id} (kutilgan: {expected}, "
+                    f"ishonch {match.confidence:.2f})"
+                ))
+        precision = correct / answered if answered else 0
+        recall = found / positives if positives else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Chegara {threshold}: {len(samples)} ta namuna, javob berildi {answered}, "
+            f"precision {precision:.1%}, recall {recall:.1%}"
+        ))
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from knowledge.importer import ImportValidationError, import_faqs
+
+
+class Command(BaseCommand):
+    help = (
+        "Savol-javoblarni CSV/JSONL fayldan import qiladi: (topic slug, savol) bo'yicha yangilaydi yoki "
+        "yaratadi. Ustunlar: topic, question, answer, [is_active, topic_title, topic_emoji]"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (Excel'dan saqlangan ham) yoki JSONL fayl")
+        parser.add_argument('--fmt', choices=['csv', 'jsonl'], help="Standart: fayl mazmunidan aniqlanadi")
+        parser.add_argument('--dry-run', action='store_true', help="Hech narsa yozmasdan hisobot")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.is_file():
+            raise CommandError(f"Fayl topilmadi: {path}")
+        try:
+            report = import_faqs(path.read_bytes(), fmt=options['fmt'], dry_run=options['dry_run'])
+        except ImportValidationError as e:
+            for error in e.errors:
+                self.stderr.write(error)
+            raise CommandError(f"Import bekor qilindi: {e}")
+        suffix = ' (dry-run)' if report.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(f"{report}{suffix}"))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from knowledge.answer_cache import cache_stats, evict
+from knowledge.models import CachedAnswer
+
+
+class Command(BaseCommand):
+    help = "AI javoblar keshini tozalaydi (bilim bazasi yoki siyosat o'zgarganda)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Butun keshni o'chirish")
+        parser.add_argument('--contains', help="Savol yoki javobida shu matn bor yozuvlar")
+        parser.add_argument('--older-than', type=int, metavar='DAYS', help="Shundan eski yozuvlar")
+        parser.add_argument('--stats', action='store_true', help="Faqat statistikani ko'rsatish")
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            for key, value in cache_stats().items():
+                self.stdout.write(f"{key}: {value}")
+            return
+
+        if options['all']:
+            queryset = CachedAnswer.objects.all()
+        elif options['contains'] or options['older_than'] is not None:
+            queryset = CachedAnswer.objects.all()
+            if options['contains']:
+                text = options['contains']
+                queryset = queryset.filter(question__icontains=text) | queryset.filter(answer__icontains=text)
+            if options['older_than'] is not None:
+                queryset = queryset.filter(created_at__lt=timezone.now() - timedelta(days=options['older_than']))
+        else:
+            # Default: faqat TTL va hajm chegarasi bo'yicha tozalash
+            self.stdout.write(self.style.SUCCESS(f"O'chirildi: {evict()} ta javob"))
+            return
+
+        deleted, _ = queryset.delete()
+        self.stdout.write(self.style.SUCCESS(f"O'chirildi: {deleted} ta javob"))
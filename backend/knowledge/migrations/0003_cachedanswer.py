@@ -0,0 +1,37 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0002_alter_faq_created_at_alter_faq_updated_at_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CachedAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key_hash', models.CharField(max_length=64, unique=True, verbose_name='Kalit (sha256)')),
+                ('normalized', models.TextField(verbose_name='Normallashtirilgan savol')),
+                ('question', models.TextField(verbose_name='Savol')),
+                ('answer', models.TextField(verbose_name='AI javobi')),
+                ('simhash', models.BigIntegerField(verbose_name='SimHash')),
+                ('band0', models.PositiveIntegerField(db_index=True)),
+                ('band1', models.PositiveIntegerField(db_index=True)),
+                ('band2', models.PositiveIntegerField(db_index=True)),
+                ('band3', models.PositiveIntegerField(db_index=True)),
+                ('latency_ms', models.PositiveIntegerField(default=0, verbose_name='AI kechikishi (ms)')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Qayta ishlatilgan')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Yaratilgan')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='Oxirgi ishlatilgan')),
+            ],
+            options={
+                'verbose_name': 'AI javob keshi',
+                'verbose_name_plural': 'AI javob keshi',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
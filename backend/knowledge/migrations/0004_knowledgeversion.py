@@ -0,0 +1,25 @@
+# Generated by Django 6.0.2 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0003_cachedanswer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KnowledgeVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versiya')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Yangilangan')),
+            ],
+            options={
+                'verbose_name': 'Bilim bazasi versiyasi',
+                'verbose_name_plural': 'Bilim bazasi versiyasi',
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0.2 on 2026-10-18 16:40
+
+from django.db import migrations
+
+
+def clear_answer_cache(apps, schema_editor):
+    # Keys built by the old normalization dropped question words, so the stored entries are not trustworthy
+    apps.get_model('knowledge', 'CachedAnswer').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0004_knowledgeversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_answer_cache, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 19:20
+
+from django.db import migrations
+
+
+def seed_version(apps, schema_editor):
+    # KnowledgeVersion.bump only ever updates this row, so it has to exist before the first bump
+    apps.get_model('knowledge', 'KnowledgeVersion').objects.using(schema_editor.connection.alias).get_or_create(
+        pk=1, defaults={'version': 0},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('knowledge', '0005_reset_answer_cache'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_version, migrations.RunPython.noop),
+    ]
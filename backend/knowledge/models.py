@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class Topic(models.Model):
@@ -34,3 +35,56 @@ class FAQ(models.Model):
 
     def __str__(self):
         return f"{self.topic.title} — {self.question[:50]}"
+
+
+class CachedAnswer(models.Model):
+    """
+    AI javoblari keshi. Normallashtirilgan savol bo'yicha aniq moslik,
+    SimHash bo'laklari (band) bo'yicha esa deyarli bir xil savollar topiladi.
+    """
+    key_hash = models.CharField(max_length=64, unique=True, verbose_name="Kalit (sha256)")
+    normalized = models.TextField(verbose_name="Normallashtirilgan savol")
+    question = models.TextField(verbose_name="Savol")
+    answer = models.TextField(verbose_name="AI javobi")
+    simhash = models.BigIntegerField(verbose_name="SimHash")
+    band0 = models.PositiveIntegerField(db_index=True)
+    band1 = models.PositiveIntegerField(db_index=True)
+    band2 = models.PositiveIntegerField(db_index=True)
+    band3 = models.PositiveIntegerField(db_index=True)
+    latency_ms = models.PositiveIntegerField(default=0, verbose_name="AI kechikishi (ms)")
+    hits = models.PositiveIntegerField(default=0, verbose_name="Qayta ishlatilgan")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Yaratilgan")
+    last_hit_at = models.DateTimeField(null=True, blank=True, verbose_name="Oxirgi ishlatilgan")
+
+    class Meta:
+        verbose_name = "AI javob keshi"
+        verbose_name_plural = "AI javob keshi"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return self.question[:60]
+
+
+class KnowledgeVersion(models.Model):
+    """
+    Bilim bazasi versiyasi (bitta qator). Topic/FAQ o'zgarganda oshiriladi;
+    bot workerlari shu raqamni kuzatib, xotiradagi nusxani yangilaydi.
+    """
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versiya")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan")
+
+    class Meta:
+        verbose_name = "Bilim bazasi versiyasi"
+        verbose_name_plural = "Bilim bazasi versiyasi"
+
+    def __str__(self):
+        return f"v{self.version}"
+
+    @classmethod
+    def current(cls) -> int:
+        return cls.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, using: str | None = None):
+        # Single atomic UPDATE; the row is seeded by migration 0006, so concurrent bumps never race on creation
+        cls.objects.using(using).filter(pk=1).update(version=models.F('version') + 1, updated_at=timezone.now())
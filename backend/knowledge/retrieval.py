@@ -0,0 +1,177 @@
+"""
+Faol FAQlar bo'yicha xotiradagi BM25 indeks.
+Savol yetarlicha ishonch bilan mos kelsa, bot AI chaqiruvisiz FAQ javobini beradi.
+"""
+import math
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from .models import FAQ
+from .text import tokenize
+
+QUESTION_WEIGHT = 3  # savol so'zlari javob matnidan muhimroq
+
+
+@dataclass(frozen=True)
+class FAQDocument:
+    faq_id: int
+    topic_id: int
+    topic_title: str
+    topic_emoji: str
+    question: str
+    answer: str
+    version: tuple = ()  # (updated_at, mavzu nomi, emoji) — o'zgarishni aniqlash uchun
+
+
+@dataclass(frozen=True)
+class FAQMatch:
+    document: FAQDocument
+    score: float
+    confidence: float
+
+
+class FAQIndex:
+    """
+    Inkremental yangilanadigan BM25 indeks.
+    confidence — savoldagi muhim so'zlar (IDF bo'yicha) FAQ savoli/mavzusida qanchalik qoplangani.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._docs: dict[int, FAQDocument] = {}
+        self._doc_terms: dict[int, Counter] = {}
+        self._doc_len: dict[int, int] = {}
+        self._title_terms: dict[int, frozenset] = {}
+        self._postings: dict[str, dict[int, int]] = defaultdict(dict)
+        self._total_len = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def documents(self) -> list[FAQDocument]:
+        return list(self._docs.values())
+
+    # --- indexing ---
+
+    def upsert(self, doc: FAQDocument):
+        with self._lock:
+            self._remove(doc.faq_id)
+            question_terms = tokenize(doc.question) + tokenize(doc.topic_title)
+            terms = Counter(question_terms * QUESTION_WEIGHT + tokenize(doc.answer))
+            self._docs[doc.faq_id] = doc
+            self._doc_terms[doc.faq_id] = terms
+            self._title_terms[doc.faq_id] = frozenset(question_terms)
+            self._doc_len[doc.faq_id] = sum(terms.values())
+            self._total_len += self._doc_len[doc.faq_id]
+            for term, tf in terms.items():
+                self._postings[term][doc.faq_id] = tf
+
+    def remove(self, faq_id: int):
+        with self._lock:
+            self._remove(faq_id)
+
+    def _remove(self, faq_id: int):
+        terms = self._doc_terms.pop(faq_id, None)
+        if terms is None:
+            return
+        del self._docs[faq_id]
+        del self._title_terms[faq_id]
+        self._total_len -= self._doc_len.pop(faq_id)
+        for term in terms:
+            posting = self._postings[term]
+            posting.pop(faq_id, None)
+            if not posting:
+                del self._postings[term]
+
+    def sync(self, documents):
+        """Faqat o'zgargan/yangi hujjatlarni qayta indekslaydi, yo'qolganlarini o'chiradi"""
+        seen = set()
+        changed = 0
+        for doc in documents:
+            seen.add(doc.faq_id)
+            current = self._docs.get(doc.faq_id)
+            if current is None or current != doc:
+                self.upsert(doc)
+                changed += 1
+        for faq_id in set(self._docs) - seen:
+            self.remove(faq_id)
+            changed += 1
+        return changed
+
+    def refresh(self):
+        """Bazadan inkremental yangilash: versiyalar bitta yengil so'rov, o'zgarganlari ikkinchisi"""
+        versions = {
+            faq_id: (updated_at, title, emoji)
+            for faq_id, updated_at, title, emoji in FAQ.objects.filter(
+                is_active=True, topic__is_active=True,
+            ).values_list('id', 'updated_at', 'topic__title', 'topic__emoji')
+        }
+        stale = [faq_id for faq_id, version in versions.items()
+                 if faq_id not in self._docs or self._docs[faq_id].version != version]
+        for faq in FAQ.objects.filter(id__in=stale).select_related('topic'):
+            self.upsert(document_from_faq(faq))
+        removed = set(self._docs) - set(versions)
+        for faq_id in removed:
+            self.remove(faq_id)
+        return len(stale) + len(removed)
+
+    # --- search ---
+
+    def _idf(self, term: str) -> float:
+        n = len(self._docs)
+        df = len(self._postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, question: str, limit: int = 3) -> list[FAQMatch]:
+        query_terms = set(tokenize(question))
+        if not query_terms or not self._docs:
+            return []
+
+        with self._lock:
+            avg_len = self._total_len / len(self._docs)
+            idf = {term: self._idf(term) for term in query_terms}
+            total_idf = sum(idf.values())
+            scores = defaultdict(float)
+            for term in query_terms:
+                for faq_id, tf in self._postings.get(term, {}).items():
+                    doc_len = self._doc_len[faq_id]
+                    norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+                    scores[faq_id] += idf[term] * norm
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+            return [
+                FAQMatch(
+                    document=self._docs[faq_id],
+                    score=score,
+                    confidence=sum(idf[t] for t in query_terms & self._title_terms[faq_id]) / total_idf,
+                )
+                for faq_id, score in ranked
+            ]
+
+    def match(self, question: str, threshold: float | None = None) -> FAQMatch | None:
+        """Eng yaxshi moslik, agar ishonch chegaradan yuqori bo'lsa"""
+        threshold = settings.FAQ_MATCH_THRESHOLD if threshold is None else threshold
+        results = self.search(question, limit=1)
+        if results and results[0].confidence >= threshold:
+            return results[0]
+        return None
+
+
+def document_from_faq(faq: FAQ) -> FAQDocument:
+    return FAQDocument(
+        faq_id=faq.id,
+        topic_id=faq.topic_id,
+        topic_title=faq.topic.title,
+        topic_emoji=faq.topic.emoji,
+        question=faq.question,
+        answer=faq.answer,
+        version=(faq.updated_at, faq.topic.title, faq.topic.emoji),
+    )
+
+
+faq_index = FAQIndex()
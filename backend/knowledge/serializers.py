@@ -17,6 +17,9 @@ class TopicSerializer(serializers.ModelSerializer):
         fields = ['id', 'slug', 'title', 'emoji', 'order', 'is_active', 'faq_count', 'faqs', 'created_at']
 
     def get_faq_count(self, obj):
+        # TopicViewSet annotates faq_count; freshly created objects fall back to a query
+        if hasattr(obj, 'faq_count'):
+            return obj.faq_count
         return obj.faqs.count()
 
 
@@ -29,4 +32,7 @@ class TopicListSerializer(serializers.ModelSerializer):
         fields = ['id', 'slug', 'title', 'emoji', 'order', 'is_active', 'faq_count', 'created_at']
 
     def get_faq_count(self, obj):
+        # TopicViewSet annotates faq_count; freshly created objects fall back to a query
+        if hasattr(obj, 'faq_count'):
+            return obj.faq_count
         return obj.faqs.count()
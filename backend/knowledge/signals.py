@@ -0,0 +1,32 @@
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import FAQ, KnowledgeVersion, Topic
+
+
+def bump_version(using: str | None = None):
+    """
+    Tranzaksiya commit bo'lgach versiyani oshiradi. Bitta tranzaksiyadagi
+    ko'p yozuv (admin inline, loaddata) uchun versiya faqat bir marta oshiriladi.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    connection = connections[using]
+    # Every callback remembers the connection's generation; the first one to run after a commit
+    # bumps and advances it, the rest of that commit see a newer generation and skip.
+    # Rolled-back callbacks never run, so a later transaction still gets its bump.
+    generation = getattr(connection, 'knowledge_version_generation', 0)
+
+    def bump():
+        if getattr(connection, 'knowledge_version_generation', 0) != generation:
+            return
+        connection.knowledge_version_generation = generation + 1
+        KnowledgeVersion.bump(using=using)
+
+    transaction.on_commit(bump, using=using)
+
+
+@receiver([post_save, post_delete], sender=Topic)
+@receiver([post_save, post_delete], sender=FAQ)
+def knowledge_changed(sender, using=None, **kwargs):
+    bump_version(using)
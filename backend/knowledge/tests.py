@@ -0,0 +1,185 @@
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.test import TestCase
+
+from conversations.models import CounterShard
+from knowledge import answer_cache
+from knowledge.importer import ImportValidationError, import_faqs
+from knowledge.models import FAQ, CachedAnswer, KnowledgeVersion, Topic
+from knowledge.retrieval import FAQIndex
+from knowledge.text import stem, tokenize
+
+SAMPLES = Path(__file__).parent / 'fixtures' / 'faq_samples.jsonl'
+
+
+class AnswerCacheTests(TestCase):
+
+    def setUp(self):
+        answer_cache.flush_stats()
+
+    def test_question_words_are_part_of_the_key(self):
+        answer_cache.store("Pasport qayerda olinadi?", "Tuman markazida", 100)
+        self.assertIsNone(answer_cache.lookup("Pasport qachon olinadi?"))
+        self.assertNotEqual(
+            answer_cache.normalize_question("Pasport qancha turadi?"),
+            answer_cache.normalize_question("Pasport nima turadi?"),
+        )
+
+    def test_same_question_with_other_case_and_punctuation_hits(self):
+        answer_cache.store("Pasport qayerda olinadi?", "Tuman markazida", 100)
+        entry = answer_cache.lookup("  pasport QAYERDA olinadi!! ")
+        self.assertEqual(entry.answer, "Tuman markazida")
+
+    def test_lookup_only_reads_and_stats_are_flushed_later(self):
+        answer_cache.store("Pasport qayerda olinadi?", "Tuman markazida", 100)
+        with self.assertNumQueries(1):
+            answer_cache.lookup("Pasport qayerda olinadi?")
+        answer_cache.lookup("Pasport qachon olinadi?")
+        self.assertEqual(CounterShard.objects.count(), 0)
+
+        self.assertEqual(answer_cache.flush_stats(), 1)
+        self.assertEqual(CounterShard.objects.total(answer_cache.HITS), 1)
+        self.assertEqual(CounterShard.objects.total(answer_cache.MISSES), 1)
+        self.assertEqual(CounterShard.objects.total(answer_cache.SAVED_MS), 100)
+        self.assertEqual(CachedAnswer.objects.get().hits, 1)
+
+    def test_store_does_not_evict(self):
+        with self.settings(AI_CACHE_MAX_ENTRIES=1):
+            answer_cache.store("Pasport qayerda olinadi?", "Tuman markazida", 100)
+            answer_cache.store("Nafaqa qachon beriladi?", "Har oy", 100)
+            self.assertEqual(CachedAnswer.objects.count(), 2)
+            self.assertEqual(answer_cache.evict(), 1)
+
+
+class ImporterTests(TestCase):
+
+    def setUp(self):
+        # bulk_create sends no signals, so no version bump is pending before the import
+        [topic] = Topic.objects.bulk_create([Topic(slug='pasport', title="Pasport")])
+        FAQ.objects.bulk_create([
+            FAQ(topic=topic, question="Pasport qayerda olinadi?", answer="Tuman markazida"),
+            FAQ(topic=topic, question="Pasport qancha turadi?", answer="Bepul"),
+        ])
+        self.version = KnowledgeVersion.current()
+
+    def run_import(self, content, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            return import_faqs(content, **options)
+
+    def errors(self, content) -> list[str]:
+        with self.assertRaises(ImportValidationError) as ctx:
+            import_faqs(content)
+        return ctx.exception.errors
+
+    def test_upsert_reports_each_kind_and_bumps_the_version_once(self):
+        report = self.run_import(
+            "topic,question,answer,topic_title\n"
+            "pasport,Pasport  qayerda olinadi?,Tuman markazida,\n"
+            "pasport,Pasport qancha turadi?,50 ming so'm,\n"
+            "nafaqa,Nafaqa qachon beriladi?,Har oy,Nafaqa\n"
+        )
+        self.assertEqual((report.created, report.updated, report.unchanged, report.topics_created), (1, 1, 1, 1))
+        self.assertEqual(FAQ.objects.get(question="Pasport qancha turadi?").answer, "50 ming so'm")
+        self.assertEqual(FAQ.objects.count(), 3)
+        self.assertEqual(KnowledgeVersion.current(), self.version + 1)
+
+    def test_dry_run_and_no_op_import_write_nothing(self):
+        content = "topic,question,answer\npasport,Pasport qancha turadi?,50 ming so'm\n"
+        report = self.run_import(content, dry_run=True)
+        self.assertEqual(report.updated, 1)
+        self.assertEqual(FAQ.objects.get(question="Pasport qancha turadi?").answer, "Bepul")
+
+        report = self.run_import('{"topic": "pasport", "question": "Pasport qancha turadi?", "answer": "Bepul"}\n')
+        self.assertEqual(report.unchanged, 1)
+        self.assertEqual(KnowledgeVersion.current(), self.version)
+
+    def test_cleared_rows_are_skipped(self):
+        report = self.run_import("topic;question;answer\npasport;Yangi savol?;Javob\n;;\n;;;\n")
+        self.assertEqual(report.created, 1)
+
+    def test_header_only_files(self):
+        self.assertEqual(self.errors("topic,savol,javob\n"), ["Ustun(lar) yo'q: question, answer"])
+        self.assertEqual(self.errors("topic,question,answer\n,,\n"), ["Fayl bo'sh"])
+        self.assertEqual(self.errors(""), ["Fayl bo'sh"])
+
+    def test_all_errors_are_reported_with_line_numbers(self):
+        errors = self.errors(
+            "topic,question,answer\n"
+            "pasport,Yangi savol?,\n"
+            "yangi-mavzu,Savol?,Javob\n"
+            "pasport,Yangi savol?,Javob\n"
+        )
+        self.assertEqual(errors, [
+            "2-qator: answer bo'sh",
+            "3-qator: 'yangi-mavzu' mavzusi yo'q (yangi mavzu uchun topic_title kerak)",
+            "4-qator: takroriy savol (2-qator bilan bir xil)",
+        ])
+        self.assertEqual(FAQ.objects.count(), 2)
+
+
+class FAQIndexTests(TestCase):
+    """Haqiqiy foydalanuvchi savollari (fixtures/faq_samples.jsonl) initial_data FAQlariga qarshi"""
+    fixtures = ['initial_data']
+
+    def setUp(self):
+        self.index = FAQIndex()
+        self.index.refresh()
+        with SAMPLES.open(encoding='utf-8') as fh:
+            self.samples = [(row['question'], row['faq_id']) for row in map(json.loads, filter(str.strip, fh))]
+
+    def test_stemmer_keeps_roots_ending_in_ka_qa(self):
+        self.assertEqual(stem('nafaqa'), 'nafaqa')
+        self.assertEqual(tokenize("Nafaqasini nafaqaga"), ['nafaqa', 'nafaqa'])
+        self.assertEqual(tokenize("Maktabga bog'chaga"), ['maktab', 'bogcha'])
+
+    def test_no_wrong_answers_at_the_default_threshold(self):
+        for question, expected in self.samples:
+            match = self.index.match(question, threshold=settings.FAQ_MATCH_THRESHOLD)
+            if match is not None:
+                with self.subTest(question=question):
+                    self.assertEqual(match.document.faq_id, expected)
+
+    def test_expected_faq_is_ranked_first(self):
+        positives = [(question, expected) for question, expected in self.samples if expected is not None]
+        ranked_first = sum(
+            1 for question, expected in positives
+            if [match.document.faq_id for match in self.index.search(question, limit=1)] == [expected]
+        )
+        self.assertGreaterEqual(ranked_first / len(positives), 0.9)
+
+
+class KnowledgeVersionTests(TestCase):
+
+    def setUp(self):
+        self.topic = Topic.objects.create(slug='pasport', title="Pasport")
+
+    def test_row_is_seeded_and_bump_only_updates(self):
+        self.assertTrue(KnowledgeVersion.objects.filter(pk=1).exists())
+        start = KnowledgeVersion.current()
+        with self.assertNumQueries(1):
+            KnowledgeVersion.bump()
+        self.assertEqual(KnowledgeVersion.current(), start + 1)
+
+    def test_one_bump_per_transaction(self):
+        start = KnowledgeVersion.current()
+        for _ in range(2):
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(3):
+                    FAQ.objects.create(topic=self.topic, question=f"Savol {i}?", answer="Javob")
+                self.topic.save()
+        self.assertEqual(KnowledgeVersion.current(), start + 2)
+
+    def test_rolled_back_savepoint_does_not_swallow_the_bump(self):
+        start = KnowledgeVersion.current()
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    FAQ.objects.create(topic=self.topic, question="Savol?", answer="Javob")
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+            FAQ.objects.create(topic=self.topic, question="Boshqa savol?", answer="Javob")
+        self.assertEqual(KnowledgeVersion.current(), start + 1)
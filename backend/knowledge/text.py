@@ -0,0 +1,58 @@
+"""
+O'zbek tili uchun matn normalizatsiyasi: apostrof variantlari, kirill → lotin,
+stop-so'zlar va oddiy qo'shimchalarni kesish.
+"""
+import re
+
+APOSTROPHES = str.maketrans({c: "'" for c in "ʻʼ‘’`´′ʹ"})
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+    'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': "'", 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu',
+    'я': 'ya', 'ў': "o'", 'қ': 'q', 'ғ': "g'", 'ҳ': 'h',
+}
+CYRILLIC = str.maketrans(CYRILLIC_TO_LATIN)
+
+STOPWORDS = {
+    'va', 'uchun', 'bilan', 'ham', 'yoki', 'bu', 'shu', 'u', 'men', 'menga', 'meni', 'biz',
+    'siz', 'qanday', 'nima', 'nimalar', 'kerak', 'qaysi', 'qancha', 'qachon', 'qayerda',
+    'qayerga', 'mumkin', 'bormi', 'edi', 'ekan', 'mi', 'da', 'ga', 'dan', 'ni', 'qilib',
+    'iltimos', 'salom', 'assalomu', 'alaykum', 'haqida', 'bo\'yicha', 'boyicha',
+}
+
+# Longest first; a suffix is only cut if at least 3 letters remain.
+# -ka/-qa are not cut: far more roots end with them than words take them (nafaqa must not become nafa)
+SUFFIXES = sorted([
+    'larimizni', 'laringiz', 'larining', 'laridan', 'lariga', 'larini', 'larida', 'lardan',
+    'larga', 'larni', 'larda', 'lari', 'lar', 'ning', 'imiz', 'ingiz', 'sini', 'dagi',
+    'dan', 'ni', 'ga', 'da', 'si', 'im', 'ing', 'mi', 'man', 'miz',
+], key=len, reverse=True)
+
+WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)*|\d+")
+
+
+def normalize_text(text: str) -> str:
+    """Kichik harf, apostroflar birxillashtirilgan, kirill lotinga o'girilgan matn"""
+    return (text or '').lower().translate(APOSTROPHES).translate(CYRILLIC)
+
+
+def stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Qidiruv uchun tokenlar: apostrofsiz (o'/o bir xil), stop-so'zlarsiz, qo'shimchalari kesilgan"""
+    tokens = []
+    for word in WORD_RE.findall(normalize_text(text)):
+        if word in STOPWORDS:
+            continue
+        word = word.replace("'", '')
+        if len(word) < 2:
+            continue
+        tokens.append(stem(word))
+    return tokens
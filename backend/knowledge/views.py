@@ -1,15 +1,23 @@
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.response import Response
 from django.db.models import Count
+from .importer import ImportValidationError, import_faqs
 from .models import Topic, FAQ
 from .serializers import TopicSerializer, TopicListSerializer, FAQSerializer
 
 
 class TopicViewSet(viewsets.ModelViewSet):
-    queryset = Topic.objects.all()
+    queryset = Topic.objects.annotate(faq_count=Count('faqs')).order_by('order')
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action != 'list':
+            qs = qs.prefetch_related('faqs')
+        return qs
+
     def get_serializer_class(self):
         if self.action == 'list':
             return TopicListSerializer
@@ -17,7 +25,7 @@ class TopicViewSet(viewsets.ModelViewSet):
 
 
 class FAQViewSet(viewsets.ModelViewSet):
-    queryset = FAQ.objects.select_related('topic').all()
+    queryset = FAQ.objects.select_related('topic').order_by('topic__order', 'topic_id', 'id')
     serializer_class = FAQSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -27,3 +35,20 @@ class FAQViewSet(viewsets.ModelViewSet):
         if topic_id:
             qs = qs.filter(topic_id=topic_id)
         return qs
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+    def bulk_import(self, request):
+        """
+        file — CSV yoki JSONL (topic, question, answer, [is_active, topic_title, topic_emoji]);
+        dry_run=1 — faqat hisobot. Xatolar bo'lsa 400 va hech narsa yozilmaydi.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': "file maydoni kerak"}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get('fmt') or ('jsonl' if upload.name.lower().endswith(('.jsonl', '.json')) else None)
+        dry_run = request.data.get('dry_run') in ('1', 'true')
+        try:
+            report = import_faqs(upload.read(), fmt=fmt, dry_run=dry_run)
+        except ImportValidationError as e:
+            return Response({'detail': str(e), 'errors': e.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict())